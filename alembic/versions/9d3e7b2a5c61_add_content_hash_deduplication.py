@@ -0,0 +1,37 @@
+"""Add content hash to videos and processed_artifacts index
+
+Revision ID: 9d3e7b2a5c61
+Revises: 4f2a9c1d7e3b
+Create Date: 2026-10-17 12:40:07.531992
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3e7b2a5c61'
+down_revision = '4f2a9c1d7e3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_videos_content_sha256'), 'videos', ['content_sha256'], unique=False)
+    op.create_table('processed_artifacts',
+    sa.Column('content_sha256', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('file_path', sa.String(length=500), nullable=True),
+    sa.Column('duration_seconds', sa.Integer(), nullable=True),
+    sa.Column('source_video_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('content_sha256')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('processed_artifacts')
+    op.drop_index(op.f('ix_videos_content_sha256'), table_name='videos')
+    op.drop_column('videos', 'content_sha256')
@@ -0,0 +1,23 @@
+"""Index videos.file_path for legacy job lookups by upload path
+
+Revision ID: a6c4e8b1d352
+Revises: f3d9b6a2e817
+Create Date: 2026-10-17 19:02:41.518230
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c4e8b1d352'
+down_revision = 'f3d9b6a2e817'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_videos_file_path'), 'videos', ['file_path'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_videos_file_path'), table_name='videos')
@@ -0,0 +1,35 @@
+"""Add job ledger for idempotent video processing
+
+Revision ID: d81f3b6c2a47
+Revises: a6c4e8b1d352
+Create Date: 2026-10-17 19:48:12.903114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f3b6c2a47'
+down_revision = 'a6c4e8b1d352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('job_ledger',
+    sa.Column('video_id', sa.UUID(), nullable=False),
+    sa.Column('content_version', sa.String(length=500), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('worker_id', sa.String(length=255), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(), nullable=False),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('video_id', 'content_version')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_ledger')
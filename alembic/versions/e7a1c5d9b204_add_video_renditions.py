@@ -0,0 +1,26 @@
+"""Add renditions to videos and processed_artifacts
+
+Revision ID: e7a1c5d9b204
+Revises: c2a8f4e6d913
+Create Date: 2026-10-17 16:05:42.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a1c5d9b204'
+down_revision = 'c2a8f4e6d913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('renditions', sa.JSON(), nullable=True))
+    op.add_column('processed_artifacts', sa.Column('renditions', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('processed_artifacts', 'renditions')
+    op.drop_column('videos', 'renditions')
@@ -0,0 +1,26 @@
+"""Add HLS master playlist path to videos and processed_artifacts
+
+Revision ID: f3d9b6a2e817
+Revises: e7a1c5d9b204
+Create Date: 2026-10-17 17:20:13.640281
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3d9b6a2e817'
+down_revision = 'e7a1c5d9b204'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('videos', sa.Column('hls_playlist_path', sa.String(length=500), nullable=True))
+    op.add_column('processed_artifacts', sa.Column('hls_playlist_path', sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('processed_artifacts', 'hls_playlist_path')
+    op.drop_column('videos', 'hls_playlist_path')
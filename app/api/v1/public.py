@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, Query, status
+import posixpath
+
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
@@ -11,9 +13,21 @@ from app.repositories.vote_repository import vote_repository
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.core.exceptions import ValidationException, NotFoundException
+from app.processing.hls import MASTER_PLAYLIST, HLS_CONTENT_TYPES, rewrite_playlist
+from app.storage.file_service import fileservice
 
 router = APIRouter()
 
+# Los playlists de un video procesado no cambian; las URLs firmadas de los segmentos duran 1 hora
+PLAYLIST_CACHE_CONTROL = "public, max-age=300"
+
+
+def playlist_url(video) -> Optional[str]:
+    """URL of the HLS master playlist served by get_video_playlist"""
+    if not video.hls_playlist_path:
+        return None
+    return f"/api/public/videos/{video.id}/hls/{MASTER_PLAYLIST}"
+
 
 @router.get(
     "/videos",
@@ -38,6 +52,7 @@ async def list_public_videos(
             video_id=str(v.id),
             title=v.title,
             processed_url=v.file_path,
+            playlist_url=playlist_url(v),
             username=f"{v.user.first_name} {v.user.last_name}",
             city=v.user.city,
             votes=v.votes_count
@@ -46,6 +61,52 @@ async def list_public_videos(
     ]
 
 
+@router.get(
+    "/videos/{video_id}/hls/{playlist:path}",
+    status_code=status.HTTP_200_OK,
+    summary="HLS playlist of a public video",
+    description="Master or media playlist with segment URLs resolved for direct download from storage. **No authentication required**.",
+    response_class=Response,
+    responses={
+        200: {"description": "M3U8 playlist", "content": {HLS_CONTENT_TYPES[".m3u8"]: {}}},
+        404: {"description": "Video or playlist not found"}
+    }
+)
+async def get_video_playlist(
+    video_id: str,
+    playlist: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Serve an HLS playlist rewriting its segment URIs with storage URLs
+    (presigned in S3), so segments are fetched from S3/nginx and not through the API.
+    """
+    try:
+        video_uuid = UUID(video_id)
+    except ValueError:
+        raise ValidationException("Invalid UUID format")
+
+    if not playlist.endswith(".m3u8") or ".." in playlist.split("/"):
+        raise NotFoundException("Playlist not found")
+
+    video = await video_repository.get_by_id(db, video_uuid)
+
+    if not video or not video.is_public or not video.hls_playlist_path:
+        raise NotFoundException("Video not found or not public")
+
+    playlist_path = posixpath.join(posixpath.dirname(video.hls_playlist_path), playlist)
+    content = await fileservice.read_file(playlist_path)
+
+    if content is None:
+        raise NotFoundException("Playlist not found")
+
+    return Response(
+        content=rewrite_playlist(content.decode(), playlist_path, fileservice.get_file_url),
+        media_type=HLS_CONTENT_TYPES[".m3u8"],
+        headers={"Cache-Control": PLAYLIST_CACHE_CONTROL}
+    )
+
+
 @router.post(
     "/videos/{video_id}/vote",
     status_code=status.HTTP_200_OK,
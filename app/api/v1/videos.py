@@ -1,40 +1,101 @@
-from fastapi import APIRouter, Depends, File, UploadFile, Form, status
+from fastapi import APIRouter, Depends, File, UploadFile, Form, Header, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from uuid import UUID
+import asyncio
 import uuid
+import base64
+import binascii
+import posixpath
 from pathlib import Path
 import aiofiles
 
-from app.core.message_producer import SQSMessageProducer
-from app.db.session import get_db
+from app.queues import get_queue
+from app.db.session import get_db, SyncSessionLocal
 from app.schemas.video import (
     VideoUploadResponse,
+    VideoUploadUrlRequest,
+    VideoUploadUrlResponse,
+    VideoUploadCompleteRequest,
+    UploadPartUrl,
+    ResumableUploadResponse,
     VideoListItem,
     VideoDetail,
     VideoDeleteResponse,
     VideoPublishResponse
 )
 from app.repositories.video_repository import video_repository
+from app.repositories.upload_session_repository import upload_session_repository
+from app.repositories.processed_artifact_repository import processed_artifact_repository
+from app.repositories.outbox_repository import outbox_repository
 from app.storage.file_service import fileservice
+from app.storage.base_storage import UploadCompletionError
 from app.utils.video_validator import validate_video
+from app.utils.upload_stream import UploadStream
+from app.utils.signed_urls import verify_upload_signature
 from app.core.config import settings
+from app.core.admission import AdmissionController
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.core.exceptions import (
     ValidationException,
     NotFoundException,
-    ForbiddenException
+    ForbiddenException,
+    ConflictException
 )
 
 import boto3
 import json
+import logging
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from botocore.exceptions import ClientError
 
 router = APIRouter()
-producer = SQSMessageProducer(queue_name='message-queue')
+
+logger = logging.getLogger(__name__)
+
+
+def _queue_backlog() -> int:
+    """
+    Jobs waiting to be processed: messages in the queue plus outbox rows the relay
+    has not published yet (they pile up there when the relay lags or is down).
+    """
+    db = SyncSessionLocal()
+    try:
+        pending = outbox_repository.count_pending(db)
+    finally:
+        db.close()
+    return get_queue().depth() + pending
+
+
+# Control de admisión de uploads nuevos (aplicado por middleware en main.py)
+admission = AdmissionController(
+    backlog_source=_queue_backlog,
+    max_backlog=settings.ADMISSION_MAX_BACKLOG,
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    sample_interval=settings.ADMISSION_SAMPLE_SECONDS,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS
+)
+
+# Versión del protocolo tus en la que se basan los uploads reanudables
+TUS_VERSION = "1.0.0"
+
+
+def _parse_upload_metadata(header: Optional[str]) -> dict:
+    """Parse a tus Upload-Metadata header: "key base64value,key base64value" """
+    metadata = {}
+    if not header:
+        return metadata
+    for pair in header.split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        try:
+            metadata[parts[0]] = base64.b64decode(parts[1]).decode("utf-8") if len(parts) == 2 else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise ValidationException(f"Invalid Upload-Metadata value for '{parts[0]}'")
+    return metadata
 
 @router.post(
     "/upload",
@@ -45,7 +106,9 @@ producer = SQSMessageProducer(queue_name='message-queue')
     responses={
         201: {"description": "Video uploaded successfully"},
         401: {"description": "Unauthorized - Invalid or missing token"},
-        400: {"description": "Bad request - Invalid file or data"}
+        429: {"description": "Too many uploads in progress - retry after Retry-After seconds"},
+        503: {"description": "Processing backlog saturated - retry after Retry-After seconds"},
+        400: {"description": "Bad request - Invalid file, data or video (duration 20-60s, at least 1080p)"}
     }
 )
 async def upload_video(
@@ -58,19 +121,21 @@ async def upload_video(
     if not video_file.content_type or not video_file.content_type.startswith("video/"):
         raise ValidationException("File must be a video")
     
-    file_content = await video_file.read()
-    file_size = len(file_content)
-    
     max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
-    if file_size > max_size:
-        raise ValidationException(f"File size exceeds maximum allowed ({settings.MAX_FILE_SIZE_MB}MB)")
+    # El header del MP4 se valida mientras llega el upload: un video inválido
+    # recibe 400 antes de quedar guardado o encolado
+    upload_stream = UploadStream(
+        video_file, max_size=max_size, chunk_size=settings.UPLOAD_CHUNK_SIZE, validate=True
+    )
     
     # Generate unique filename
     video_id = uuid.uuid4()
     temp_filename = f"{video_id}.mp4"
     
-    # Save file to uploads folder (temp location for processing)
-    temp_file_path = await fileservice.save_file(file_content=file_content, filename=f"{video_id}.mp4", subfolder="uploads")
+    # Stream file to uploads folder (temp location for processing) without loading it in memory
+    temp_file_path = await fileservice.save_stream(upload_stream.chunks(), filename=temp_filename, subfolder="uploads")
+    file_size = upload_stream.size
+    duration = int(upload_stream.metadata["duration"]) if upload_stream.metadata else 0
     
     # Create video record in database with status="uploaded"
     video = await video_repository.create(
@@ -79,14 +144,15 @@ async def upload_video(
         title=title,
         original_filename=video_file.filename or "video.mp4",
         file_path=str(temp_file_path),
-        duration_seconds=0,
+        duration_seconds=duration,
         file_size_bytes=file_size,
-        status="uploaded"
+        status="uploaded",
+        content_sha256=upload_stream.sha256,
+        video_id=video_id
     )
     
-    # Queue the video processing task
-    producer.send_message(str(video_id), str(temp_file_path))
-    #task = process_video_task.delay(str(video.id), str(temp_file_path))
+    # Queue the video processing task: el outbox se confirma en la misma transacción que el video
+    await outbox_repository.add(db, video.id, str(temp_file_path))
     
     return VideoUploadResponse(
         message="Video uploaded successfully and queued for processing",
@@ -94,6 +160,419 @@ async def upload_video(
     )
 
 
+@router.post(
+    "/upload-url",
+    status_code=status.HTTP_201_CREATED,
+    response_model=VideoUploadUrlResponse,
+    summary="🔗 Request a direct upload URL",
+    description="Create the video and return a presigned URL to upload the file straight to storage. "
+                "Call `/{video_id}/complete` once the upload finishes. **Requires JWT authentication**.",
+    responses={
+        201: {"description": "Upload URL created"},
+        401: {"description": "Unauthorized - Invalid or missing token"},
+        429: {"description": "Too many uploads in progress - retry after Retry-After seconds"},
+        503: {"description": "Processing backlog saturated - retry after Retry-After seconds"},
+        400: {"description": "Bad request - Invalid file or data"}
+    }
+)
+async def create_upload_url(
+    upload_request: VideoUploadUrlRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create a video pending upload and return where to upload it (JWT Protected)"""
+    if not upload_request.content_type.startswith("video/"):
+        raise ValidationException("File must be a video")
+    
+    max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+    if upload_request.file_size_bytes > max_size:
+        raise ValidationException(f"File size exceeds maximum allowed ({settings.MAX_FILE_SIZE_MB}MB)")
+    
+    video_id = uuid.uuid4()
+    file_path = fileservice.build_path(f"{video_id}.mp4", subfolder="uploads")
+    upload = await fileservice.create_upload_url(
+        file_path,
+        upload_request.file_size_bytes,
+        settings.UPLOAD_URL_EXPIRE_SECONDS,
+        multipart=upload_request.multipart
+    )
+    
+    # El video queda en "pending_upload" hasta que el cliente llame a /complete
+    video = await video_repository.create(
+        db=db,
+        user_id=current_user.id,
+        title=upload_request.title,
+        original_filename=upload_request.filename,
+        file_path=file_path,
+        duration_seconds=0,
+        file_size_bytes=upload_request.file_size_bytes,
+        status="pending_upload",
+        video_id=video_id
+    )
+    
+    return VideoUploadUrlResponse(
+        video_id=str(video.id),
+        method=upload["method"],
+        upload_url=upload.get("url"),
+        headers=upload.get("headers", {}),
+        upload_id=upload.get("upload_id"),
+        part_size=upload.get("part_size"),
+        parts=[UploadPartUrl(**part) for part in upload.get("parts", [])],
+        expires_in=settings.UPLOAD_URL_EXPIRE_SECONDS
+    )
+
+
+async def _discard_direct_upload(db: AsyncSession, video, upload_id: Optional[str]) -> None:
+    """Give up a direct upload for good: drop what was stored and mark the video failed"""
+    await fileservice.abort_upload(video.file_path, upload_id)
+    await fileservice.delete_file(video.file_path)
+    video.status = "failed"
+    db.add(video)
+    await db.commit()
+
+
+@router.post(
+    "/{video_id}/complete",
+    status_code=status.HTTP_201_CREATED,
+    response_model=VideoUploadResponse,
+    summary="✅ Complete a direct upload",
+    description="Verify the uploaded file in storage and queue it for processing. **Requires JWT authentication**.",
+    responses={
+        201: {"description": "Upload verified and queued for processing"},
+        400: {"description": "File missing, size mismatch or upload already completed"},
+        401: {"description": "Unauthorized"},
+        403: {"description": "Forbidden - Not the video owner"},
+        404: {"description": "Video not found"}
+    }
+)
+async def complete_upload(
+    video_id: str,
+    complete_request: Optional[VideoUploadCompleteRequest] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Finalize a direct upload (JWT Protected)"""
+    try:
+        video_uuid = UUID(video_id)
+    except ValueError:
+        raise ValidationException("Invalid UUID format")
+    
+    video = await video_repository.get_by_id(db, video_uuid)
+    
+    if not video:
+        raise NotFoundException("Video not found")
+    
+    if video.user_id != current_user.id:
+        raise ForbiddenException("You don't have permission to complete this upload")
+    
+    if video.status != "pending_upload":
+        raise ValidationException("Video upload was already completed")
+    
+    complete_request = complete_request or VideoUploadCompleteRequest()
+    try:
+        await fileservice.complete_upload(
+            video.file_path,
+            complete_request.upload_id,
+            [part.model_dump() for part in complete_request.parts]
+        )
+    except UploadCompletionError as e:
+        # Con las URLs de las partes vencidas el cliente ya no puede volver a subir nada
+        expired = video.uploaded_at + timedelta(seconds=settings.UPLOAD_URL_EXPIRE_SECONDS) < datetime.utcnow()
+        if not e.retryable or expired:
+            await _discard_direct_upload(db, video, complete_request.upload_id)
+            raise ValidationException(f"Upload could not be completed and was discarded: {e}")
+        raise ValidationException(f"Upload parts could not be assembled ({e}), retry with the ETag of every part")
+    
+    stored_size = await fileservice.get_file_size(video.file_path)
+    if stored_size is None:
+        raise ValidationException("Uploaded file not found in storage")
+    
+    if stored_size != video.file_size_bytes:
+        await _discard_direct_upload(db, video, None)
+        raise ValidationException(
+            f"Uploaded file size ({stored_size} bytes) does not match the declared size ({video.file_size_bytes} bytes)"
+        )
+    
+    video.status = "uploaded"
+    db.add(video)
+    # Queue the video processing task (outbox, en la misma transacción)
+    await outbox_repository.add(db, video.id, video.file_path)
+    await db.commit()
+    
+    return VideoUploadResponse(
+        message="Video uploaded successfully and queued for processing",
+        task_id=str(video.id)
+    )
+
+
+@router.put(
+    "/local-upload",
+    status_code=status.HTTP_200_OK,
+    summary="📥 Signed local upload",
+    description="Stand-in for the S3 presigned PUT when using local storage. "
+                "Authorized by the signature in the URL returned by `/upload-url`.",
+    responses={
+        200: {"description": "File stored"},
+        400: {"description": "Invalid key, file too large or invalid video"},
+        403: {"description": "Invalid or expired signature"}
+    }
+)
+async def local_upload(
+    request: Request,
+    key: str = Query(..., description="Storage key, ej: uploads/<id>.mp4"),
+    expires: int = Query(..., description="Unix timestamp of expiration"),
+    signature: str = Query(..., description="HMAC signature of the URL")
+):
+    """Receive the raw file body of a signed local upload"""
+    if settings.STORAGE_TYPE == "s3":
+        raise NotFoundException("Local uploads are not enabled")
+    
+    if not verify_upload_signature(key, expires, signature):
+        raise ForbiddenException("Invalid or expired upload signature")
+    
+    subfolder, _, filename = key.partition("/")
+    if subfolder != "uploads" or not filename or "/" in filename or ".." in filename:
+        raise ValidationException("Invalid upload key")
+    
+    max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+    upload_stream = UploadStream(
+        request.stream(), max_size=max_size, chunk_size=settings.UPLOAD_CHUNK_SIZE, validate=True
+    )
+    await fileservice.save_stream(upload_stream.chunks(), filename=filename, subfolder=subfolder)
+    
+    return {"message": "File uploaded successfully", "size": upload_stream.size}
+
+
+@router.post(
+    "/uploads",
+    status_code=status.HTTP_201_CREATED,
+    response_model=ResumableUploadResponse,
+    summary="⏯️ Create a resumable upload",
+    description="Start a tus-like resumable upload. Send the total size in `Upload-Length` and the "
+                "title (base64) in `Upload-Metadata`, then PATCH chunks to the returned URL. "
+                "**Requires JWT authentication**.",
+    responses={
+        201: {"description": "Resumable upload created"},
+        400: {"description": "Bad request - Invalid size or metadata"},
+        401: {"description": "Unauthorized - Invalid or missing token"},
+        429: {"description": "Too many uploads in progress - retry after Retry-After seconds"},
+        503: {"description": "Processing backlog saturated - retry after Retry-After seconds"}
+    }
+)
+async def create_resumable_upload(
+    response: Response,
+    upload_length: int = Header(..., alias="Upload-Length", gt=0),
+    upload_metadata: Optional[str] = Header(None, alias="Upload-Metadata"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create a resumable upload session (JWT Protected)"""
+    max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+    if upload_length > max_size:
+        raise ValidationException(f"File size exceeds maximum allowed ({settings.MAX_FILE_SIZE_MB}MB)")
+    
+    metadata = _parse_upload_metadata(upload_metadata)
+    title = metadata.get("title", "").strip()
+    if not title or len(title) > 200:
+        raise ValidationException("Upload-Metadata must include a title (1-200 characters)")
+    
+    video_id = uuid.uuid4()
+    file_path = fileservice.build_path(f"{video_id}.mp4", subfolder="uploads")
+    storage_upload_id = await fileservice.begin_chunked_upload(file_path)
+    
+    await video_repository.create(
+        db=db,
+        user_id=current_user.id,
+        title=title,
+        original_filename=metadata.get("filename") or "video.mp4",
+        file_path=file_path,
+        duration_seconds=0,
+        file_size_bytes=upload_length,
+        status="pending_upload",
+        video_id=video_id
+    )
+    upload_session = await upload_session_repository.create(
+        db=db,
+        user_id=current_user.id,
+        video_id=video_id,
+        file_path=file_path,
+        upload_length=upload_length,
+        storage_upload_id=storage_upload_id
+    )
+    await db.commit()
+    
+    upload_url = f"/api/videos/uploads/{upload_session.id}"
+    response.headers["Location"] = upload_url
+    response.headers["Upload-Offset"] = "0"
+    response.headers["Tus-Resumable"] = TUS_VERSION
+    
+    return ResumableUploadResponse(
+        upload_id=str(upload_session.id),
+        video_id=str(video_id),
+        upload_url=upload_url,
+        offset=0,
+        length=upload_length,
+        min_chunk_size=fileservice.min_chunk_size,
+        max_chunk_size=settings.RESUMABLE_MAX_CHUNK_MB * 1024 * 1024
+    )
+
+
+async def _get_owned_upload_session(db: AsyncSession, upload_id: str, user: User):
+    try:
+        upload_uuid = UUID(upload_id)
+    except ValueError:
+        raise ValidationException("Invalid UUID format")
+    
+    upload_session = await upload_session_repository.get_by_id(db, upload_uuid)
+    
+    if not upload_session:
+        raise NotFoundException("Upload not found")
+    
+    if upload_session.user_id != user.id:
+        raise ForbiddenException("You don't have permission to access this upload")
+    
+    return upload_session
+
+
+@router.head(
+    "/uploads/{upload_id}",
+    status_code=status.HTTP_200_OK,
+    summary="⏯️ Get resumable upload offset",
+    description="Return the current offset in the `Upload-Offset` header. **Requires JWT authentication**.",
+    responses={
+        200: {"description": "Current offset in headers"},
+        401: {"description": "Unauthorized"},
+        403: {"description": "Forbidden - Not the upload owner"},
+        404: {"description": "Upload not found"}
+    }
+)
+async def get_resumable_upload_offset(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get how many bytes the server already has (JWT Protected)"""
+    upload_session = await _get_owned_upload_session(db, upload_id, current_user)
+    
+    return Response(
+        status_code=status.HTTP_200_OK,
+        headers={
+            "Upload-Offset": str(upload_session.upload_offset),
+            "Upload-Length": str(upload_session.upload_length),
+            "Tus-Resumable": TUS_VERSION,
+            "Cache-Control": "no-store"
+        }
+    )
+
+
+@router.patch(
+    "/uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="⏯️ Upload a chunk",
+    description="Append the request body at `Upload-Offset`. When the last byte arrives the video is "
+                "queued for processing. **Requires JWT authentication**.",
+    responses={
+        204: {"description": "Chunk stored, new offset in Upload-Offset"},
+        400: {"description": "Invalid chunk"},
+        401: {"description": "Unauthorized"},
+        403: {"description": "Forbidden - Not the upload owner"},
+        404: {"description": "Upload not found"},
+        409: {"description": "Upload-Offset does not match the server offset, or another chunk is being received"}
+    }
+)
+async def upload_resumable_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    content_type: Optional[str] = Header(None, alias="Content-Type"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Receive one chunk of a resumable upload (JWT Protected)"""
+    if content_type != "application/offset+octet-stream":
+        raise ValidationException("Content-Type must be application/offset+octet-stream")
+    
+    upload_session = await _get_owned_upload_session(db, upload_id, current_user)
+    
+    if upload_session.status == "completed":
+        raise ConflictException("Upload was already completed")
+    
+    if upload_offset != upload_session.upload_offset:
+        raise ConflictException(
+            f"Upload-Offset {upload_offset} does not match current offset {upload_session.upload_offset}"
+        )
+    
+    # Reclamar el offset en una transacción corta: el chunk (cliente móvil, quizás lento)
+    # llega sin lock ni conexión del pool tomados
+    claimed_at = await upload_session_repository.claim_chunk(
+        db, upload_session.id, upload_offset, settings.RESUMABLE_CHUNK_TIMEOUT_SECONDS
+    )
+    await db.commit()
+    if not claimed_at:
+        raise ConflictException("Another chunk of this upload is being received, retry after checking the offset")
+    
+    remaining = upload_session.upload_length - upload_offset
+    max_chunk = min(remaining, settings.RESUMABLE_MAX_CHUNK_MB * 1024 * 1024)
+    # Un chunk que no es el último y no llega al mínimo se rechaza antes de guardar la parte
+    upload_stream = UploadStream(
+        request.stream(),
+        max_size=max_chunk,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        min_size=min(fileservice.min_chunk_size, remaining)
+    )
+    parts = list(upload_session.parts)
+    
+    try:
+        part = await asyncio.wait_for(
+            fileservice.append_chunk(
+                upload_session.file_path,
+                upload_session.storage_upload_id,
+                len(parts) + 1,
+                upload_offset,
+                upload_stream.chunks()
+            ),
+            timeout=settings.RESUMABLE_CHUNK_TIMEOUT_SECONDS
+        )
+        if part:
+            parts.append(part)
+        new_offset = upload_offset + upload_stream.size
+        completed = new_offset == upload_session.upload_length
+        if completed:
+            await fileservice.complete_upload(upload_session.file_path, upload_session.storage_upload_id, parts)
+    except asyncio.TimeoutError:
+        await upload_session_repository.release_chunk(db, upload_session.id, claimed_at)
+        await db.commit()
+        raise ValidationException(f"Chunk not received within {settings.RESUMABLE_CHUNK_TIMEOUT_SECONDS} seconds")
+    except Exception:
+        await upload_session_repository.release_chunk(db, upload_session.id, claimed_at)
+        await db.commit()
+        raise
+    
+    stored = await upload_session_repository.store_chunk(
+        db, upload_session.id, claimed_at, new_offset, parts, completed
+    )
+    if not stored:
+        await db.rollback()
+        raise ConflictException("Upload was taken over by another request, retry after checking the offset")
+    
+    if completed:
+        video = await video_repository.get_by_id(db, upload_session.video_id)
+        video.status = "uploaded"
+        db.add(video)
+        # Queue the video processing task (outbox, en la misma transacción)
+        await outbox_repository.add(db, video.id, upload_session.file_path)
+    
+    await db.commit()
+    
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={
+            "Upload-Offset": str(new_offset),
+            "Tus-Resumable": TUS_VERSION
+        }
+    )
+
+
 @router.get(
     "",
     status_code=status.HTTP_200_OK,
@@ -165,7 +644,8 @@ async def get_video(
         votes=video.votes_count,
         duration_seconds=video.duration_seconds,
         file_size_bytes=video.file_size_bytes,
-        is_public=video.is_public
+        is_public=video.is_public,
+        renditions=video.renditions or {}
     )
 
 
@@ -253,11 +733,21 @@ async def delete_video(
     if video.is_public:
         raise ValidationException("Cannot delete a public video")
     
-    # Eliminar archivo físico
-    try:
-        await fileservice.delete_file(video.file_path)
-    except Exception as e:
-        print(f"Error deleting file: {e}")
+    # Eliminar archivos físicos (todas las renditions), salvo que otro video deduplicado apunte a los mismos
+    if await video_repository.is_file_shared(db, video.file_path, video.id):
+        logger.info(f" File {video.file_path} is shared with other videos, keeping it")
+    else:
+        for path in {video.file_path, *(video.renditions or {}).values()}:
+            try:
+                await fileservice.delete_file(path)
+            except Exception as e:
+                logger.error(f" Error deleting file {path}: {e}")
+        if video.hls_playlist_path:
+            try:
+                await fileservice.delete_directory(posixpath.dirname(video.hls_playlist_path))
+            except Exception as e:
+                logger.error(f" Error deleting HLS package: {e}")
+        await processed_artifact_repository.delete_by_file_path(db, video.file_path)
     
     # Eliminar registro de BD
     await video_repository.delete(db, video_uuid)
@@ -0,0 +1,95 @@
+"""
+Admission control for uploads.
+
+Combines the processing backlog (queue depth plus jobs still in the outbox,
+sampled at most every ADMISSION_SAMPLE_SECONDS) with the uploads in flight in this process, and
+sheds new uploads with 429/503 + Retry-After when the workers fall behind,
+instead of accepting files that would only grow the backlog.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+from app.core.exceptions import OverloadedException
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionController:
+    """
+    Args:
+        backlog_source: Blocking function returning the number of messages waiting in the queue
+        max_backlog: Queue backlog + uploads in flight above which uploads get a 503
+        max_in_flight: Uploads in flight in this process above which uploads get a 429
+        sample_interval: Seconds a backlog sample is considered fresh
+        retry_after: Seconds sent in the Retry-After header
+    """
+
+    def __init__(
+        self,
+        backlog_source: Callable[[], int],
+        max_backlog: int,
+        max_in_flight: int,
+        sample_interval: float,
+        retry_after: int
+    ):
+        self.backlog_source = backlog_source
+        self.max_backlog = max_backlog
+        self.max_in_flight = max_in_flight
+        self.sample_interval = sample_interval
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._backlog: Optional[int] = None
+        self._sampled_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            # La consulta a la cola es bloqueante (boto3): se hace fuera del event loop
+            self._backlog = int(await loop.run_in_executor(None, self.backlog_source))
+        except Exception as e:
+            # Si la cola no responde se sigue con la última muestra (fail-open)
+            logger.warning(f" Could not sample queue backlog: {e}")
+        finally:
+            self._sampled_at = time.monotonic()
+
+    async def backlog(self) -> Optional[int]:
+        """Last sampled queue backlog. Stale samples are refreshed in the background"""
+        if self._refresh is None or self._refresh.done():
+            if self._backlog is None and not self._sampled_at:
+                # Primera muestra: esperar para no admitir a ciegas
+                self._refresh = asyncio.ensure_future(self._sample())
+                await self._refresh
+            elif time.monotonic() - self._sampled_at >= self.sample_interval:
+                self._refresh = asyncio.ensure_future(self._sample())
+        return self._backlog
+
+    async def check(self) -> None:
+        """Raise OverloadedException if a new upload should not be admitted"""
+        if self.in_flight >= self.max_in_flight:
+            raise OverloadedException(
+                "Too many uploads in progress, try again later",
+                retry_after=self.retry_after,
+                status_code=429
+            )
+
+        backlog = await self.backlog()
+        if backlog is not None and backlog + self.in_flight >= self.max_backlog:
+            raise OverloadedException(
+                "Video processing is saturated, try again later",
+                retry_after=self.retry_after,
+                status_code=503
+            )
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Check admission and count the upload as in flight while the block runs"""
+        await self.check()
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
@@ -21,6 +21,43 @@ class Settings(BaseSettings):
     AWS_REGION: str = "us-east-1"
     S3_BUCKET_NAME: Optional[str] = None  # Requerido solo si STORAGE_TYPE=s3
     
+    # Job queue
+    QUEUE_BACKEND: str = "sqs"  # "sqs", "redis" (Redis Streams) o "local" (archivo SQLite, una sola máquina)
+    QUEUE_NAME: str = "message-queue"
+    QUEUE_VISIBILITY_TIMEOUT: int = 60  # Segundos que un mensaje recibido queda oculto a otros workers
+    REDIS_URL: str = "redis://redis:6379/1"  # Solo para QUEUE_BACKEND=redis
+    LOCAL_QUEUE_PATH: str = "./storage/queue.db"  # Solo para QUEUE_BACKEND=local
+    QUEUE_SEND_CONCURRENCY: int = 4  # Llamadas send_message_batch (10 mensajes c/u) en paralelo al publicar un batch del outbox (solo sqs)
+    QUEUE_DLQ_NAME: Optional[str] = None  # Dead-letter queue de los jobs con fallos permanentes (None = QUEUE_NAME-dlq)
+    
+    # Procesamiento
+    RENDER_ENGINE: str = "moviepy"  # "moviepy" (composición en Python) o "ffmpeg" (un solo proceso con filter_complex)
+    RENDER_SEGMENT_CACHE: bool = True  # Intro/outro pre-codificados una vez por rendition; cada job solo renderiza el cuerpo
+    RENDER_SEGMENT_CACHE_PATH: Optional[str] = None  # Directorio de la caché de intro/outro (None = TEMP_PATH/segment-cache)
+    HLS_ENABLED: bool = True  # Empaquetar las renditions en HLS además de los MP4
+    HLS_SEGMENT_SECONDS: int = 4  # Duración objetivo de cada segmento (múltiplo del intervalo de keyframes del render)
+    HLS_SEGMENT_TYPE: str = "fmp4"  # "fmp4" (CMAF, .m4s) o "mpegts" (.ts, reproductores antiguos)
+    HLS_UPLOAD_CONCURRENCY: int = 8  # Segmentos subidos a S3 en paralelo
+    WORKER_CONCURRENCY: int = 0  # Videos procesados en paralelo por worker (0 = según CPU y memoria disponibles)
+    WORKER_CPUS_PER_JOB: float = 1.0  # CPUs que reserva cada job al calcular la concurrencia
+    WORKER_MEMORY_PER_JOB_MB: int = 1500  # Memoria pico de un job (render + HLS) al calcular la concurrencia
+    WORKER_PIPELINE: bool = True  # Solapar descarga/subida (threads) con el render (procesos) en vez de un job completo por slot
+    WORKER_IO_CONCURRENCY: int = 4  # Jobs descargando o subiendo a la vez en modo pipeline
+    WORKER_PREFETCH_JOBS: int = 2  # Jobs descargados por adelantado (o descargándose) esperando CPU
+    WORKER_SCRATCH_MIN_FREE_MB: int = 2048  # Espacio libre mínimo en TEMP_PATH para recibir jobs nuevos
+    WORKER_SCRATCH_BUDGET_MB: int = 10240  # Scratch total de los jobs en curso de un worker; sin espacio no se reciben jobs nuevos
+    WORKER_SCRATCH_JOB_MB: int = 400  # Scratch reservado por job (original + renditions + HLS) hasta que ocupe más
+    WORKER_SCRATCH_TMPFS_PATH: Optional[str] = None  # Directorio en tmpfs (ej. /dev/shm/anb-scratch) para el scratch de los jobs que quepan
+    WORKER_SCRATCH_TMPFS_MB: int = 2048  # Máximo de scratch en tmpfs (cuenta como memoria del nodo)
+    WORKER_JOB_TIMEOUT_SECONDS: int = 900  # Tiempo máximo de un job; al vencerse se aborta y el video queda 'failed'
+    WORKER_IO_TIMEOUT_SECONDS: int = 600  # Tiempo máximo de cada etapa de I/O del pipeline (descarga+ffprobe, subida+DB)
+    WORKER_HEARTBEAT_SECONDS: int = 20  # Cada cuánto se renueva QUEUE_VISIBILITY_TIMEOUT de los mensajes en proceso
+    WORKER_MAX_ATTEMPTS: int = 5  # Entregas de un job con fallos transitorios (S3, DB, red) antes de mandarlo a la DLQ
+    WORKER_RETRY_BASE_SECONDS: int = 30  # Espera antes del primer reintento; se duplica en cada uno
+    WORKER_RETRY_MAX_SECONDS: int = 900  # Espera máxima entre reintentos
+    WORKER_METRICS_PORT: int = 9102  # Puerto de /metrics (formato Prometheus) del worker; 0 = deshabilitado
+    WORKER_METRICS_LOG: Optional[str] = None  # Archivo JSON-lines con los tiempos por etapa de cada job
+    
     # Storage Local (temporal)
     TEMP_PATH: str = "/tmp/anb-temp"
     
@@ -33,6 +70,22 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "production"
     DEBUG: bool = False
     MAX_FILE_SIZE_MB: int = 100
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes leídos por iteración al hacer streaming del upload
+    S3_PART_SIZE_MB: int = 8  # Tamaño de parte multipart (mínimo 5 MB según S3)
+    S3_MULTIPART_CONCURRENCY: int = 4  # Partes en vuelo simultáneamente por upload
+    S3_MULTIPART_MAX_RETRIES: int = 3  # Reintentos por parte (o rango descargado) antes de abortar
+    S3_DOWNLOAD_CONCURRENCY: int = 8  # Rangos de S3_PART_SIZE_MB descargados en paralelo (memoria: concurrencia x 1 MB)
+    RESUMABLE_MAX_CHUNK_MB: int = 16  # Tamaño máximo de cada PATCH en uploads reanudables
+    RESUMABLE_CHUNK_TIMEOUT_SECONDS: int = 300  # Tiempo máximo para recibir un PATCH; pasado esto otro PATCH puede retomar el upload
+    UPLOAD_URL_EXPIRE_SECONDS: int = 3600  # Validez de las URLs de upload directo (presigned)
+    DEDUP_CLAIM_TIMEOUT_SECONDS: int = 900  # Tras este tiempo sin terminar, otro job puede tomar el render de un hash
+    ADMISSION_MAX_BACKLOG: int = 500  # Mensajes en cola + uploads en curso a partir de los cuales se responde 503
+    ADMISSION_MAX_IN_FLIGHT: int = 50  # Uploads simultáneos por réplica a partir de los cuales se responde 429
+    ADMISSION_SAMPLE_SECONDS: float = 5.0  # Cada cuánto se vuelve a consultar la profundidad de la cola
+    ADMISSION_RETRY_AFTER_SECONDS: int = 30  # Valor del header Retry-After al rechazar
+    OUTBOX_BATCH_SIZE: int = 100  # Mensajes del outbox que reclama cada relay por vuelta
+    OUTBOX_POLL_SECONDS: float = 1.0  # Espera del relay cuando el outbox está vacío
+    OUTBOX_MAX_BACKOFF_SECONDS: int = 300  # Espera máxima entre reintentos de un mensaje que no se pudo publicar
     ALLOWED_EXTENSIONS: List[str] = [".mp4", ".avi", ".mov", ".mkv"]
     VIDEO_RESOLUTIONS: List[str] = ["360p", "480p", "720p"]
     CORS_ORIGINS: List[str] = ["*"]
@@ -35,3 +35,15 @@ class ForbiddenException(APIException):
     def __init__(self, detail: str = "Forbidden"):
         super().__init__(status_code=403, detail=detail)
 
+
+class ConflictException(APIException):
+    """Exception for requests that conflict with the current resource state"""
+    def __init__(self, detail: str = "Conflict"):
+        super().__init__(status_code=409, detail=detail)
+
+
+class OverloadedException(APIException):
+    """Exception for requests shed because the service is over capacity (429/503 with Retry-After)"""
+    def __init__(self, detail: str = "Service overloaded", retry_after: int = 30, status_code: int = 503):
+        self.retry_after = retry_after
+        super().__init__(status_code=status_code, detail=detail)
@@ -1,3 +1,4 @@
+from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -18,6 +19,10 @@ AsyncSessionLocal = sessionmaker(
     autoflush=False
 )
 
+# Engine síncrono para consultas que corren fuera del event loop (ej: la muestra de backlog de admisión)
+sync_engine = create_engine(settings.DATABASE_URL.replace("+asyncpg", ""), pool_size=1, max_overflow=1)
+SyncSessionLocal = sessionmaker(bind=sync_engine)
+
 
 async def get_db() -> AsyncSession:
     """Dependency for getting async database sessions"""
@@ -6,12 +6,15 @@ from fastapi.responses import JSONResponse
 from app.api.v1 import auth, videos, public
 from app.db.base import Base
 from app.db.session import engine
+from app.core.config import settings
 from app.core.exceptions import (
     UnauthorizedException,
     ForbiddenException,
     NotFoundException,
     ValidationException,
-    DuplicateException
+    DuplicateException,
+    ConflictException,
+    OverloadedException
 )
 
 app = FastAPI(
@@ -46,6 +49,52 @@ app.add_middleware(
 )
 
 
+# Margen para el overhead del multipart/form-data (boundaries, campos de texto)
+UPLOAD_FORM_OVERHEAD_BYTES = 1024 * 1024
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Reject uploads early from Content-Length, before the body is read"""
+    if request.method in ("POST", "PUT", "PATCH") and request.url.path.startswith("/api/videos"):
+        content_length = request.headers.get("content-length")
+        max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+        if content_length and content_length.isdigit() and int(content_length) > max_size + UPLOAD_FORM_OVERHEAD_BYTES:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"detail": f"File size exceeds maximum allowed ({settings.MAX_FILE_SIZE_MB}MB)"}
+            )
+    return await call_next(request)
+
+
+# Rutas que crean un upload nuevo: se les aplica control de admisión antes de leer el body
+ADMISSION_CONTROLLED_ROUTES = {
+    ("POST", "/api/videos/upload"),
+    ("POST", "/api/videos/upload-url"),
+    ("POST", "/api/videos/uploads"),
+}
+
+
+def _overloaded_response(exc: OverloadedException) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Shed new uploads with 429/503 when the processing backlog or uploads in flight are too high"""
+    if (request.method, request.url.path.rstrip("/")) not in ADMISSION_CONTROLLED_ROUTES:
+        return await call_next(request)
+    try:
+        async with videos.admission.admit():
+            return await call_next(request)
+    except OverloadedException as exc:
+        return _overloaded_response(exc)
+
+
 # Exception Handlers
 @app.exception_handler(UnauthorizedException)
 async def unauthorized_exception_handler(request: Request, exc: UnauthorizedException):
@@ -87,6 +136,19 @@ async def duplicate_exception_handler(request: Request, exc: DuplicateException)
     )
 
 
+@app.exception_handler(ConflictException)
+async def conflict_exception_handler(request: Request, exc: ConflictException):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": str(exc)}
+    )
+
+
+@app.exception_handler(OverloadedException)
+async def overloaded_exception_handler(request: Request, exc: OverloadedException):
+    return _overloaded_response(exc)
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(videos.router, prefix="/api/videos", tags=["Videos"])
@@ -118,7 +180,7 @@ def custom_openapi():
     # Aplicar seguridad a rutas específicas
     for path, path_item in openapi_schema["paths"].items():
         # Aplicar seguridad solo a rutas que NO son de autenticación ni públicas sin JWT
-        if "/auth/" not in path and path not in ["/api/public/videos", "/api/public/rankings", "/", "/health"]:
+        if "/auth/" not in path and path not in ["/api/public/videos", "/api/public/rankings", "/api/videos/local-upload", "/", "/health"]:
             for method in path_item.values():
                 if isinstance(method, dict) and "parameters" in method:
                     method["security"] = [{"bearerAuth": []}]
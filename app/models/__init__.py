@@ -1,6 +1,10 @@
 from app.models.user import User
 from app.models.video import Video
 from app.models.vote import Vote
+from app.models.upload_session import UploadSession
+from app.models.processed_artifact import ProcessedArtifact
+from app.models.outbox_message import OutboxMessage
+from app.models.job_ledger import JobLedgerEntry
 
-__all__ = ["User", "Video", "Vote"]
+__all__ = ["User", "Video", "Vote", "UploadSession", "ProcessedArtifact", "OutboxMessage", "JobLedgerEntry"]
 
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.db.base import Base
+
+
+class JobLedgerEntry(Base):
+    """
+    Processing job of one version of a video's content (see app/tasks/job_ledger.py).
+    "claimed" while a worker runs it (until lease_expires_at), "completed" once done.
+    """
+    __tablename__ = "job_ledger"
+    
+    video_id = Column(UUID(as_uuid=True), ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)
+    content_version = Column(String(500), primary_key=True)  # SHA-256 del upload (o su path si no tiene hash)
+    status = Column(String(50), default="claimed", nullable=False)  # claimed | completed
+    worker_id = Column(String(255), nullable=False)  # host:pid:nonce del job que lo tomó (claim_token)
+    attempts = Column(Integer, default=1, nullable=False)
+    claimed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    lease_expires_at = Column(DateTime, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
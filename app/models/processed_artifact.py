@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.db.base import Base
+
+
+class ProcessedArtifact(Base):
+    """
+    Content-addressed index of processed outputs: SHA-256 of the uploaded file -> processed file.
+    A row in "processing" is the claim of the job rendering it; duplicates wait on it.
+    """
+    __tablename__ = "processed_artifacts"
+    
+    content_sha256 = Column(String(64), primary_key=True)
+    status = Column(String(50), default="processing", nullable=False)  # processing | ready
+    file_path = Column(String(500), nullable=True)
+    renditions = Column(JSON, nullable=True)  # Resolución -> path procesado
+    hls_playlist_path = Column(String(500), nullable=True)
+    duration_seconds = Column(Integer, nullable=True)
+    source_video_id = Column(UUID(as_uuid=True), nullable=False)  # Video cuyo job generó (o genera) el artifact
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
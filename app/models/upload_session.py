@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from datetime import datetime
+import uuid
+from app.db.base import Base
+
+
+class UploadSession(Base):
+    """Server-side state of a resumable (chunked) upload, shared by every API replica"""
+    __tablename__ = "upload_sessions"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    video_id = Column(UUID(as_uuid=True), ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    upload_length = Column(BigInteger, nullable=False)
+    upload_offset = Column(BigInteger, default=0, nullable=False)
+    storage_upload_id = Column(String(1024), nullable=True)  # UploadId del multipart de S3
+    parts = Column(JSON, default=list, nullable=False)  # [{"PartNumber": n, "ETag": "..."}] en S3
+    status = Column(String(50), default="in_progress", nullable=False)  # "in_progress", "receiving" (un PATCH en curso) o "completed"
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    video = relationship("Video")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -13,10 +13,13 @@ class Video(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String(200), nullable=False)
     original_filename = Column(String(255), nullable=False)
-    file_path = Column(String(500), nullable=False)
+    file_path = Column(String(500), nullable=False, index=True)  # Índice para los mensajes antiguos sin id (find_video)
     status = Column(String(50), default="uploaded", nullable=False)
     duration_seconds = Column(Integer, nullable=True)
     file_size_bytes = Column(Integer, nullable=False)
+    content_sha256 = Column(String(64), nullable=True, index=True)  # Hash del archivo subido (deduplicación)
+    renditions = Column(JSON, nullable=True)  # Resolución -> path procesado, ej: {"360p": "processed/<id>/360p.mp4"}
+    hls_playlist_path = Column(String(500), nullable=True)  # Master playlist HLS, ej: "processed/<id>/hls/master.m3u8"
     is_public = Column(Boolean, default=False, nullable=False, index=True)
     votes_count = Column(Integer, default=0, nullable=False, index=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,33 @@
+"""
+Render engines for the processed video.
+
+The engine is chosen with Settings.RENDER_ENGINE:
+- "moviepy": composites frames in Python with MoviePy
+- "ffmpeg": one ffmpeg process with a filter_complex graph (same output, much cheaper)
+
+With Settings.RENDER_SEGMENT_CACHE the engine only renders the body of each
+video and the intro/outro come pre-encoded from a disk cache (segment_cache).
+"""
+from app.core.config import settings
+from app.processing.base import BaseRenderer, RenderError, RenderSpec, parse_resolution, scaled_size
+
+
+def get_renderer() -> BaseRenderer:
+    """Return the render engine configured in settings"""
+    engine = settings.RENDER_ENGINE
+    if engine == "moviepy":
+        from app.processing.moviepy_renderer import MoviePyRenderer
+        renderer = MoviePyRenderer()
+    elif engine == "ffmpeg":
+        from app.processing.ffmpeg_renderer import FFmpegRenderer
+        renderer = FFmpegRenderer()
+    else:
+        raise ValueError(f"Unknown RENDER_ENGINE: {engine}")
+
+    if not settings.RENDER_SEGMENT_CACHE:
+        return renderer
+    from app.processing.segment_cache import SegmentCacheRenderer, get_segment_cache
+    return SegmentCacheRenderer(renderer, get_segment_cache())
+
+
+__all__ = ["BaseRenderer", "RenderError", "RenderSpec", "get_renderer", "parse_resolution", "scaled_size"]
@@ -0,0 +1,110 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from typing import Dict, List, Tuple
+
+
+class RenderError(Exception):
+    """The render engine could not produce the output video"""
+    pass
+
+
+@dataclass
+class RenderSpec:
+    """
+    Everything a render engine needs to produce the processed video:
+    intro logo, clip (trimmed and scaled, with fade in), watermark and outro logo, without audio.
+
+    The composition is done once at `height`; every entry of `outputs`
+    (rendition height -> path) is scaled from it in the same pass.
+    """
+    input_path: str
+    outputs: Dict[int, str]
+    logo_path: str
+    duration: int  # Duración del original en segundos (la que queda en la DB)
+    source_width: int
+    source_height: int
+    max_duration: int = 30
+    height: int = 720
+    intro_duration: float = 2.5
+    outro_duration: float = 2.5
+    fade_duration: float = 2.0
+    watermark_height: int = 100
+    watermark_opacity: float = 0.5
+    fps: int = 30
+    codec: str = "libx264"
+    preset: str = "ultrafast"
+    bitrate: str = "2000k"  # Bitrate de la composición (720p); las renditions escalan por número de píxeles
+    threads: int = 4
+    keyframe_interval: int = 2  # Keyframe forzado cada N segundos (cortes de segmento HLS)
+    # Posición de este archivo en el video final (el cuerpo de un render por segmentos empieza tras el intro)
+    timeline_offset: float = 0.0
+
+    @property
+    def keyframe_args(self) -> List[str]:
+        return keyframe_args(self.keyframe_interval, self.timeline_offset, self.total_duration)
+
+    @property
+    def video_duration(self) -> int:
+        """Seconds of the original that are shown (trimmed to max_duration)"""
+        return min(self.duration, self.max_duration)
+
+    @property
+    def total_duration(self) -> float:
+        return self.intro_duration + self.video_duration + self.outro_duration
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return scaled_size(self.source_width, self.source_height, self.height)
+
+    def rendition_size(self, height: int) -> Tuple[int, int]:
+        width, _ = self.size
+        return scaled_size(width, self.height, height)
+
+    def bitrate_for(self, height: int) -> str:
+        """Video bitrate for a rendition, proportional to its pixel count"""
+        kbps = int(self.bitrate.rstrip("kK"))
+        return f"{max(int(kbps * (height / self.height) ** 2), 1)}k"
+
+    def body_spec(self, outputs: Dict[int, str]) -> "RenderSpec":
+        """Spec of the clip + watermark only, to be joined with pre-encoded intro/outro segments"""
+        return replace(self, outputs=outputs, intro_duration=0, outro_duration=0,
+                       timeline_offset=self.timeline_offset + self.intro_duration)
+
+
+def keyframe_args(interval: int, offset: float, duration: float) -> List[str]:
+    """
+    Keyframes every `interval` seconds of the final video for a piece that starts at `offset`
+    (and always on its first frame, so pieces can be joined with stream copy).
+    """
+    if offset % interval == 0:
+        return ['-force_key_frames', f'expr:gte(t,n_forced*{interval})']
+    first = interval - offset % interval
+    times = [0.0]
+    while first < duration:
+        times.append(round(first, 3))
+        first += interval
+    return ['-force_key_frames', ",".join(f"{t:g}" for t in times)]
+
+
+def scaled_size(width: int, height: int, target_height: int) -> Tuple[int, int]:
+    """Size after resizing to target_height keeping the aspect ratio, with even width (libx264 + yuv420p)"""
+    new_width = int(width * target_height / height)
+    if new_width % 2 != 0:
+        new_width -= 1
+    return new_width, target_height
+
+
+def parse_resolution(resolution: str) -> int:
+    """'480p' -> 480"""
+    try:
+        return int(resolution.lower().rstrip("p"))
+    except ValueError:
+        raise ValueError(f"Invalid resolution: {resolution}")
+
+
+class BaseRenderer(ABC):
+
+    @abstractmethod
+    def render(self, spec: RenderSpec) -> None:
+        """Render spec.input_path into every path of spec.outputs. Raises RenderError on failure"""
+        pass
@@ -0,0 +1,174 @@
+"""
+Single-process render engine: the whole composition is one ffmpeg filter_complex.
+
+Same output as MoviePyRenderer, but frames never leave ffmpeg (no decode to
+NumPy, composite in Python and pipe back to the encoder). Layers, bottom to top:
+
+    black canvas (W x 720, total duration)
+    intro logo       centered,               [0, intro)
+    clip             trimmed, scaled, fade,  [intro, intro + clip)
+    watermark        50% opacity, fade,      [intro, intro + video_duration)
+    outro logo       centered, fade,         [intro + video_duration, total)
+
+The composite is decoded/composited once and split into every rendition
+(360p/480p/720p...), each one scaled and encoded in the same process.
+A spec with intro/outro of 0 s (RenderSpec.body_spec) renders only the middle
+layers; see segment_cache for the pre-encoded intro/outro.
+"""
+import logging
+import subprocess
+from typing import List, Tuple
+
+from app.processing.base import BaseRenderer, RenderError, RenderSpec
+
+logger = logging.getLogger(__name__)
+
+
+def _seconds(value: float) -> str:
+    return f"{value:g}"
+
+
+def _logo_layers(spec: RenderSpec) -> List[Tuple[str, float]]:
+    """(layer, duration) of each looped logo input, in input order; intro/outro are omitted when 0 s"""
+    layers = [("intro", spec.intro_duration), ("watermark", spec.video_duration), ("outro", spec.outro_duration)]
+    return [(name, duration) for name, duration in layers if duration > 0]
+
+
+def build_filter_graph(spec: RenderSpec) -> str:
+    """
+    Build the filter_complex for a spec.
+    Inputs: 0 = video, then the logo looped for the intro, the watermark and the outro
+    (see _logo_layers; a body-only spec has just the watermark).
+    """
+    width, height = spec.size
+    intro = _seconds(spec.intro_duration)
+    outro_start = _seconds(spec.intro_duration + spec.video_duration)
+    fade = _seconds(spec.fade_duration)
+    inputs = {name: index + 1 for index, (name, _) in enumerate(_logo_layers(spec))}
+
+    filters = [
+        f"color=c=black:s={width}x{height}:r={spec.fps}:d={_seconds(spec.total_duration)}[bg]",
+        # Clip: recorte, 30 fps, escalado a 720p y fade in (sobre el alfa, como CrossFadeIn), desplazado tras el intro
+        f"[0:v]trim=end={spec.max_duration},setpts=PTS-STARTPTS,fps={spec.fps},"
+        f"scale={width}:{height},setsar=1,format=yuva420p,fade=t=in:st=0:d={fade}:alpha=1,"
+        f"setpts=PTS+{intro}/TB[clip]",
+        f"[{inputs['watermark']}:v]scale=-1:{spec.watermark_height},format=rgba,"
+        f"colorchannelmixer=aa={spec.watermark_opacity},fade=t=in:st=0:d={fade}:alpha=1,"
+        f"setpts=PTS+{intro}/TB[watermark]",
+    ]
+    # eof_action=pass: cuando una capa termina no se repite su último frame
+    layer = "bg"
+    if "intro" in inputs:
+        filters += [f"[{inputs['intro']}:v]format=rgba[intro]",
+                    "[bg][intro]overlay=x=(W-w)/2:y=(H-h)/2:eof_action=pass[v1]"]
+        layer = "v1"
+    filters += [f"[{layer}][clip]overlay=x=0:y=0:eof_action=pass[v2]",
+                "[v2][watermark]overlay=x=(W-w)/2:y=H/2:eof_action=pass[v3]"]
+    if "outro" in inputs:
+        filters += [f"[{inputs['outro']}:v]format=rgba,fade=t=in:st=0:d={fade}:alpha=1,setpts=PTS+{outro_start}/TB[outro]",
+                    "[v3][outro]overlay=x=(W-w)/2:y=(H-h)/2:eof_action=pass,format=yuv420p[out]"]
+    else:
+        filters.append("[v3]format=yuv420p[out]")
+
+    return ";".join(filters + build_fan_out(spec, "out", spec.height)[0])
+
+
+def build_fan_out(spec: RenderSpec, source: str, source_height: int) -> Tuple[List[str], List[str]]:
+    """
+    Split the stream labeled `source` (source_height tall) into one stream per
+    rendition of spec.outputs. Returns (filters, output labels), in spec.outputs order.
+    """
+    heights = list(spec.outputs)
+    labels = [f"r{height}" for height in heights]
+    filters = []
+
+    if len(heights) > 1:
+        filters.append(f"[{source}]split={len(heights)}" + "".join(f"[s{height}]" for height in heights))
+        inputs = [f"s{height}" for height in heights]
+    else:
+        inputs = [source]
+
+    for height, stream, label in zip(heights, inputs, labels):
+        if height == source_height:
+            filters.append(f"[{stream}]null[{label}]")
+        else:
+            width, _ = spec.rendition_size(height)
+            filters.append(f"[{stream}]scale={width}:{height},setsar=1[{label}]")
+
+    return filters, labels
+
+
+def _encode_args(spec: RenderSpec, height: int, label: str) -> List[str]:
+    """Mapping and encoder options for one rendition output"""
+    return [
+        '-map', f'[{label}]',
+        '-an',
+        '-c:v', spec.codec,
+        '-preset', spec.preset,
+        '-b:v', spec.bitrate_for(height),
+        *spec.keyframe_args,
+        '-pix_fmt', 'yuv420p',
+        '-r', str(spec.fps),
+        '-threads', str(spec.threads),
+        '-t', _seconds(spec.total_duration),
+        spec.outputs[height],
+    ]
+
+
+def build_command(spec: RenderSpec, ffmpeg_binary: str = "ffmpeg") -> List[str]:
+    """Full ffmpeg command line for a spec"""
+    # Una entrada del logo por capa: con un split, la rama del outro acumularía
+    # en memoria todos los frames del logo hasta que le toque mostrarse
+    logo_inputs = []
+    for _, duration in _logo_layers(spec):
+        logo_inputs += ['-loop', '1', '-framerate', str(spec.fps), '-t', _seconds(duration), '-i', spec.logo_path]
+
+    command = [
+        ffmpeg_binary, '-y', '-v', 'error',
+        '-i', spec.input_path,
+        *logo_inputs,
+        '-filter_complex', build_filter_graph(spec),
+    ]
+    for height in spec.outputs:
+        command += _encode_args(spec, height, f"r{height}")
+    return command
+
+
+def build_rendition_command(spec: RenderSpec, composite_path: str, heights: List[int],
+                            ffmpeg_binary: str = "ffmpeg") -> List[str]:
+    """
+    Command that scales an already composited video (spec.height tall) into the
+    given renditions with one decode. Used by engines that composite elsewhere.
+    """
+    rendition_spec = RenderSpec(**{**spec.__dict__, "outputs": {height: spec.outputs[height] for height in heights}})
+    filters, labels = build_fan_out(rendition_spec, "0:v", spec.height)
+
+    command = [ffmpeg_binary, '-y', '-v', 'error', '-i', composite_path, '-filter_complex', ";".join(filters)]
+    for height, label in zip(heights, labels):
+        command += _encode_args(rendition_spec, height, label)
+    return command
+
+
+def run_ffmpeg(command: List[str], timeout: int) -> None:
+    """Run an ffmpeg command. Raises RenderError on failure or timeout"""
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise RenderError(f"ffmpeg render timed out after {timeout}s")
+
+    if result.returncode != 0:
+        raise RenderError(f"ffmpeg render failed: {result.stderr.strip()[-2000:]}")
+
+
+class FFmpegRenderer(BaseRenderer):
+    """Render with a single ffmpeg process (filter_complex)"""
+
+    def __init__(self, ffmpeg_binary: str = "ffmpeg", timeout: int = 600):
+        self.ffmpeg_binary = ffmpeg_binary
+        self.timeout = timeout
+
+    def render(self, spec: RenderSpec) -> None:
+        logger.info(f" Rendering with ffmpeg: {spec.size[0]}x{spec.size[1]}, {spec.total_duration}s, "
+                    f"renditions {sorted(spec.outputs)}")
+        run_ffmpeg(build_command(spec, self.ffmpeg_binary), self.timeout)
+        logger.info(" Video rendered")
@@ -0,0 +1,106 @@
+"""
+HLS packaging of the rendered renditions.
+
+The MP4 renditions are segmented with stream copy (no re-encode) by a single
+ffmpeg process, which also writes the master playlist:
+
+    hls/master.m3u8
+    hls/<res>/index.m3u8
+    hls/<res>/init_<n>.mp4 + seg_000.m4s ...   (fmp4)
+    hls/<res>/seg_000.ts ...                   (mpegts)
+
+Segments can only be cut at keyframes, so the render forces one every
+RenderSpec.keyframe_interval seconds and HLS_SEGMENT_SECONDS must be a multiple of it.
+"""
+import logging
+import posixpath
+import re
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.processing.ffmpeg_renderer import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+MASTER_PLAYLIST = "master.m3u8"
+
+SEGMENT_EXTENSIONS = {"fmp4": "m4s", "mpegts": "ts"}
+
+# Content-Type de cada archivo del paquete (para S3 y para el endpoint de playlists)
+HLS_CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+    ".ts": "video/mp2t",
+}
+
+_URI_ATTRIBUTE = re.compile(r'URI="([^"]+)"')
+
+
+def build_hls_command(renditions: Dict[str, str], output_dir: str, segment_seconds: int,
+                      segment_type: str = "fmp4", ffmpeg_binary: str = "ffmpeg") -> List[str]:
+    """
+    Command that segments every rendition (resolution -> local MP4) into output_dir.
+    """
+    if segment_type not in SEGMENT_EXTENSIONS:
+        raise ValueError(f"Unknown HLS segment type: {segment_type}")
+
+    command = [ffmpeg_binary, '-y', '-v', 'error']
+    for path in renditions.values():
+        command += ['-i', path]
+    for index in range(len(renditions)):
+        command += ['-map', f'{index}:v']
+
+    command += [
+        '-c', 'copy',
+        '-f', 'hls',
+        '-hls_time', str(segment_seconds),
+        '-hls_playlist_type', 'vod',
+        '-hls_segment_type', segment_type,
+        '-hls_segment_filename', f"{output_dir}/%v/seg_%03d.{SEGMENT_EXTENSIONS[segment_type]}",
+        '-master_pl_name', MASTER_PLAYLIST,
+        '-var_stream_map', " ".join(f"v:{index},name:{resolution}" for index, resolution in enumerate(renditions)),
+    ]
+    if segment_type == "fmp4":
+        command += ['-hls_fmp4_init_filename', 'init.mp4']
+    command.append(f"{output_dir}/%v/index.m3u8")
+    return command
+
+
+def package_hls(renditions: Dict[str, str], output_dir: str, segment_seconds: int,
+                segment_type: str = "fmp4", ffmpeg_binary: str = "ffmpeg", timeout: int = 300) -> str:
+    """
+    Package the renditions as HLS. Returns the path of the master playlist.
+    Raises RenderError if ffmpeg fails.
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    logger.info(f" Packaging HLS ({segment_type}, {segment_seconds}s segments): {', '.join(renditions)}")
+    run_ffmpeg(build_hls_command(renditions, output_dir, segment_seconds, segment_type, ffmpeg_binary), timeout)
+    return str(Path(output_dir) / MASTER_PLAYLIST)
+
+
+def content_type_for(path: str) -> str:
+    return HLS_CONTENT_TYPES.get(posixpath.splitext(path)[1], "application/octet-stream")
+
+
+def rewrite_playlist(content: str, playlist_path: str, resolve: Callable[[str], str]) -> str:
+    """
+    Rewrite the media URIs (segments and init files) of a playlist stored at
+    playlist_path with resolve(storage path) -> URL (ej: presigned S3 URLs).
+    References to other playlists are kept relative so they go through the same endpoint.
+    """
+    base = posixpath.dirname(playlist_path)
+
+    def resolve_uri(uri: str) -> str:
+        if uri.endswith(".m3u8") or "://" in uri:
+            return uri
+        return resolve(posixpath.normpath(posixpath.join(base, uri)))
+
+    lines = []
+    for line in content.splitlines():
+        if line.startswith("#"):
+            line = _URI_ATTRIBUTE.sub(lambda match: f'URI="{resolve_uri(match.group(1))}"', line)
+        elif line.strip():
+            line = resolve_uri(line.strip())
+        lines.append(line)
+    return "\n".join(lines) + "\n"
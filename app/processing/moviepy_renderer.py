@@ -0,0 +1,131 @@
+import logging
+import os
+
+from moviepy import ImageClip, VideoFileClip, CompositeVideoClip, vfx
+from moviepy.config import FFMPEG_BINARY
+
+from app.processing.base import BaseRenderer, RenderError, RenderSpec
+from app.processing.ffmpeg_renderer import build_rendition_command, run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+
+class MoviePyRenderer(BaseRenderer):
+    """
+    Render compositing every frame in Python with MoviePy (CompositeVideoClip).
+    Reference implementation; the ffmpeg engine produces the same output in one process.
+    The other renditions are scaled from the composite with one extra ffmpeg pass.
+    """
+
+    def __init__(self, timeout: int = 600):
+        self.timeout = timeout
+
+    def render(self, spec: RenderSpec) -> None:
+        # La composición se escribe en la rendition de la misma altura (o en un temporal)
+        composite_path = spec.outputs.get(spec.height)
+        if composite_path is None:
+            first_output = next(iter(spec.outputs.values()))
+            composite_path = os.path.join(os.path.dirname(first_output), f"composite_{spec.height}p.mp4")
+
+        self._composite(spec, composite_path)
+
+        try:
+            heights = [height for height in spec.outputs if height != spec.height]
+            if heights:
+                logger.info(f" Scaling renditions {heights} from the composite")
+                run_ffmpeg(build_rendition_command(spec, composite_path, heights, FFMPEG_BINARY), self.timeout)
+        finally:
+            if spec.height not in spec.outputs and os.path.exists(composite_path):
+                os.remove(composite_path)
+
+    def _composite(self, spec: RenderSpec, output_path: str) -> None:
+        logger.info(f" Loading video: {spec.input_path}")
+        videoclip = VideoFileClip(spec.input_path)
+        final_clip = None
+
+        try:
+            # Create clips
+            intro_logo = (ImageClip(spec.logo_path)
+                .with_duration(spec.intro_duration)
+                .with_position(("center", "center")))
+
+            # Trim video if needed
+            if spec.duration > spec.max_duration:
+                videoclip = videoclip.subclipped(0, spec.max_duration)
+                logger.info(f" Video trimmed to {spec.max_duration}s")
+
+            logger.info(f" Original size: {videoclip.size}")
+
+            # Usar height=720 para mantener aspect ratio y asegurar 720p
+            videoclip = videoclip.resized(height=spec.height)
+
+            # Verificar que width es par
+            width, height = videoclip.size
+            if width % 2 != 0:
+                width = width - 1
+                videoclip = videoclip.resized((width, height))
+                logger.warning(f" Adjusted width to even: {width}")
+
+            # Aplicar fade DESPUÉS del resize
+            videoclip = videoclip.with_effects([vfx.CrossFadeIn(spec.fade_duration)])
+            logger.info(f" Video effects applied. Final size: {videoclip.size}")
+
+            # Watermark (positioned at 50% from top, centered horizontally)
+            watermark = (ImageClip(spec.logo_path)
+                .with_duration(spec.video_duration)
+                .resized(height=spec.watermark_height)
+                .with_position(("center", 0.5), relative=True)
+                .with_effects([vfx.CrossFadeIn(spec.fade_duration)])
+                .with_opacity(spec.watermark_opacity)
+                .with_start(spec.intro_duration))
+
+            # Outro logo
+            outro_logo = (ImageClip(spec.logo_path)
+                .with_duration(spec.outro_duration)
+                .with_position(("center", "center"))
+                .with_effects([vfx.CrossFadeIn(spec.fade_duration)])
+                .with_start(spec.intro_duration + spec.video_duration))
+
+            logger.info(" Compositing clips...")
+            # Un spec de solo cuerpo (intro/outro pre-codificados aparte) no lleva los logos
+            layers = [videoclip.with_start(spec.intro_duration), watermark]
+            if spec.intro_duration > 0:
+                layers.insert(0, intro_logo)
+            if spec.outro_duration > 0:
+                layers.append(outro_logo)
+            final_clip = (CompositeVideoClip(layers, size=(width, height), bg_color=(0, 0, 0))  #  Forzar tamaño exacto
+                .with_duration(spec.total_duration))
+            # Fondo opaco: con el fondo transparente por defecto los fade in quedan
+            # en la máscara, que se descarta al codificar, y no se ven
+
+            # Remove audio
+            final_clip = final_clip.without_audio()
+            logger.info(f" Final clip Duration: {final_clip.duration}s, Size: {final_clip.size}")
+
+            logger.info(f" Rendering to: {output_path}")
+            try:
+                final_clip.write_videofile(
+                    output_path,
+                    codec=spec.codec,
+                    fps=spec.fps,
+                    preset=spec.preset,
+                    threads=spec.threads,
+                    bitrate=spec.bitrate,
+                    audio=False,
+                    logger=None,
+                    ffmpeg_params=['-pix_fmt', 'yuv420p', *spec.keyframe_args]  #  CRÍTICO
+                )
+            except Exception as e:
+                raise RenderError(f"MoviePy render failed: {e}")
+
+            logger.info(" Video rendered")
+
+        finally:
+            #  Cerrar clips ANTES de validación
+            try:
+                videoclip.close()
+                if final_clip is not None:
+                    final_clip.close()
+                logger.info(" Moviepy resources closed")
+            except Exception as e:
+                logger.warning(f" Error closing clips: {e}")
@@ -0,0 +1,201 @@
+"""
+Pre-encoded intro/outro segments.
+
+The intro (logo on black) and the outro (logo fading in on black) are the same
+for every video with the same canvas and encoder settings, so they are encoded
+once per rendition and kept on disk. A job only renders the body (clip +
+watermark) and each rendition is assembled with the concat demuxer and stream copy:
+
+    intro_<W>x<H>_<key>.mp4 + body + outro_<W>x<H>_<key>.mp4 -> rendition
+
+The cache key hashes the logo bytes and every parameter that changes the
+encoded bytes (canvas, rendition size, fps, codec, preset, bitrate, durations
+and the keyframe phase), so a new logo or setting never reuses a stale segment.
+
+Para que el stream copy funcione las tres piezas se codifican con los mismos
+parámetros (_encode_args) y empiezan en keyframe; los keyframes caen cada
+keyframe_interval segundos del video final (ver RenderSpec.timeline_offset).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+from app.processing.base import BaseRenderer, RenderSpec
+from app.processing.ffmpeg_renderer import _encode_args, _seconds, build_fan_out, run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar cómo se construyen los segmentos (invalida todo lo cacheado)
+CACHE_VERSION = 1
+
+SEGMENT_KINDS = ("intro", "outro")
+
+
+def build_segment_command(kind: str, spec: RenderSpec, height: int, output_path: str,
+                          ffmpeg_binary: str = "ffmpeg") -> List[str]:
+    """
+    Command that encodes the intro or outro of spec for one rendition, composited
+    at spec.height and scaled like the full render does.
+    """
+    segment = segment_spec(kind, spec, height, output_path)
+    width, canvas_height = spec.size
+    duration = _seconds(segment.intro_duration)
+
+    logo = "[1:v]format=rgba"
+    if kind == "outro":
+        logo += f",fade=t=in:st=0:d={_seconds(spec.fade_duration)}:alpha=1"
+    filters = [
+        f"{logo}[logo]",
+        "[0:v][logo]overlay=x=(W-w)/2:y=(H-h)/2:eof_action=pass,format=yuv420p[out]",
+    ] + build_fan_out(segment, "out", spec.height)[0]
+
+    return [
+        ffmpeg_binary, '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f"color=c=black:s={width}x{canvas_height}:r={spec.fps}:d={duration}",
+        '-loop', '1', '-framerate', str(spec.fps), '-t', duration, '-i', spec.logo_path,
+        '-filter_complex', ";".join(filters),
+        *_encode_args(segment, height, f"r{height}"),
+    ]
+
+
+def segment_spec(kind: str, spec: RenderSpec, height: int, output_path: str) -> RenderSpec:
+    """
+    Spec of a logo-only piece: its length is carried in intro_duration (no clip)
+    and timeline_offset places it in the final video, for the keyframe times.
+    """
+    if kind not in SEGMENT_KINDS:
+        raise ValueError(f"Unknown segment: {kind}")
+    if kind == "intro":
+        duration, offset = spec.intro_duration, spec.timeline_offset
+    else:
+        duration, offset = spec.outro_duration, spec.timeline_offset + spec.intro_duration + spec.video_duration
+    return replace(spec, outputs={height: output_path}, duration=0, intro_duration=duration,
+                   outro_duration=0, timeline_offset=offset)
+
+
+def build_concat_command(list_path: str, output_path: str,
+                         ffmpeg_binary: str = "ffmpeg") -> List[str]:
+    """Command that joins already encoded pieces with the concat demuxer (no re-encode)"""
+    return [ffmpeg_binary, '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-map', '0:v', '-c', 'copy', '-an', output_path]
+
+
+class SegmentCache:
+    """
+    Directory of encoded intro/outro segments, keyed by logo hash + encoder parameters.
+
+    Several worker processes can share the directory: each segment is encoded to a
+    temporary file and renamed into place, so readers never see a partial file
+    (si dos procesos fallan la caché a la vez, los dos codifican y gana el último rename).
+    """
+
+    def __init__(self, cache_dir: str, ffmpeg_binary: str = "ffmpeg", timeout: int = 120):
+        self.cache_dir = Path(cache_dir)
+        self.ffmpeg_binary = ffmpeg_binary
+        self.timeout = timeout
+        self._logo_digests: Dict[Tuple[str, int, int], str] = {}
+
+    def logo_digest(self, logo_path: str) -> str:
+        """sha256 of the logo, memoized while its size and mtime don't change"""
+        stat = os.stat(logo_path)
+        key = (logo_path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._logo_digests:
+            with open(logo_path, "rb") as f:
+                self._logo_digests[key] = hashlib.file_digest(f, "sha256").hexdigest()
+        return self._logo_digests[key]
+
+    def segment_key(self, kind: str, spec: RenderSpec, height: int) -> str:
+        segment = segment_spec(kind, spec, height, "")
+        params = {
+            "version": CACHE_VERSION,
+            "kind": kind,
+            "logo": self.logo_digest(spec.logo_path),
+            "canvas": spec.size,
+            "size": spec.rendition_size(height),
+            "fps": spec.fps,
+            "codec": spec.codec,
+            "preset": spec.preset,
+            "bitrate": spec.bitrate_for(height),
+            "duration": segment.intro_duration,
+            "fade": spec.fade_duration if kind == "outro" else 0,
+            "keyframes": segment.keyframe_args,
+        }
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def segment_path(self, kind: str, spec: RenderSpec, height: int) -> Path:
+        width, _ = spec.rendition_size(height)
+        return self.cache_dir / f"{kind}_{width}x{height}_{self.segment_key(kind, spec, height)[:16]}.mp4"
+
+    def get(self, kind: str, spec: RenderSpec, height: int) -> str:
+        """Path of the encoded segment, encoding it on a miss. Raises RenderError if ffmpeg fails"""
+        path = self.segment_path(kind, spec, height)
+        if path.exists():
+            return str(path)
+
+        logger.info(f" Segment cache miss: encoding {path.name}")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{path.stem}_", suffix=".mp4", dir=self.cache_dir)
+        os.close(fd)
+        try:
+            run_ffmpeg(build_segment_command(kind, spec, height, temp_path, self.ffmpeg_binary), self.timeout)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return str(path)
+
+
+class SegmentCacheRenderer(BaseRenderer):
+    """
+    Render only the body with `engine` and join it with the cached intro/outro
+    of each rendition. Same output as engine.render(spec).
+    """
+
+    def __init__(self, engine: BaseRenderer, cache: SegmentCache, timeout: int = 120):
+        self.engine = engine
+        self.cache = cache
+        self.timeout = timeout
+
+    def render(self, spec: RenderSpec) -> None:
+        kinds = [kind for kind, duration in (("intro", spec.intro_duration), ("outro", spec.outro_duration))
+                 if duration > 0]
+        if not kinds:
+            self.engine.render(spec)
+            return
+
+        segments = {height: {kind: self.cache.get(kind, spec, height) for kind in kinds} for height in spec.outputs}
+        body_outputs = {height: str(Path(path).with_suffix(".body.mp4")) for height, path in spec.outputs.items()}
+        temp_files = list(body_outputs.values())
+        try:
+            self.engine.render(spec.body_spec(body_outputs))
+            for height, output_path in spec.outputs.items():
+                pieces = [segments[height].get("intro"), body_outputs[height], segments[height].get("outro")]
+                list_path = str(Path(output_path).with_suffix(".concat.txt"))
+                temp_files.append(list_path)
+                with open(list_path, "w") as f:
+                    f.writelines(f"file '{Path(piece).resolve()}'\n" for piece in pieces if piece)
+                run_ffmpeg(build_concat_command(list_path, output_path, self.cache.ffmpeg_binary),
+                           self.timeout)
+            logger.info(f" Joined cached intro/outro: renditions {sorted(spec.outputs)}")
+        finally:
+            for path in temp_files:
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+_segment_cache = None
+
+
+def get_segment_cache() -> SegmentCache:
+    """Process-wide cache (keeps the memoized logo hashes between jobs)"""
+    global _segment_cache
+    if _segment_cache is None:
+        cache_dir = settings.RENDER_SEGMENT_CACHE_PATH or os.path.join(settings.TEMP_PATH, "segment-cache")
+        _segment_cache = SegmentCache(cache_dir)
+    return _segment_cache
@@ -0,0 +1,42 @@
+"""
+Job queue backends for the processing pipeline.
+
+The backend is chosen with Settings.QUEUE_BACKEND:
+- "sqs": AWS SQS (production)
+- "redis": Redis Streams with a consumer group
+- "local": SQLite file, for running everything on a single box
+"""
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.queues.base import JobQueue, QueueMessage, build_job
+from app.queues.heartbeat import VisibilityHeartbeat
+
+_queues: Dict[str, JobQueue] = {}
+
+
+def get_queue(queue_name: Optional[str] = None) -> JobQueue:
+    """Return the (process-wide) queue configured in settings"""
+    queue_name = queue_name or settings.QUEUE_NAME
+    if queue_name in _queues:
+        return _queues[queue_name]
+
+    backend = settings.QUEUE_BACKEND
+    if backend == "sqs":
+        from app.queues.sqs import SQSJobQueue
+        queue = SQSJobQueue(queue_name, settings.AWS_REGION, settings.QUEUE_VISIBILITY_TIMEOUT,
+                             settings.QUEUE_SEND_CONCURRENCY)
+    elif backend == "redis":
+        from app.queues.redis_streams import RedisStreamJobQueue
+        queue = RedisStreamJobQueue(settings.REDIS_URL, queue_name, settings.QUEUE_VISIBILITY_TIMEOUT)
+    elif backend == "local":
+        from app.queues.local import LocalJobQueue
+        queue = LocalJobQueue(settings.LOCAL_QUEUE_PATH, queue_name, settings.QUEUE_VISIBILITY_TIMEOUT)
+    else:
+        raise ValueError(f"Unknown QUEUE_BACKEND: {backend}")
+
+    _queues[queue_name] = queue
+    return queue
+
+
+__all__ = ["JobQueue", "QueueMessage", "VisibilityHeartbeat", "build_job", "get_queue"]
@@ -0,0 +1,71 @@
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+@dataclass
+class QueueMessage:
+    """A received message. `receipt` identifies this delivery for ack/nack/extend_visibility"""
+    message_id: str
+    receipt: str
+    body: str
+    receive_count: int = 1
+
+    def json(self) -> Dict:
+        return json.loads(self.body)
+
+
+def build_job(video_id: str, temp_file_path: str) -> Dict:
+    """Body of a video processing job, as the worker expects it"""
+    return {
+        'videoId': video_id,
+        'tempFilePath': temp_file_path,
+        'timestamp': datetime.now().isoformat(),
+        'status': 'pending'
+    }
+
+
+class JobQueue(ABC):
+    """
+    At-least-once job queue with visibility timeouts (SQS semantics).
+
+    A received message is hidden from other consumers for the visibility
+    timeout; if it is not acked by then it is delivered again.
+    """
+
+    @abstractmethod
+    def send(self, body: Dict) -> str:
+        """Enqueue one message. Returns its id"""
+        pass
+
+    @abstractmethod
+    def send_batch(self, bodies: List[Dict]) -> List[Optional[str]]:
+        """Enqueue several messages. Returns the id of each one, or None if it was not accepted"""
+        pass
+
+    @abstractmethod
+    def receive_batch(self, max_messages: int = 10, wait_seconds: int = 20) -> List[QueueMessage]:
+        """Receive up to max_messages, waiting up to wait_seconds for at least one (long polling)"""
+        pass
+
+    @abstractmethod
+    def ack(self, messages: List[QueueMessage]) -> None:
+        """Delete processed messages"""
+        pass
+
+    @abstractmethod
+    def nack(self, message: QueueMessage, delay_seconds: int = 0) -> None:
+        """Make a message visible again after delay_seconds"""
+        pass
+
+    @abstractmethod
+    def extend_visibility(self, message: QueueMessage, seconds: int) -> None:
+        """Keep a message hidden for `seconds` more (long-running jobs)"""
+        pass
+
+    @abstractmethod
+    def depth(self) -> int:
+        """Messages waiting to be received (backlog)"""
+        pass
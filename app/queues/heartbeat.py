@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from app.queues.base import JobQueue, QueueMessage
+
+logger = logging.getLogger(__name__)
+
+
+class VisibilityHeartbeat:
+    """
+    Keeps the messages of in-progress jobs hidden from other workers.
+
+    A background thread extends the visibility of every tracked message by
+    `visibility_timeout` each `interval` seconds, until the message is untracked
+    (job finished or failed). A message tracked for longer than `max_age` is no
+    longer extended: if the job hung past its hard timeout, the queue delivers
+    the message again once the current visibility expires.
+
+    Args:
+        queue: Cola de los mensajes
+        visibility_timeout: Segundos de visibilidad que se renuevan en cada latido
+        interval: Segundos entre latidos (menor que visibility_timeout)
+        max_age: Segundos máximos que se mantiene oculto un mensaje (None = sin límite)
+    """
+
+    def __init__(self, queue: JobQueue, visibility_timeout: int, interval: float,
+                 max_age: Optional[float] = None):
+        if interval >= visibility_timeout:
+            raise ValueError("Heartbeat interval must be shorter than the visibility timeout")
+        self.queue = queue
+        self.visibility_timeout = visibility_timeout
+        self.interval = interval
+        self.max_age = max_age
+        self._tracked: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, message: QueueMessage) -> None:
+        with self._lock:
+            self._tracked[message.receipt] = (message, time.monotonic())
+
+    def untrack(self, message: QueueMessage) -> None:
+        with self._lock:
+            self._tracked.pop(message.receipt, None)
+
+    def beat(self) -> None:
+        """Extend the visibility of every tracked message once"""
+        now = time.monotonic()
+        with self._lock:
+            tracked = list(self._tracked.values())
+        for message, started in tracked:
+            if self.max_age is not None and now - started > self.max_age:
+                logger.warning(f" Job {message.message_id} exceeded {self.max_age:.0f}s, no longer extending its visibility")
+                self.untrack(message)
+                continue
+            try:
+                self.queue.extend_visibility(message, self.visibility_timeout)
+            except Exception as e:
+                logger.warning(f" Could not extend visibility of {message.message_id}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.beat()
+
+    def start(self) -> "VisibilityHeartbeat":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="visibility-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "VisibilityHeartbeat":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
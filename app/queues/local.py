@@ -0,0 +1,131 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.queues.base import JobQueue, QueueMessage
+
+
+class LocalJobQueue(JobQueue):
+    """
+    JobQueue en un archivo SQLite, para correr API + workers en una sola máquina
+    (desarrollo y benchmarks de throughput sin una cola en la nube).
+
+    Varios procesos pueden usar el mismo archivo: cada recepción reclama los
+    mensajes dentro de una transacción BEGIN IMMEDIATE.
+
+    Args:
+        path: Archivo SQLite
+        queue_name: Nombre de la cola (varias colas comparten el archivo)
+        visibility_timeout: Segundos que un mensaje recibido queda oculto
+        poll_interval: Espera entre consultas mientras se hace long polling
+    """
+
+    def __init__(self, path: str, queue_name: str = "message-queue", visibility_timeout: int = 60,
+                 poll_interval: float = 0.2):
+        self.path = path
+        self.queue_name = queue_name
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " queue TEXT NOT NULL,"
+            " body TEXT NOT NULL,"
+            " visible_at REAL NOT NULL,"
+            " receive_count INTEGER NOT NULL DEFAULT 0,"
+            " receipt TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_queue_visible_at ON jobs (queue, visible_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # Una conexión por thread (sqlite3 no comparte conexiones entre threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def send(self, body: Dict) -> str:
+        return self.send_batch([body])[0]
+
+    def send_batch(self, bodies: List[Dict]) -> List[Optional[str]]:
+        conn = self._conn()
+        now = time.time()
+        message_ids = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for body in bodies:
+                cursor = conn.execute(
+                    "INSERT INTO jobs (queue, body, visible_at) VALUES (?, ?, ?)",
+                    (self.queue_name, json.dumps(body), now)
+                )
+                message_ids.append(str(cursor.lastrowid))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return message_ids
+
+    def _claim(self, max_messages: int) -> List[QueueMessage]:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, body, receive_count FROM jobs WHERE queue = ? AND visible_at <= ? ORDER BY id LIMIT ?",
+                (self.queue_name, now, max_messages)
+            ).fetchall()
+            messages = []
+            for message_id, body, receive_count in rows:
+                receipt = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE jobs SET visible_at = ?, receive_count = receive_count + 1, receipt = ? WHERE id = ?",
+                    (now + self.visibility_timeout, receipt, message_id)
+                )
+                messages.append(QueueMessage(str(message_id), receipt, body, receive_count + 1))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return messages
+
+    def receive_batch(self, max_messages: int = 10, wait_seconds: int = 20) -> List[QueueMessage]:
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            messages = self._claim(max_messages)
+            if messages or time.monotonic() >= deadline:
+                return messages
+            time.sleep(self.poll_interval)
+
+    def ack(self, messages: List[QueueMessage]) -> None:
+        self._conn().executemany(
+            "DELETE FROM jobs WHERE id = ? AND receipt = ?",
+            [(int(message.message_id), message.receipt) for message in messages]
+        )
+
+    def _hide_until(self, message: QueueMessage, seconds: int) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET visible_at = ? WHERE id = ? AND receipt = ?",
+            (time.time() + seconds, int(message.message_id), message.receipt)
+        )
+
+    def nack(self, message: QueueMessage, delay_seconds: int = 0) -> None:
+        self._hide_until(message, delay_seconds)
+
+    def extend_visibility(self, message: QueueMessage, seconds: int) -> None:
+        self._hide_until(message, seconds)
+
+    def depth(self) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE queue = ? AND visible_at <= ?",
+            (self.queue_name, time.time())
+        ).fetchone()[0]
@@ -0,0 +1,119 @@
+import json
+import os
+import socket
+import time
+from typing import Dict, List, Optional
+
+import redis
+
+from app.queues.base import JobQueue, QueueMessage
+
+
+class RedisStreamJobQueue(JobQueue):
+    """
+    JobQueue sobre Redis Streams con un consumer group.
+
+    Los mensajes leídos quedan en la lista de pendientes (PEL) del grupo hasta
+    el XACK. El visibility timeout se implementa reclamando con XAUTOCLAIM los
+    pendientes que llevan más de visibility_timeout sin ack; nack y
+    extend_visibility mueven el tiempo de entrega con XCLAIM ... TIME.
+
+    Args:
+        redis_url: URL de Redis (ej: redis://localhost:6379/1)
+        queue_name: Nombre de la cola (stream "queue:<nombre>")
+        visibility_timeout: Segundos que un mensaje recibido queda oculto
+        consumer: Nombre del consumer dentro del grupo (por defecto host-pid)
+    """
+
+    GROUP = "workers"
+
+    def __init__(self, redis_url: str, queue_name: str = "message-queue", visibility_timeout: int = 60,
+                 consumer: Optional[str] = None):
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.stream = f"queue:{queue_name}"
+        self.visibility_ms = visibility_timeout * 1000
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        try:
+            self.redis.xgroup_create(self.stream, self.GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def send(self, body: Dict) -> str:
+        return self.redis.xadd(self.stream, {"body": json.dumps(body)})
+
+    def send_batch(self, bodies: List[Dict]) -> List[Optional[str]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for body in bodies:
+            pipe.xadd(self.stream, {"body": json.dumps(body)})
+        return [None if isinstance(result, Exception) else result for result in pipe.execute(raise_on_error=False)]
+
+    def _delivery_counts(self, message_ids: List[str]) -> Dict[str, int]:
+        if not message_ids:
+            return {}
+        pipe = self.redis.pipeline(transaction=False)
+        for message_id in message_ids:
+            pipe.xpending_range(self.stream, self.GROUP, min=message_id, max=message_id, count=1)
+        return {
+            entry["message_id"]: entry["times_delivered"]
+            for pending in pipe.execute() for entry in pending
+        }
+
+    def receive_batch(self, max_messages: int = 10, wait_seconds: int = 20) -> List[QueueMessage]:
+        # Primero los mensajes cuyo visibility timeout venció (su consumer no hizo ack)
+        claimed = self.redis.xautoclaim(
+            self.stream, self.GROUP, self.consumer,
+            min_idle_time=self.visibility_ms, start_id="0-0", count=max_messages
+        )[1]
+        entries = [(message_id, fields) for message_id, fields in claimed if fields]
+        counts = self._delivery_counts([message_id for message_id, _ in entries])
+
+        remaining = max_messages - len(entries)
+        if remaining > 0:
+            block = wait_seconds * 1000 if not entries and wait_seconds else None
+            response = self.redis.xreadgroup(
+                self.GROUP, self.consumer, {self.stream: ">"}, count=remaining, block=block
+            )
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+
+        return [
+            QueueMessage(
+                message_id=message_id,
+                receipt=message_id,
+                body=fields["body"],
+                receive_count=counts.get(message_id, 1)
+            )
+            for message_id, fields in entries
+        ]
+
+    def ack(self, messages: List[QueueMessage]) -> None:
+        if not messages:
+            return
+        message_ids = [message.receipt for message in messages]
+        pipe = self.redis.pipeline()
+        pipe.xack(self.stream, self.GROUP, *message_ids)
+        pipe.xdel(self.stream, *message_ids)
+        pipe.execute()
+
+    def _hide_until(self, message: QueueMessage, seconds: int) -> None:
+        # El mensaje se reclama cuando (ahora - entrega) >= visibility: mover la entrega
+        delivery_ms = int(time.time() * 1000) + seconds * 1000 - self.visibility_ms
+        self.redis.xclaim(
+            self.stream, self.GROUP, self.consumer, min_idle_time=0,
+            message_ids=[message.receipt], time=delivery_ms, justid=True
+        )
+
+    def nack(self, message: QueueMessage, delay_seconds: int = 0) -> None:
+        self._hide_until(message, delay_seconds)
+
+    def extend_visibility(self, message: QueueMessage, seconds: int) -> None:
+        self._hide_until(message, seconds)
+
+    def depth(self) -> int:
+        for group in self.redis.xinfo_groups(self.stream):
+            if group["name"] == self.GROUP:
+                if group.get("lag") is not None:
+                    return int(group["lag"])
+                return max(0, self.redis.xlen(self.stream) - int(group["pending"]))
+        return self.redis.xlen(self.stream)
@@ -0,0 +1,124 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from app.queues.base import JobQueue, QueueMessage
+
+logger = logging.getLogger(__name__)
+
+# Máximo de entradas por llamada batch según SQS
+SQS_MAX_BATCH_SIZE = 10
+
+
+class SQSJobQueue(JobQueue):
+    """
+    JobQueue sobre AWS SQS.
+
+    Args:
+        queue_name: Nombre de la cola (se crea si no existe)
+        region_name: Región de AWS
+        visibility_timeout: VisibilityTimeout al crear la cola
+        send_concurrency: Llamadas send_message_batch en paralelo dentro de un send_batch
+    """
+
+    def __init__(self, queue_name: str = 'message-queue', region_name: str = 'us-east-1',
+                 visibility_timeout: int = 60, send_concurrency: int = 4):
+        self.queue_name = queue_name
+        self.send_concurrency = max(1, send_concurrency)
+        self.sqs = boto3.client('sqs', region_name=region_name)
+        self.queue_url = self._get_or_create_queue(visibility_timeout)
+
+    def _get_or_create_queue(self, visibility_timeout: int) -> str:
+        try:
+            return self.sqs.get_queue_url(QueueName=self.queue_name)['QueueUrl']
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'AWS.SimpleQueueService.NonExistentQueue':
+                raise
+            logger.warning(f"⚠ Cola no existe, creando: {self.queue_name}")
+            response = self.sqs.create_queue(
+                QueueName=self.queue_name,
+                Attributes={
+                    'MessageRetentionPeriod': '345600',  # 4 días
+                    'VisibilityTimeout': str(visibility_timeout),
+                    'ReceiveMessageWaitTimeSeconds': '20'  # Long polling
+                }
+            )
+            return response['QueueUrl']
+
+    def send(self, body: Dict) -> str:
+        response = self.sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(body))
+        return response['MessageId']
+
+    def _send_chunk(self, start: int, bodies: List[Dict]) -> Dict[int, str]:
+        entries = [{'Id': str(start + idx), 'MessageBody': json.dumps(body)} for idx, body in enumerate(bodies)]
+        try:
+            response = self.sqs.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+        except ClientError as e:
+            logger.error(f"✗ Error al enviar batch: {e}")
+            return {}
+        for entry in response.get('Failed', []):
+            logger.warning(f"⚠ Mensaje rechazado por SQS: {entry.get('Code')} {entry.get('Message')}")
+        return {int(entry['Id']): entry['MessageId'] for entry in response.get('Successful', [])}
+
+    def send_batch(self, bodies: List[Dict]) -> List[Optional[str]]:
+        # Bloques de 10 (límite de SQS); con varios bloques se envían en paralelo (el cliente boto3 es thread-safe)
+        chunks = [(start, bodies[start:start + SQS_MAX_BATCH_SIZE])
+                  for start in range(0, len(bodies), SQS_MAX_BATCH_SIZE)]
+        if len(chunks) > 1 and self.send_concurrency > 1:
+            with ThreadPoolExecutor(max_workers=min(self.send_concurrency, len(chunks))) as executor:
+                results = list(executor.map(lambda chunk: self._send_chunk(*chunk), chunks))
+        else:
+            results = [self._send_chunk(*chunk) for chunk in chunks]
+
+        message_ids: List[Optional[str]] = [None] * len(bodies)
+        for sent in results:
+            for idx, message_id in sent.items():
+                message_ids[idx] = message_id
+        return message_ids
+
+    def receive_batch(self, max_messages: int = 10, wait_seconds: int = 20) -> List[QueueMessage]:
+        response = self.sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=min(max_messages, SQS_MAX_BATCH_SIZE),
+            WaitTimeSeconds=wait_seconds,
+            AttributeNames=['ApproximateReceiveCount']
+        )
+        return [
+            QueueMessage(
+                message_id=message['MessageId'],
+                receipt=message['ReceiptHandle'],
+                body=message['Body'],
+                receive_count=int(message.get('Attributes', {}).get('ApproximateReceiveCount', 1))
+            )
+            for message in response.get('Messages', [])
+        ]
+
+    def ack(self, messages: List[QueueMessage]) -> None:
+        for start in range(0, len(messages), SQS_MAX_BATCH_SIZE):
+            entries = [
+                {'Id': str(idx), 'ReceiptHandle': message.receipt}
+                for idx, message in enumerate(messages[start:start + SQS_MAX_BATCH_SIZE])
+            ]
+            response = self.sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            for entry in response.get('Failed', []):
+                logger.warning(f"⚠ No se pudo borrar el mensaje: {entry.get('Code')} {entry.get('Message')}")
+
+    def nack(self, message: QueueMessage, delay_seconds: int = 0) -> None:
+        self.sqs.change_message_visibility(
+            QueueUrl=self.queue_url, ReceiptHandle=message.receipt, VisibilityTimeout=delay_seconds
+        )
+
+    def extend_visibility(self, message: QueueMessage, seconds: int) -> None:
+        self.sqs.change_message_visibility(
+            QueueUrl=self.queue_url, ReceiptHandle=message.receipt, VisibilityTimeout=seconds
+        )
+
+    def depth(self) -> int:
+        response = self.sqs.get_queue_attributes(
+            QueueUrl=self.queue_url, AttributeNames=['ApproximateNumberOfMessages']
+        )
+        return int(response['Attributes']['ApproximateNumberOfMessages'])
@@ -0,0 +1,26 @@
+from uuid import UUID
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.outbox_message import OutboxMessage
+
+
+class OutboxRepository:
+    
+    async def add(self, db: AsyncSession, video_id: UUID, file_path: str) -> OutboxMessage:
+        """
+        Add a processing job to the outbox. It is not committed here: it becomes
+        visible to the relay together with the rest of the caller's transaction.
+        """
+        message = OutboxMessage(video_id=video_id, file_path=file_path, attempts=0)
+        db.add(message)
+        await db.flush()
+        return message
+
+    def count_pending(self, db: Session) -> int:
+        """Jobs not yet published by the relay (synchronous: used from the admission sampler thread)"""
+        return db.query(func.count(OutboxMessage.id)).scalar() or 0
+
+
+# Singleton instance
+outbox_repository = OutboxRepository()
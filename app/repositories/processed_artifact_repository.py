@@ -0,0 +1,15 @@
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.processed_artifact import ProcessedArtifact
+
+
+class ProcessedArtifactRepository:
+    
+    async def delete_by_file_path(self, db: AsyncSession, file_path: str) -> None:
+        """Remove the index entries of a processed file that no longer exists"""
+        await db.execute(delete(ProcessedArtifact).where(ProcessedArtifact.file_path == file_path))
+        await db.flush()
+
+
+# Singleton instance
+processed_artifact_repository = ProcessedArtifactRepository()
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.upload_session import UploadSession
+
+
+class UploadSessionRepository:
+    
+    async def create(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        video_id: UUID,
+        file_path: str,
+        upload_length: int,
+        storage_upload_id: Optional[str] = None
+    ) -> UploadSession:
+        """Create a new resumable upload session"""
+        upload_session = UploadSession(
+            user_id=user_id,
+            video_id=video_id,
+            file_path=file_path,
+            upload_length=upload_length,
+            upload_offset=0,
+            storage_upload_id=storage_upload_id,
+            parts=[],
+            status="in_progress"
+        )
+        db.add(upload_session)
+        await db.flush()
+        await db.refresh(upload_session)
+        return upload_session
+    
+    async def get_by_id(self, db: AsyncSession, upload_id: UUID) -> Optional[UploadSession]:
+        """Get upload session by ID"""
+        result = await db.execute(
+            select(UploadSession).where(UploadSession.id == upload_id)
+        )
+        return result.scalar_one_or_none()
+    
+
+    
+    async def claim_chunk(self, db: AsyncSession, upload_id: UUID, offset: int, timeout: int) -> Optional[datetime]:
+        """
+        Mark the session as receiving the chunk at offset, without keeping a lock while it arrives.
+        
+        Optimista: solo si el offset sigue igual y ningún otro PATCH está recibiendo
+        (o el que estaba superó `timeout` segundos). Returns the claim time, used as
+        token by store_chunk/release_chunk, or None if the chunk can't be received now.
+        """
+        claimed_at = datetime.utcnow()
+        result = await db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == upload_id,
+                UploadSession.upload_offset == offset,
+                or_(
+                    UploadSession.status == "in_progress",
+                    and_(
+                        UploadSession.status == "receiving",
+                        UploadSession.updated_at < claimed_at - timedelta(seconds=timeout)
+                    )
+                )
+            )
+            .values(status="receiving", updated_at=claimed_at)
+        )
+        return claimed_at if result.rowcount else None
+    
+    async def store_chunk(self, db: AsyncSession, upload_id: UUID, claimed_at: datetime,
+                          new_offset: int, parts: List[Dict], completed: bool) -> bool:
+        """Advance the offset if the claim is still ours. Returns False if another PATCH took it over"""
+        result = await db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == upload_id,
+                UploadSession.status == "receiving",
+                UploadSession.updated_at == claimed_at
+            )
+            .values(
+                upload_offset=new_offset,
+                parts=parts,
+                status="completed" if completed else "in_progress",
+                updated_at=datetime.utcnow()
+            )
+        )
+        return bool(result.rowcount)
+    
+    async def release_chunk(self, db: AsyncSession, upload_id: UUID, claimed_at: datetime) -> None:
+        """Give back a claim whose chunk failed, so the client can retry at the same offset"""
+        await db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == upload_id,
+                UploadSession.status == "receiving",
+                UploadSession.updated_at == claimed_at
+            )
+            .values(status="in_progress", updated_at=datetime.utcnow())
+        )
+
+
+# Singleton instance
+upload_session_repository = UploadSessionRepository()
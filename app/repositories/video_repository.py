@@ -18,7 +18,9 @@ class VideoRepository:
         file_path: str,
         duration_seconds: int,
         file_size_bytes: int,
-        status: str = "processed"
+        status: str = "processed",
+        video_id: Optional[UUID] = None,
+        content_sha256: Optional[str] = None
     ) -> Video:
         """Create a new video record"""
         video = Video(
@@ -29,9 +31,12 @@ class VideoRepository:
             duration_seconds=duration_seconds,
             file_size_bytes=file_size_bytes,
             status=status,
+            content_sha256=content_sha256,
             is_public=False,
             votes_count=0
         )
+        if video_id:
+            video.id = video_id
         db.add(video)
         await db.flush()
         await db.refresh(video)
@@ -72,6 +77,15 @@ class VideoRepository:
         )
         return list(result.scalars().all())
     
+    async def is_file_shared(self, db: AsyncSession, file_path: str, exclude_video_id: UUID) -> bool:
+        """Check if another video points at the same file (deduplicated processed output)"""
+        result = await db.execute(
+            select(Video.id)
+            .where(and_(Video.file_path == file_path, Video.id != exclude_video_id))
+            .limit(1)
+        )
+        return result.first() is not None
+    
     async def delete(self, db: AsyncSession, video_id: UUID) -> None:
         """Delete a video"""
         await db.execute(delete(Video).where(Video.id == video_id))
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -8,6 +8,54 @@ class VideoUploadResponse(BaseModel):
     task_id: str  # Changed from video_id to match contract
 
 
+class VideoUploadUrlRequest(BaseModel):
+    """Step 1 of the direct upload flow: declare the file to upload"""
+    title: str = Field(..., min_length=1, max_length=200)
+    filename: str = Field("video.mp4", max_length=255)
+    content_type: str = "video/mp4"
+    file_size_bytes: int = Field(..., gt=0)
+    multipart: bool = False
+
+
+class UploadPartUrl(BaseModel):
+    part_number: int
+    url: str
+
+
+class VideoUploadUrlResponse(BaseModel):
+    """Where and how the client must send the file bytes"""
+    video_id: str
+    method: str  # "PUT" o "MULTIPART"
+    upload_url: Optional[str] = None
+    headers: Dict[str, str] = {}
+    upload_id: Optional[str] = None
+    part_size: Optional[int] = None
+    parts: List[UploadPartUrl] = []
+    expires_in: int
+
+
+class CompletedPart(BaseModel):
+    part_number: int
+    etag: str
+
+
+class VideoUploadCompleteRequest(BaseModel):
+    """Step 2 of the direct upload flow (parts only needed for multipart)"""
+    upload_id: Optional[str] = None
+    parts: List[CompletedPart] = []
+
+
+class ResumableUploadResponse(BaseModel):
+    """Created resumable upload; PATCH chunks to upload_url starting at offset"""
+    upload_id: str
+    video_id: str
+    upload_url: str
+    offset: int
+    length: int
+    min_chunk_size: int
+    max_chunk_size: int
+
+
 class VideoListItem(BaseModel):
     video_id: str
     title: str
@@ -29,6 +77,7 @@ class VideoDetail(BaseModel):
     duration_seconds: Optional[int] = None
     file_size_bytes: int
     is_public: bool
+    renditions: Dict[str, str] = {}  # Resolución -> path procesado
     
     class Config:
         from_attributes = True
@@ -44,6 +93,7 @@ class PublicVideoItem(BaseModel):
     video_id: str
     title: str
     processed_url: str
+    playlist_url: Optional[str] = None  # Master playlist HLS (None si el video no tiene paquete HLS)
     username: str
     city: str
     votes: int
@@ -1,15 +1,93 @@
 from abc import ABC, abstractmethod
-from typing import BinaryIO
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional
+
+
+class UploadCompletionError(Exception):
+    """
+    The parts reported by the client could not be assembled into the object.
+
+    retryable: the upload is still open (ej: wrong or missing part ETags) and can be
+    completed again with the right parts; False if the storage already discarded it.
+    """
+    def __init__(self, detail: str, retryable: bool = True):
+        self.retryable = retryable
+        super().__init__(detail)
+
 
 class BaseStorage(ABC):
+    # Tamaño mínimo de cada chunk de un upload reanudable (excepto el último)
+    min_chunk_size: int = 0
+
     @abstractmethod
     async def save_file(self, file_content: bytes, filename: str, subfolder: str = "uploads") -> str:
         pass
 
+    @abstractmethod
+    async def save_stream(self, chunks: AsyncIterator[bytes], filename: str, subfolder: str = "uploads") -> str:
+        """
+        Save a file consuming it chunk by chunk, without holding it entirely in memory.
+        If the iterator raises, nothing is persisted and the exception propagates.
+        """
+        pass
+
     @abstractmethod
     async def delete_file(self, path: str) -> bool:
         pass
 
+    @abstractmethod
+    def build_path(self, filename: str, subfolder: str = "uploads") -> str:
+        """Return the path save_file/save_stream would return for this filename"""
+        pass
+
+    @abstractmethod
+    async def create_upload_url(self, path: str, file_size: int, expires_in: int, multipart: bool = False) -> Dict:
+        """
+        Create upload instructions so the client can send the file straight to storage.
+
+        Returns a dict with "method" ("PUT" or "MULTIPART"), and either "url"/"headers"
+        for a single PUT, or "upload_id"/"part_size"/"parts" for a multipart upload.
+        """
+        pass
+
+    @abstractmethod
+    async def complete_upload(self, path: str, upload_id: Optional[str], parts: List[Dict]) -> None:
+        """Finish a direct upload created with create_upload_url (no-op for single PUT)"""
+        pass
+
+    @abstractmethod
+    async def abort_upload(self, path: str, upload_id: Optional[str]) -> None:
+        """Discard an unfinished direct upload and the parts already sent (no-op for single PUT)"""
+        pass
+
+    @abstractmethod
+    async def begin_chunked_upload(self, path: str) -> Optional[str]:
+        """Start a resumable upload. Returns the storage upload id, if the backend needs one"""
+        pass
+
+    @abstractmethod
+    async def append_chunk(self, path: str, upload_id: Optional[str], part_number: int,
+                           offset: int, chunks: AsyncIterator[bytes]) -> Optional[Dict]:
+        """
+        Write one chunk of a resumable upload at the given offset.
+        Returns the part to pass to complete_upload ({"part_number", "etag"}), if any.
+        """
+        pass
+
+    @abstractmethod
+    async def get_file_size(self, path: str) -> Optional[int]:
+        """Return the stored size in bytes, or None if the file does not exist"""
+        pass
+
+    @abstractmethod
+    async def read_file(self, path: str) -> Optional[bytes]:
+        """Return the content of a (small) stored file, or None if it does not exist"""
+        pass
+
+    @abstractmethod
+    async def delete_directory(self, path: str) -> bool:
+        """Delete every file stored under path (ej: an HLS package)"""
+        pass
+
     @abstractmethod
     def get_file_url(self, path: str) -> str:
         pass
@@ -11,12 +11,47 @@ class FileService:
         path = await self.storage.save_file(file_content, filename, subfolder)
         return str(path)
 
+    async def save_stream(self, chunks, filename: str, subfolder: str = "uploads"):
+        path = await self.storage.save_stream(chunks, filename, subfolder)
+        return str(path)
+
     async def delete_file(self, path: str):
         await self.storage.delete_file(path)
     
+    async def read_file(self, path: str):
+        return await self.storage.read_file(path)
+
+    async def delete_directory(self, path: str):
+        return await self.storage.delete_directory(path)
+    
     def get_file_url(self, path:str):
         return self.storage.get_file_url(path)
 
+    def build_path(self, filename: str, subfolder: str = "uploads"):
+        return self.storage.build_path(filename, subfolder)
+
+    async def create_upload_url(self, path: str, file_size: int, expires_in: int, multipart: bool = False):
+        return await self.storage.create_upload_url(path, file_size, expires_in, multipart)
+
+    async def complete_upload(self, path: str, upload_id, parts):
+        await self.storage.complete_upload(path, upload_id, parts)
+
+    async def abort_upload(self, path: str, upload_id):
+        await self.storage.abort_upload(path, upload_id)
+
+    @property
+    def min_chunk_size(self) -> int:
+        return self.storage.min_chunk_size
+
+    async def begin_chunked_upload(self, path: str):
+        return await self.storage.begin_chunked_upload(path)
+
+    async def append_chunk(self, path: str, upload_id, part_number: int, offset: int, chunks):
+        return await self.storage.append_chunk(path, upload_id, part_number, offset, chunks)
+
+    async def get_file_size(self, path: str):
+        return await self.storage.get_file_size(path)
+
 def create_storage() -> BaseStorage:
     storage_type = getattr(settings, "STORAGE_TYPE", "local").lower()
     if storage_type == "s3":
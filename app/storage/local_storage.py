@@ -1,7 +1,17 @@
 import aiofiles
+import asyncio
+import os
+import shutil
+import time
+from functools import partial
 from pathlib import Path
-from typing import BinaryIO
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional
+from urllib.parse import urlencode
 from .base_storage import BaseStorage
+from app.utils.signed_urls import sign_upload
+
+# Endpoint del API que recibe los uploads firmados (equivalente al presigned PUT de S3)
+LOCAL_UPLOAD_ENDPOINT = "/api/videos/local-upload"
 
 
 class LocalStorage(BaseStorage):
@@ -25,6 +35,26 @@ class LocalStorage(BaseStorage):
         
         return str(file_path)
     
+    async def save_stream(self, chunks: AsyncIterator[bytes], filename: str, subfolder: str = "uploads") -> str:
+        """Stream chunks to a .part file and rename it once complete"""
+        folder = self.base_path / subfolder
+        folder.mkdir(exist_ok=True)
+        
+        file_path = folder / filename
+        partial_path = folder / f"{filename}.part"
+        
+        try:
+            async with aiofiles.open(partial_path, 'wb') as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+        except BaseException:
+            # No dejar archivos a medias si el upload se corta o excede el límite
+            partial_path.unlink(missing_ok=True)
+            raise
+        
+        os.replace(partial_path, file_path)
+        return str(file_path)
+    
     async def delete_file(self, path: str) -> bool:
         """Delete a file from storage"""
         try:
@@ -36,9 +66,77 @@ class LocalStorage(BaseStorage):
         except Exception:
             return False
     
+    async def read_file(self, path: str) -> Optional[bytes]:
+        """Return the file content, or None if it does not exist"""
+        try:
+            async with aiofiles.open(path, 'rb') as f:
+                return await f.read()
+        except FileNotFoundError:
+            return None
+    
+    async def delete_directory(self, path: str) -> bool:
+        """Delete a directory tree"""
+        if not Path(path).is_dir():
+            return False
+        await asyncio.get_event_loop().run_in_executor(None, partial(shutil.rmtree, path, ignore_errors=True))
+        return True
+    
     def get_file_url(self, path: str) -> str:
-        """Return the URL/path for file access"""
-        return f"/storage/{Path(path).name}"
+        """Return the URL/path for file access (nginx sirve base_path en /storage/)"""
+        try:
+            return f"/storage/{Path(path).relative_to(self.base_path).as_posix()}"
+        except ValueError:
+            return f"/storage/{Path(path).name}"
+    
+    def build_path(self, filename: str, subfolder: str = "uploads") -> str:
+        """Return the path save_file/save_stream would return for this filename"""
+        return str(self.base_path / subfolder / filename)
+    
+    async def create_upload_url(self, path: str, file_size: int, expires_in: int, multipart: bool = False) -> Dict:
+        """
+        Return a signed URL to the local upload endpoint.
+        Local storage always uses a single PUT (multipart is ignored).
+        """
+        key = Path(path).relative_to(self.base_path).as_posix()
+        expires = int(time.time()) + expires_in
+        query = urlencode({"key": key, "expires": expires, "signature": sign_upload(key, expires)})
+        return {
+            "method": "PUT",
+            "url": f"{LOCAL_UPLOAD_ENDPOINT}?{query}",
+            "headers": {"Content-Type": "video/mp4"}
+        }
+    
+    async def complete_upload(self, path: str, upload_id: Optional[str], parts: List[Dict]) -> None:
+        """The signed PUT already wrote the file, nothing to assemble"""
+        return None
+    
+    async def abort_upload(self, path: str, upload_id: Optional[str]) -> None:
+        """Nothing is kept besides the file itself (delete_file removes it)"""
+        return None
+    
+    async def begin_chunked_upload(self, path: str) -> Optional[str]:
+        """Create the empty destination file; chunks are written in place"""
+        file_path = Path(path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.touch()
+        return None
+    
+    async def append_chunk(self, path: str, upload_id: Optional[str], part_number: int,
+                           offset: int, chunks: AsyncIterator[bytes]) -> Optional[Dict]:
+        """Write the chunk at offset (overwrites whatever a previous interrupted attempt left)"""
+        async with aiofiles.open(path, 'r+b') as f:
+            await f.seek(offset)
+            async for chunk in chunks:
+                await f.write(chunk)
+            await f.truncate()
+        return None
+    
+    async def get_file_size(self, path: str) -> Optional[int]:
+        """Return the stored size in bytes, or None if the file does not exist"""
+        file_path = Path(path)
+        if not file_path.is_file():
+            return None
+        return file_path.stat().st_size
     
     
 
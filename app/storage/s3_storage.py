@@ -3,18 +3,363 @@ S3 Storage Implementation - Compatible with BaseStorage interface
 Uses IAM roles when running on AWS (no credentials needed)
 """
 import boto3
-from botocore.exceptions import ClientError
-from typing import Optional
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from typing import AsyncIterator, Dict, List, Optional
 import logging
 import asyncio
+import base64
+import hashlib
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from io import BytesIO
+from pathlib import Path
 
-from .base_storage import BaseStorage
+from .base_storage import BaseStorage, UploadCompletionError
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Content-Type/Disposition para que los videos se reproduzcan en el navegador
+VIDEO_EXTRA_ARGS = {
+    'ContentType': 'video/mp4',  #  CRÍTICO
+    'ContentDisposition': 'inline'
+}
+
+# Límites de S3 para multipart upload
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+S3_MAX_PARTS = 10000
+
+# Errores de complete_multipart_upload causados por las partes que reportó el cliente:
+# el upload sigue abierto y se puede completar de nuevo con las partes correctas
+CLIENT_PART_ERRORS = ('InvalidPart', 'InvalidPartOrder', 'EntityTooSmall', 'MalformedXML', 'InvalidArgument')
+
+
+def composite_sha256(part_checksums: List[str]) -> str:
+    """
+    Checksum that S3 reports for a multipart upload created with ChecksumAlgorithm=SHA256:
+    SHA-256 of the concatenated part digests (base64) followed by -<number of parts>
+    """
+    digests = b"".join(base64.b64decode(checksum) for checksum in part_checksums)
+    return f"{base64.b64encode(hashlib.sha256(digests).digest()).decode()}-{len(part_checksums)}"
+
+
+async def _iter_bytes(data: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    """Adapt an in-memory payload to the chunk-iterator interface"""
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+
+
+class S3MultipartUploader:
+    """
+    Motor de multipart upload para S3
+
+    - Tamaño de parte configurable (S3_PART_SIZE_MB)
+    - Número acotado de partes en vuelo (S3_MULTIPART_CONCURRENCY)
+    - Reintento individual de cada parte con backoff exponencial
+    - Abort del multipart upload si algo falla (no quedan partes huérfanas)
+
+    Acepta iteradores asíncronos de chunks (API) y paths locales (worker),
+    así que el archivo nunca está completo en memoria: como máximo
+    `max_concurrency` partes a la vez.
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        part_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.part_size = max(part_size or settings.S3_PART_SIZE_MB * 1024 * 1024, S3_MIN_PART_SIZE)
+        self.max_concurrency = max(max_concurrency or settings.S3_MULTIPART_CONCURRENCY, 1)
+        self.max_retries = max_retries if max_retries is not None else settings.S3_MULTIPART_MAX_RETRIES
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="s3-multipart"
+        )
+
+    def create_upload(self, s3_key: str, extra_args: Optional[Dict], checksum: bool = False) -> str:
+        if checksum:
+            extra_args = {**(extra_args or {}), 'ChecksumAlgorithm': 'SHA256'}
+        response = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            **(extra_args or {})
+        )
+        return response['UploadId']
+
+    def complete_upload(self, s3_key: str, upload_id: str, parts: List[Dict]) -> None:
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': sorted(parts, key=lambda p: p['PartNumber'])}
+        )
+
+    def abort_upload(self, s3_key: str, upload_id: str) -> None:
+        logger.warning(f" Aborting multipart upload for {s3_key}")
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id
+            )
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f" Error aborting multipart upload {upload_id}: {e}")
+
+    def upload_part(self, s3_key: str, upload_id: str, part_number: int, data: bytes,
+                    checksum: Optional[str] = None) -> Dict:
+        """
+        Upload a single part, retrying it with exponential backoff.
+        With checksum (base64 SHA-256 of data) S3 rejects the part if the bytes it received differ.
+        """
+        checksum_args = {'ChecksumSHA256': checksum} if checksum else {}
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.s3_client.upload_part(
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=data,
+                    **checksum_args
+                )
+                return {'ETag': response['ETag'], 'PartNumber': part_number, **checksum_args}
+            except (ClientError, BotoCoreError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                logger.warning(f" Part {part_number} of {s3_key} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _upload_file_part(self, local_path: str, s3_key: str, upload_id: str,
+                          part_number: int, offset: int, length: int, checksum: bool = False) -> Dict:
+        """Read one part straight from disk inside the worker thread and upload it"""
+        with open(local_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        # El digest se calcula sobre los mismos bytes que se envían (una sola lectura del disco)
+        part_checksum = base64.b64encode(hashlib.sha256(data).digest()).decode() if checksum else None
+        return self.upload_part(s3_key, upload_id, part_number, data, part_checksum)
+
+    async def upload_stream(self, chunks: AsyncIterator[bytes], s3_key: str,
+                            extra_args: Optional[Dict] = None) -> int:
+        """
+        Upload an async chunk iterator. Parts are sent concurrently while the
+        iterator keeps being consumed; reading pauses when max_concurrency
+        parts are already in flight.
+
+        Returns:
+            int: Total bytes uploaded
+        """
+        loop = asyncio.get_event_loop()
+        upload_id = await loop.run_in_executor(self.executor, self.create_upload, s3_key, extra_args)
+        slots = asyncio.Semaphore(self.max_concurrency)
+        in_flight: List[asyncio.Future] = []
+        buffer = bytearray()
+        total = 0
+
+        async def submit(data: bytes) -> None:
+            await slots.acquire()
+            # Fallar rápido si alguna parte ya agotó sus reintentos
+            for future in in_flight:
+                if future.done() and future.exception():
+                    slots.release()
+                    raise future.exception()
+            future = loop.run_in_executor(
+                self.executor, self.upload_part, s3_key, upload_id, len(in_flight) + 1, data
+            )
+            future.add_done_callback(lambda _: slots.release())
+            in_flight.append(future)
+
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                total += len(chunk)
+                while len(buffer) >= self.part_size:
+                    await submit(bytes(buffer[:self.part_size]))
+                    del buffer[:self.part_size]
+
+            # La última parte puede ser menor al mínimo de 5 MB
+            if buffer or not in_flight:
+                await submit(bytes(buffer))
+            buffer = bytearray()
+
+            parts = await asyncio.gather(*in_flight)
+            await loop.run_in_executor(self.executor, self.complete_upload, s3_key, upload_id, parts)
+        except BaseException:
+            # Esperar las partes en vuelo antes de abortar para no dejar partes huérfanas
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            await loop.run_in_executor(self.executor, self.abort_upload, s3_key, upload_id)
+            raise
+
+        logger.info(f" Multipart upload completed: {s3_key} ({len(in_flight)} parts, {total} bytes)")
+        return total
+
+    def upload_path(self, local_path: str, s3_key: str, extra_args: Optional[Dict] = None) -> int:
+        """
+        Upload a local file with parts read from disk in parallel (synchronous, for the worker)
+
+        Returns:
+            int: Total bytes uploaded
+        """
+        return self._upload_path(local_path, s3_key, extra_args)[0]
+
+    def upload_path_checksummed(self, local_path: str, s3_key: str, extra_args: Optional[Dict] = None) -> str:
+        """
+        Like upload_path, sending a SHA-256 checksum with every part
+
+        Returns:
+            str: Composite checksum S3 must report for the object (see composite_sha256)
+        """
+        _, parts = self._upload_path(local_path, s3_key, extra_args, checksum=True)
+        return composite_sha256([part['ChecksumSHA256'] for part in sorted(parts, key=lambda p: p['PartNumber'])])
+
+    def _upload_path(self, local_path: str, s3_key: str, extra_args: Optional[Dict] = None,
+                     checksum: bool = False) -> tuple:
+        file_size = os.path.getsize(local_path)
+        # Respetar el máximo de 10.000 partes de S3 en archivos muy grandes
+        part_size = max(self.part_size, math.ceil(file_size / S3_MAX_PARTS))
+        part_count = max(math.ceil(file_size / part_size), 1)
+
+        upload_id = self.create_upload(s3_key, extra_args, checksum)
+        futures = []
+        try:
+            futures = [
+                self.executor.submit(
+                    self._upload_file_part,
+                    local_path, s3_key, upload_id,
+                    number + 1, number * part_size, part_size, checksum
+                )
+                for number in range(part_count)
+            ]
+            parts = [future.result() for future in futures]
+            self.complete_upload(s3_key, upload_id, parts)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            self.abort_upload(s3_key, upload_id)
+            raise
+
+        logger.info(f" Multipart upload completed: {s3_key} ({part_count} parts, {file_size} bytes)")
+        return file_size, parts
+
+
+class S3RangedDownloader:
+    """
+    Descarga de objetos S3 con GETs por rangos en paralelo
+
+    - Un rango por parte (S3_PART_SIZE_MB), hasta S3_DOWNLOAD_CONCURRENCY en vuelo
+    - Cada rango se escribe en su offset de un archivo pre-asignado, en chunks de
+      DOWNLOAD_CHUNK_SIZE: la memoria usada es como máximo concurrencia x chunk
+    - Reintento por rango con backoff exponencial, continuando desde el último byte escrito
+    - IfMatch con el ETag: si el objeto cambia durante la descarga, falla en vez de mezclar versiones
+    """
+
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        part_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.part_size = max(part_size or settings.S3_PART_SIZE_MB * 1024 * 1024, self.DOWNLOAD_CHUNK_SIZE)
+        self.max_concurrency = max(max_concurrency or settings.S3_DOWNLOAD_CONCURRENCY, 1)
+        self.max_retries = max_retries if max_retries is not None else settings.S3_MULTIPART_MAX_RETRIES
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="s3-download"
+        )
+
+    def _download_range(self, s3_key: str, etag: str, fd: int, start: int, end: int) -> int:
+        """GET bytes start..end (inclusive) into fd at the same offsets, retrying from the last written byte"""
+        offset = start
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.s3_client.get_object(
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    Range=f"bytes={offset}-{end}",
+                    IfMatch=etag
+                )
+                for chunk in response['Body'].iter_chunks(self.DOWNLOAD_CHUNK_SIZE):
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+                if offset != end + 1:
+                    raise IOError(f"Range {start}-{end} of {s3_key} ended at byte {offset}")
+                return end + 1 - start
+            except (ClientError, BotoCoreError, IOError) as e:
+                # Un 412 (el objeto cambió) no se arregla reintentando
+                if attempt >= self.max_retries or (
+                    isinstance(e, ClientError) and e.response['Error']['Code'] in ('412', 'PreconditionFailed')
+                ):
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                logger.warning(f" Range {start}-{end} of {s3_key} failed at byte {offset} ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def download_path(self, s3_key: str, local_path: str) -> int:
+        """
+        Download an object into local_path (synchronous, for the worker).
+        Los rangos se escriben en un archivo temporal del mismo directorio que se renombra
+        al terminar: local_path nunca existe a medias (otros jobs lo leen en paralelo,
+        como el logo cacheado). Si algo falla se borra el temporal.
+
+        Returns:
+            int: Total bytes downloaded
+        """
+        head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+        size = head['ContentLength']
+        etag = head['ETag']
+        ranges = [(start, min(start + self.part_size, size) - 1) for start in range(0, size, self.part_size)]
+
+        start_time = time.perf_counter()
+        directory, name = os.path.split(os.path.abspath(local_path))
+        fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".part", dir=directory)
+        futures = []
+        try:
+            # Pre-asignar el archivo para que cada rango escriba en su offset
+            os.ftruncate(fd, size)
+            futures = [
+                self.executor.submit(self._download_range, s3_key, etag, fd, start, end)
+                for start, end in ranges
+            ]
+            for future in futures:
+                future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            # Los rangos ya en curso escriben en fd: esperar a que terminen antes de cerrarlo
+            for future in futures:
+                if not future.cancelled():
+                    try:
+                        future.result()
+                    except BaseException:
+                        pass
+            os.close(fd)
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        os.close(fd)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, local_path)
+
+        elapsed = time.perf_counter() - start_time
+        mb_per_second = size / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+        logger.info(f" Ranged download completed: {s3_key} ({len(ranges)} ranges, {size} bytes, {mb_per_second:.1f} MB/s)")
+        return size
+
 
 class S3Storage(BaseStorage):
     """
@@ -26,6 +371,9 @@ class S3Storage(BaseStorage):
     - En local: Usa credenciales de settings (si existen) o ~/.aws/credentials
     """
     
+    # Cada chunk de un upload reanudable es una parte del multipart
+    min_chunk_size = S3_MIN_PART_SIZE
+    
     def __init__(self):
         """
         Inicializar cliente S3
@@ -37,6 +385,11 @@ class S3Storage(BaseStorage):
         4. IAM Role (si está en EC2/ECS/Lambda)
         """
         
+        # El pool de conexiones debe alcanzar para todas las partes y rangos en vuelo
+        client_config = Config(max_pool_connections=max(
+            10, settings.S3_MULTIPART_CONCURRENCY * 2, settings.S3_DOWNLOAD_CONCURRENCY * 2
+        ))
+        
         # Si las credenciales están en settings (no None), usarlas
         if settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
             logger.info(" Using AWS credentials from settings (environment variables)")
@@ -44,7 +397,8 @@ class S3Storage(BaseStorage):
                 's3',
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
+                region_name=settings.AWS_REGION,
+                config=client_config
             )
         else:
             # boto3 buscará automáticamente las credenciales:
@@ -53,10 +407,13 @@ class S3Storage(BaseStorage):
             logger.info(" Using AWS credentials from IAM role or AWS CLI config")
             self.s3_client = boto3.client(
                 's3',
-                region_name=settings.AWS_REGION
+                region_name=settings.AWS_REGION,
+                config=client_config
             )
         
         self.bucket_name = settings.S3_BUCKET_NAME
+        self.multipart = S3MultipartUploader(self.s3_client, self.bucket_name)
+        self.downloader = S3RangedDownloader(self.s3_client, self.bucket_name)
         
         # Verificar conexión
         try:
@@ -88,22 +445,7 @@ class S3Storage(BaseStorage):
         s3_key = f"{subfolder}/{filename}"
         
         try:
-            loop = asyncio.get_event_loop()
-            
-            #  FIX: Especificar Content-Type para video
-            await loop.run_in_executor(
-                None,
-                partial(
-                    self.s3_client.upload_fileobj,
-                    BytesIO(file_content),
-                    self.bucket_name,
-                    s3_key,
-                    ExtraArgs={
-                        'ContentType': 'video/mp4',  #  CRÍTICO
-                        'ContentDisposition': 'inline'
-                    }
-                )
-            )
+            await self.multipart.upload_stream(_iter_bytes(file_content, self.multipart.part_size), s3_key, extra_args=VIDEO_EXTRA_ARGS)
             logger.info(f" File uploaded to S3: {s3_key}")
             
             # Retornar S3 key (similar a como LocalStorage retorna path)
@@ -112,7 +454,22 @@ class S3Storage(BaseStorage):
         except ClientError as e:
             logger.error(f" Error uploading to S3: {e}")
             raise Exception(f"Failed to upload file to S3: {str(e)}")
-    
+
+    async def save_stream(self, chunks: AsyncIterator[bytes], filename: str, subfolder: str = "uploads") -> str:
+        """
+        Save a chunk stream to S3 using a parallel multipart upload
+
+        Solo se mantienen en memoria las partes en vuelo (S3_MULTIPART_CONCURRENCY).
+        Si el stream falla, el multipart upload se aborta y no queda objeto en S3.
+
+        Returns:
+            str: S3 key (ej: "uploads/video123.mp4")
+        """
+        s3_key = f"{subfolder}/{filename}"
+        await self.multipart.upload_stream(chunks, s3_key, extra_args=VIDEO_EXTRA_ARGS)
+        logger.info(f" File streamed to S3: {s3_key}")
+        return s3_key
+
     async def delete_file(self, path: str) -> bool:
         """
         Delete a file from S3
@@ -161,11 +518,175 @@ class S3Storage(BaseStorage):
             logger.error(f" Error generating presigned URL: {e}")
             return ""
     
+    def build_path(self, filename: str, subfolder: str = "uploads") -> str:
+        """Return the S3 key save_file/save_stream would return for this filename"""
+        return f"{subfolder}/{filename}"
+    
+    async def create_upload_url(self, path: str, file_size: int, expires_in: int, multipart: bool = False) -> Dict:
+        """
+        Create presigned URLs so the client uploads straight to S3
+        
+        Crear el multipart upload es una llamada de red, por eso corre en el executor.
+        
+        Args:
+            path: S3 key destino (ej: "uploads/video123.mp4")
+            file_size: Tamaño declarado por el cliente (para calcular las partes)
+            expires_in: Validez de las URLs en segundos
+            multipart: Si es True, crea un multipart upload con una URL por parte
+        
+        Returns:
+            dict: Instrucciones de upload (ver BaseStorage.create_upload_url)
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None,
+            partial(self._presign_upload, path, file_size, expires_in, multipart)
+        )
+    
+    def _presign_upload(self, path: str, file_size: int, expires_in: int, multipart: bool) -> Dict:
+        if not multipart:
+            url = self.s3_client.generate_presigned_url(
+                'put_object',
+                Params={'Bucket': self.bucket_name, 'Key': path, **VIDEO_EXTRA_ARGS},
+                ExpiresIn=expires_in
+            )
+            return {
+                "method": "PUT",
+                "url": url,
+                "headers": {
+                    "Content-Type": VIDEO_EXTRA_ARGS['ContentType'],
+                    "Content-Disposition": VIDEO_EXTRA_ARGS['ContentDisposition']
+                }
+            }
+        
+        part_size = max(self.multipart.part_size, math.ceil(file_size / S3_MAX_PARTS))
+        part_count = max(math.ceil(file_size / part_size), 1)
+        upload_id = self.multipart.create_upload(path, VIDEO_EXTRA_ARGS)
+        parts = [
+            {
+                "part_number": number,
+                "url": self.s3_client.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': self.bucket_name,
+                        'Key': path,
+                        'UploadId': upload_id,
+                        'PartNumber': number
+                    },
+                    ExpiresIn=expires_in
+                )
+            }
+            for number in range(1, part_count + 1)
+        ]
+        logger.info(f" Presigned multipart upload created: {path} ({part_count} parts)")
+        return {
+            "method": "MULTIPART",
+            "upload_id": upload_id,
+            "part_size": part_size,
+            "parts": parts
+        }
+    
+    async def complete_upload(self, path: str, upload_id: Optional[str], parts: List[Dict]) -> None:
+        """
+        Complete a presigned multipart upload (no-op for single PUT uploads)
+        
+        Si las partes no cierran el upload se lanza UploadCompletionError sin abortarlo:
+        el cliente puede reintentar con los ETags correctos (abort_upload lo descarta).
+        
+        Args:
+            parts: Lista de {"part_number": int, "etag": str} reportada por el cliente
+        """
+        if not upload_id:
+            return None
+        
+        loop = asyncio.get_event_loop()
+        s3_parts = [{'PartNumber': p['part_number'], 'ETag': p['etag']} for p in parts]
+        try:
+            await loop.run_in_executor(
+                self.multipart.executor,
+                self.multipart.complete_upload, path, upload_id, s3_parts
+            )
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            code = error.get('Code')
+            if code in CLIENT_PART_ERRORS:
+                raise UploadCompletionError(f"{code}: {error.get('Message', '')}".strip()) from e
+            if code == 'NoSuchUpload':
+                raise UploadCompletionError("The multipart upload no longer exists", retryable=False) from e
+            raise
+    
+    async def abort_upload(self, path: str, upload_id: Optional[str]) -> None:
+        """Abort the multipart upload so S3 drops the parts already uploaded"""
+        if not upload_id:
+            return None
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self.multipart.executor, self.multipart.abort_upload, path, upload_id)
+    
+    async def begin_chunked_upload(self, path: str) -> Optional[str]:
+        """Start a multipart upload; each resumable chunk becomes one part"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.multipart.executor,
+            self.multipart.create_upload, path, VIDEO_EXTRA_ARGS
+        )
+    
+    async def append_chunk(self, path: str, upload_id: Optional[str], part_number: int,
+                           offset: int, chunks: AsyncIterator[bytes]) -> Optional[Dict]:
+        """
+        Upload the chunk as part `part_number` of the multipart upload
+        
+        El chunk se acumula en memoria (acotado por RESUMABLE_MAX_CHUNK_MB) porque
+        upload_part necesita el tamaño completo de la parte.
+        Reintentar el mismo part_number sobrescribe la parte anterior.
+        """
+        data = bytearray()
+        async for chunk in chunks:
+            data.extend(chunk)
+        
+        loop = asyncio.get_event_loop()
+        part = await loop.run_in_executor(
+            self.multipart.executor,
+            self.multipart.upload_part, path, upload_id, part_number, bytes(data)
+        )
+        return {"part_number": part['PartNumber'], "etag": part['ETag']}
+    
+    async def read_file(self, path: str) -> Optional[bytes]:
+        """Return the object content, or None if it does not exist"""
+        loop = asyncio.get_event_loop()
+        try:
+            response = await loop.run_in_executor(
+                None,
+                partial(self.s3_client.get_object, Bucket=self.bucket_name, Key=path)
+            )
+            return await loop.run_in_executor(None, response['Body'].read)
+        except ClientError:
+            return None
+    
+    async def delete_directory(self, path: str) -> bool:
+        """Delete every object under the prefix path/"""
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(None, self.delete_prefix_sync, path)
+        except ClientError as e:
+            logger.error(f" Error deleting prefix from S3: {e}")
+            return False
+    
+    async def get_file_size(self, path: str) -> Optional[int]:
+        """Return the object size from a HEAD request, or None if it does not exist"""
+        loop = asyncio.get_event_loop()
+        try:
+            response = await loop.run_in_executor(
+                None,
+                partial(self.s3_client.head_object, Bucket=self.bucket_name, Key=path)
+            )
+            return response['ContentLength']
+        except ClientError:
+            return None
+    
     # Métodos adicionales útiles para Celery (síncrono)
     def upload_file_sync(self, local_path: str, s3_key: str) -> bool:
         """Upload file from local path to S3 (synchronous for Celery)"""
         try:
-            #  FIX CRÍTICO: Leer archivo como binario y especificar Content-Type
             import os
             
             # Verificar que el archivo existe
@@ -173,36 +694,67 @@ class S3Storage(BaseStorage):
                 logger.error(f" File not found: {local_path}")
                 return False
             
-            # Leer archivo en modo binario
-            with open(local_path, 'rb') as f:
-                file_data = f.read()
+            file_size = os.path.getsize(local_path)
             
             # Verificar que no está vacío
-            if len(file_data) == 0:
+            if file_size == 0:
                 logger.error(f" File is empty: {local_path}")
                 return False
             
-            logger.info(f" Uploading {len(file_data) / (1024*1024):.2f} MB to S3: {s3_key}")
+            logger.info(f" Uploading {file_size / (1024*1024):.2f} MB to S3: {s3_key}")
             
-            # Subir como binario con Content-Type correcto
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_data,  #  Buffer binario (no path string)
-                ContentType='video/mp4',  #  CRÍTICO
-                ContentDisposition='inline'
-            )
+            # Multipart en paralelo leyendo cada parte directamente del disco
+            self.multipart.upload_path(local_path, s3_key, extra_args=VIDEO_EXTRA_ARGS)
             
             logger.info(f" Uploaded to S3: {s3_key}")
             return True
             
-        except ClientError as e:
+        except (ClientError, BotoCoreError) as e:
             logger.error(f" Error uploading file: {e}")
             return False
         except Exception as e:
             logger.error(f" Unexpected error uploading file: {e}")
             return False
     
+    def upload_file_checksummed_sync(self, local_path: str, s3_key: str) -> Optional[str]:
+        """
+        Upload file with a SHA-256 checksum per part (synchronous for Celery).
+        
+        Returns:
+            str: Composite checksum S3 must report for the object, or None if the upload failed
+        """
+        if not os.path.exists(local_path) or os.path.getsize(local_path) == 0:
+            logger.error(f" File not found or empty: {local_path}")
+            return None
+        try:
+            checksum = self.multipart.upload_path_checksummed(local_path, s3_key, extra_args=VIDEO_EXTRA_ARGS)
+            logger.info(f" Uploaded to S3 with SHA-256 checksums: {s3_key}")
+            return checksum
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f" Error uploading file: {e}")
+            return None
+    
+    def checksum_matches_sync(self, s3_key: str, expected: str) -> bool:
+        """
+        Compare the checksum S3 stored for the object with the one computed while uploading.
+        False if they differ or S3 did not report one.
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key, ChecksumMode='ENABLED')
+        except ClientError as e:
+            logger.error(f" Error reading checksum of {s3_key}: {e}")
+            return False
+        
+        reported = response.get('ChecksumSHA256')
+        if not reported:
+            logger.warning(f" S3 did not report a SHA-256 checksum for {s3_key}")
+            return False
+        # HeadObject puede omitir el sufijo -<partes> del checksum compuesto
+        if reported.split('-')[0] != expected.split('-')[0]:
+            logger.error(f" Checksum mismatch for {s3_key}: expected {expected}, S3 reports {reported}")
+            return False
+        return True
+    
     def download_file_sync(self, s3_key: str, local_path: str) -> bool:
         """Download file from S3 to local path (synchronous for Celery)"""
         try:
@@ -211,11 +763,8 @@ class S3Storage(BaseStorage):
             # Crear directorio si no existe
             os.makedirs(os.path.dirname(local_path), exist_ok=True)
             
-            #  FIX: Descargar y escribir en modo binario
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
-            
-            with open(local_path, 'wb') as f:  #  'wb' = write binary
-                f.write(response['Body'].read())
+            # Rangos en paralelo escritos directo al disco (nunca el archivo completo en memoria)
+            self.downloader.download_path(s3_key, local_path)
             
             # Verificar que se descargó correctamente
             if not os.path.exists(local_path):
@@ -234,6 +783,62 @@ class S3Storage(BaseStorage):
             logger.error(f" Unexpected error downloading file: {e}")
             return False
     
+    def delete_file_sync(self, s3_key: str) -> bool:
+        """Delete a file from S3 (synchronous for Celery)"""
+        try:
+            self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            logger.info(f" File deleted from S3: {s3_key}")
+            return True
+        except ClientError as e:
+            logger.error(f" Error deleting from S3: {e}")
+            return False
+    
+    def upload_directory_sync(self, local_dir: str, prefix: str, content_types: Dict[str, str],
+                              max_workers: Optional[int] = None) -> bool:
+        """
+        Upload every file under local_dir to prefix/<relative path>, several at a time
+        (synchronous for Celery). content_types maps file extensions to Content-Type.
+        """
+        files = [path for path in sorted(Path(local_dir).rglob("*")) if path.is_file()]
+        if not files:
+            logger.error(f" Nothing to upload in: {local_dir}")
+            return False
+
+        def upload(path: Path) -> None:
+            s3_key = f"{prefix}/{path.relative_to(local_dir).as_posix()}"
+            content_type = content_types.get(path.suffix, 'application/octet-stream')
+            self.s3_client.upload_file(
+                str(path), self.bucket_name, s3_key,
+                ExtraArgs={'ContentType': content_type}
+            )
+
+        workers = max(max_workers or settings.HLS_UPLOAD_CONCURRENCY, 1)
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="s3-directory") as executor:
+                # list() propaga la primera excepción
+                list(executor.map(upload, files))
+            logger.info(f" Uploaded {len(files)} files to S3: {prefix}/")
+            return True
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f" Error uploading directory: {e}")
+            return False
+        except Exception as e:
+            logger.error(f" Unexpected error uploading directory: {e}")
+            return False
+    
+    def delete_prefix_sync(self, prefix: str) -> bool:
+        """Delete every object under prefix/ (synchronous for Celery)"""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        deleted = 0
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=f"{prefix.rstrip('/')}/"):
+            keys = [{'Key': item['Key']} for item in page.get('Contents', [])]
+            if keys:
+                # delete_objects acepta hasta 1000 keys, lo mismo que devuelve cada página
+                self.s3_client.delete_objects(Bucket=self.bucket_name, Delete={'Objects': keys, 'Quiet': True})
+                deleted += len(keys)
+        logger.info(f" Deleted {deleted} objects from S3: {prefix}/")
+        return deleted > 0
+    
     def file_exists(self, s3_key: str) -> bool:
         """Check if file exists in S3"""
         try:
@@ -0,0 +1,96 @@
+"""
+Dead-letter queue of the video worker.
+
+Jobs that fail permanently (see app/tasks/failures.py) are sent to
+QUEUE_DLQ_NAME (default "<QUEUE_NAME>-dlq") with the failure attached:
+
+    {"job": {...original body...}, "failureClass": "render_crash",
+     "error": "...", "attempts": 1, "deadLetteredAt": "..."}
+
+Malformed messages keep their raw body in "rawBody" instead of "job".
+Once the cause is fixed the jobs can be replayed in bulk:
+
+    python -m app.tasks.dead_letters --replay [--failure-class render_crash] [--limit 100]
+"""
+import argparse
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.queues import JobQueue, QueueMessage, get_queue
+
+# Mensajes recibidos por llamada al re-encolar
+REPLAY_BATCH = 10
+
+
+def dead_letter_queue_name(queue_name: Optional[str] = None) -> str:
+    return settings.QUEUE_DLQ_NAME or f"{queue_name or settings.QUEUE_NAME}-dlq"
+
+
+def dead_letter_body(message: QueueMessage, failure_class: Optional[str], error: Optional[str]) -> Dict:
+    """Body of the dead-letter message for a failed delivery of `message`"""
+    body = {
+        "failureClass": failure_class,
+        "error": (error or "")[:2000],
+        "attempts": message.receive_count,
+        "deadLetteredAt": datetime.now().isoformat(),
+    }
+    try:
+        job = json.loads(message.body)
+    except ValueError:
+        job = None
+    if isinstance(job, dict):
+        job.pop("attempt", None)
+        body["job"] = job
+    else:
+        body["rawBody"] = message.body
+    return body
+
+
+def replay(dead_letters: JobQueue, queue: JobQueue, failure_class: Optional[str] = None,
+           limit: Optional[int] = None) -> int:
+    """
+    Move dead-lettered jobs back to the work queue (with a fresh attempt count).
+    Messages of other classes, and malformed ones, stay hidden in the DLQ until their
+    visibility timeout expires. Returns the number of jobs replayed.
+    """
+    replayed = 0
+    while limit is None or replayed < limit:
+        batch = REPLAY_BATCH if limit is None else min(REPLAY_BATCH, limit - replayed)
+        messages = dead_letters.receive_batch(max_messages=batch, wait_seconds=0)
+        if not messages:
+            break
+
+        selected = []
+        for message in messages:
+            entry = json.loads(message.body)
+            if "job" in entry and failure_class in (None, entry.get("failureClass")):
+                selected.append((message, entry["job"]))
+        if not selected:
+            continue
+
+        message_ids = queue.send_batch([job for _, job in selected])
+        sent = [message for (message, _), message_id in zip(selected, message_ids) if message_id is not None]
+        dead_letters.ack(sent)
+        replayed += len(sent)
+    return replayed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dead-letter queue del worker de video')
+    parser.add_argument('--replay', action='store_true', help='Re-encolar los jobs en la cola de trabajo')
+    parser.add_argument('--failure-class', default=None, help='Solo los jobs de esta clase de fallo')
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--queue', default=settings.QUEUE_NAME)
+    args = parser.parse_args()
+
+    dead_letters = get_queue(dead_letter_queue_name(args.queue))
+    print(f"DLQ {dead_letter_queue_name(args.queue)}: {dead_letters.depth()} mensajes")
+    if args.replay:
+        count = replay(dead_letters, get_queue(args.queue), args.failure_class, args.limit)
+        print(f"✓ {count} jobs re-encolados en {args.queue}")
+
+
+if __name__ == '__main__':
+    main()
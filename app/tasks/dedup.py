@@ -0,0 +1,164 @@
+"""
+Content-hash deduplication for the processing worker.
+
+Every uploaded video carries the SHA-256 of its content. Before rendering,
+the job claims that hash in processed_artifacts:
+
+- Nobody had it: the job renders and publishes the artifact when done.
+- The artifact is ready: the video points at the existing processed file.
+- Another job is rendering it: the video waits ("waiting_duplicate") and is
+  completed by that job when it publishes the artifact. If that job fails
+  for good, the waiting videos are re-enqueued (their job was acked and its
+  ledger entry completed, so nothing else would run them again), unless the
+  failure is a property of the content itself (validation): then they fail too.
+
+The row lock on the artifact serializes claim/publish/release, so a duplicate
+cannot start waiting after the owner already finished.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job_ledger import JobLedgerEntry
+from app.models.outbox_message import OutboxMessage
+from app.models.processed_artifact import ProcessedArtifact
+from app.models.video import Video
+
+logger = logging.getLogger(__name__)
+
+RENDER = "render"
+REUSED = "reused"
+WAITING = "waiting"
+
+WAITING_STATUS = "waiting_duplicate"
+
+
+def _lock_artifact(db: Session, content_sha256: str) -> Optional[ProcessedArtifact]:
+    return (
+        db.query(ProcessedArtifact)
+        .filter(ProcessedArtifact.content_sha256 == content_sha256)
+        .with_for_update()
+        .first()
+    )
+
+
+def claim_artifact(db: Session, video: Video) -> str:
+    """
+    Decide what the job for this video has to do: RENDER, REUSED (already
+    linked to the existing output) or WAITING (another job renders it).
+    """
+    now = datetime.utcnow()
+    result = db.execute(
+        insert(ProcessedArtifact)
+        .values(
+            content_sha256=video.content_sha256,
+            status="processing",
+            source_video_id=video.id,
+            created_at=now,
+            updated_at=now
+        )
+        .on_conflict_do_nothing(index_elements=["content_sha256"])
+    )
+    if result.rowcount:
+        db.commit()
+        return RENDER
+
+    artifact = _lock_artifact(db, video.content_sha256)
+    if artifact is None:
+        # El artifact se borró entre el insert y el select: volver a intentar
+        db.rollback()
+        return claim_artifact(db, video)
+
+    if artifact.status == "ready":
+        video.file_path = artifact.file_path
+        video.renditions = artifact.renditions
+        video.hls_playlist_path = artifact.hls_playlist_path
+        video.duration_seconds = artifact.duration_seconds
+        video.status = "processed"
+        db.commit()
+        logger.info(f" Duplicate of {artifact.source_video_id}, reusing {artifact.file_path}")
+        return REUSED
+
+    stale = artifact.updated_at < now - timedelta(seconds=settings.DEDUP_CLAIM_TIMEOUT_SECONDS)
+    if artifact.source_video_id == video.id or stale:
+        # Mensaje re-entregado del mismo video, o el job dueño murió: tomar el render
+        artifact.source_video_id = video.id
+        artifact.updated_at = now
+        db.commit()
+        return RENDER
+
+    video.status = WAITING_STATUS
+    db.commit()
+    logger.info(f" Duplicate of in-flight video {artifact.source_video_id}, waiting on it")
+    return WAITING
+
+
+def publish_artifact(db: Session, content_sha256: str, video: Video) -> List[str]:
+    """
+    Mark the artifact ready with the processed output of video and complete the
+    videos waiting on it. Returns the upload paths of those videos (no longer needed).
+    """
+    artifact = _lock_artifact(db, content_sha256)
+    if artifact is None:
+        artifact = ProcessedArtifact(content_sha256=content_sha256, source_video_id=video.id)
+        db.add(artifact)
+
+    artifact.status = "ready"
+    artifact.file_path = video.file_path
+    artifact.renditions = video.renditions
+    artifact.hls_playlist_path = video.hls_playlist_path
+    artifact.duration_seconds = video.duration_seconds
+    artifact.updated_at = datetime.utcnow()
+
+    waiting = db.query(Video).filter(
+        Video.content_sha256 == content_sha256,
+        Video.status == WAITING_STATUS
+    ).all()
+    upload_paths = []
+    for duplicate in waiting:
+        upload_paths.append(duplicate.file_path)
+        duplicate.file_path = video.file_path
+        duplicate.renditions = video.renditions
+        duplicate.hls_playlist_path = video.hls_playlist_path
+        duplicate.duration_seconds = video.duration_seconds
+        duplicate.status = "processed"
+
+    db.commit()
+    if waiting:
+        logger.info(f" Completed {len(waiting)} duplicate(s) waiting on {content_sha256}")
+    return upload_paths
+
+
+def release_artifact(db: Session, content_sha256: str, video: Video, requeue_waiting: bool = True) -> None:
+    """
+    Give up the claim of a failed render. The videos waiting on it go back to
+    "uploaded" with a new job in the outbox (the first one renders, the rest wait
+    on it again), or fail too if requeue_waiting is False (the content is invalid).
+    """
+    artifact = _lock_artifact(db, content_sha256)
+    if artifact is not None and artifact.status == "processing" and artifact.source_video_id == video.id:
+        db.delete(artifact)
+
+    waiting = db.query(Video).filter(
+        Video.content_sha256 == content_sha256,
+        Video.status == WAITING_STATUS
+    ).all()
+    for duplicate in waiting:
+        if not requeue_waiting:
+            duplicate.status = "failed"
+            continue
+        duplicate.status = "uploaded"
+        # Su entrada 'completed' del job ledger haría que el nuevo job se salte
+        db.query(JobLedgerEntry).filter(
+            JobLedgerEntry.video_id == duplicate.id,
+            JobLedgerEntry.content_version == content_sha256
+        ).delete(synchronize_session=False)
+        db.add(OutboxMessage(video_id=duplicate.id, file_path=duplicate.file_path, attempts=0))
+    db.commit()
+    if waiting:
+        action = "re-enqueued" if requeue_waiting else "failed"
+        logger.info(f" {len(waiting)} duplicate(s) waiting on {content_sha256} {action}")
@@ -0,0 +1,97 @@
+"""
+Failure classification of video jobs.
+
+Every exception that ends a job is classified:
+
+- transient_io: S3/DB/network errors (throttling, 5xx, connection resets).
+  The job is retried with exponential backoff (the message is hidden for the
+  backoff instead of deleted) until WORKER_MAX_ATTEMPTS deliveries.
+- validation: the upload is not a valid video (ffprobe rules, missing row)
+- render_crash: the render engine failed or produced a broken file (and any
+  unexpected error: it is not retried blindly, it waits in the DLQ for review)
+- timeout: the job ran longer than WORKER_JOB_TIMEOUT_SECONDS
+- malformed: the message body is not a job (invalid JSON)
+
+Everything but transient_io (and transient_io past the attempt limit) is
+permanent: the video is marked failed and the message goes to the dead-letter
+queue with the error, from where it can be replayed (app/tasks/dead_letters.py).
+"""
+import random
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.processing import RenderError
+
+TRANSIENT_IO = "transient_io"
+VALIDATION = "validation"
+RENDER_CRASH = "render_crash"
+TIMEOUT = "timeout"
+MALFORMED = "malformed"
+
+FAILURE_CLASSES = (TRANSIENT_IO, VALIDATION, RENDER_CRASH, TIMEOUT, MALFORMED)
+
+# Códigos de error de AWS que indican un problema temporal del servicio
+TRANSIENT_AWS_CODES = {
+    "Throttling", "ThrottlingException", "SlowDown", "RequestTimeout", "RequestTimeTooSkewed",
+    "ServiceUnavailable", "InternalError", "RequestLimitExceeded", "ProvisionedThroughputExceededException",
+}
+
+
+class JobTimeout(Exception):
+    """The job ran longer than WORKER_JOB_TIMEOUT_SECONDS"""
+    pass
+
+
+class TransientJobError(Exception):
+    """An I/O step failed in a way that is expected to succeed on retry (S3 transfer, connection)"""
+    pass
+
+
+class JobValidationError(Exception):
+    """The job cannot be processed as it is (unknown video, invalid input)"""
+    pass
+
+
+def _is_transient_aws(error: Exception) -> bool:
+    try:
+        from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+    except ImportError:
+        return False
+    if isinstance(error, (BotoConnectionError, HTTPClientError)):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in TRANSIENT_AWS_CODES or status >= 500
+    return False
+
+
+def _is_transient_db(error: Exception) -> bool:
+    return isinstance(error, OperationalError) or (isinstance(error, DBAPIError) and error.connection_invalidated)
+
+
+def classify_failure(error: BaseException) -> str:
+    """Failure class of the exception that ended a job"""
+    if isinstance(error, JobTimeout):
+        return TIMEOUT
+    if isinstance(error, (ValidationException, JobValidationError)):
+        return VALIDATION
+    if isinstance(error, RenderError):
+        return RENDER_CRASH
+    if isinstance(error, (TransientJobError, ConnectionError, TimeoutError)):
+        return TRANSIENT_IO
+    if _is_transient_aws(error) or _is_transient_db(error):
+        return TRANSIENT_IO
+    return RENDER_CRASH
+
+
+def should_retry(failure_class: str, attempt: int) -> bool:
+    return failure_class == TRANSIENT_IO and attempt < settings.WORKER_MAX_ATTEMPTS
+
+
+def retry_delay(attempt: int) -> int:
+    """Seconds before the next delivery: exponential with jitter (entre la mitad y el total)"""
+    delay = min(settings.WORKER_RETRY_MAX_SECONDS, settings.WORKER_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    return max(1, int(random.uniform(delay / 2, delay)))
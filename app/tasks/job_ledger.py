@@ -0,0 +1,158 @@
+"""
+Job ledger: each version of a video is processed once, whatever the queue delivers.
+
+The queues are at-least-once (SQS redelivers, the outbox relay can publish a
+job twice after a crash), so before doing any work the job claims
+(video id, content version) in job_ledger:
+
+- CLAIMED: no entry yet, or the claim of a worker that died expired -> process it
+- COMPLETED: already processed -> ack the message and skip it
+- IN_PROGRESS: another worker holds a live claim -> skip it
+
+An IN_PROGRESS message is not deleted but hidden until the claim expires
+(retry_after): if the owner finishes, the next delivery is COMPLETED and is
+acked; if it died (its own message may already be gone), this one takes over.
+The lease covers the hard job timeout plus one visibility timeout, so a live
+owner always finishes (or fails and releases the claim) before it expires. In
+run_pipeline a job also waits for a CPU slot and has separate I/O stages, so
+the worker renews the lease (renew_claim) while the job is in flight.
+
+Each claim is made with its own token (claim_token: host:pid:nonce), not just
+the worker's identity: the pipeline prepares several jobs in threads of one
+process, and two deliveries of the same job there must not see each other's
+claim as their own.
+"""
+import logging
+import math
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job_ledger import JobLedgerEntry
+from app.models.video import Video
+from app.tasks.failures import TransientJobError
+
+logger = logging.getLogger(__name__)
+
+CLAIMED = "claimed"
+COMPLETED = "completed"
+IN_PROGRESS = "in_progress"
+
+# Vueltas de insert/select de claim_job si la entrada desaparece entre las dos
+CLAIM_ATTEMPTS = 3
+
+
+def worker_identity() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_token() -> str:
+    """Owner of one claim: the worker plus a nonce of the job that makes it"""
+    return f"{worker_identity()}:{uuid.uuid4().hex[:12]}"
+
+
+def content_version(video: Video, upload_path: str) -> str:
+    """Version of the content a job processes: the SHA-256 of the upload, or its path for uploads without hash"""
+    return video.content_sha256 or f"path:{upload_path}"
+
+
+def lease_seconds() -> int:
+    return settings.WORKER_JOB_TIMEOUT_SECONDS + settings.QUEUE_VISIBILITY_TIMEOUT
+
+
+def _lock_entry(db: Session, video_id: UUID, version: str) -> Optional[JobLedgerEntry]:
+    return (
+        db.query(JobLedgerEntry)
+        .filter(JobLedgerEntry.video_id == video_id, JobLedgerEntry.content_version == version)
+        .with_for_update()
+        .first()
+    )
+
+
+def claim_job(db: Session, video_id: UUID, version: str, worker_id: str,
+              lease: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Claim a job for worker_id. Returns (CLAIMED | COMPLETED | IN_PROGRESS, seconds
+    until the other worker's claim expires; 0 unless IN_PROGRESS).
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=lease if lease is not None else lease_seconds())
+        result = db.execute(
+            insert(JobLedgerEntry)
+            .values(video_id=video_id, content_version=version, status=CLAIMED, worker_id=worker_id,
+                    attempts=1, claimed_at=now, lease_expires_at=expires)
+            .on_conflict_do_nothing(index_elements=["video_id", "content_version"])
+        )
+        if result.rowcount:
+            db.commit()
+            return CLAIMED, 0
+
+        entry = _lock_entry(db, video_id, version)
+        if entry is None:
+            # La entrada se borró entre el insert y el select (re-encolado de duplicados): volver a intentar
+            db.rollback()
+            continue
+
+        if entry.status == COMPLETED:
+            db.commit()
+            return COMPLETED, 0
+
+        if entry.worker_id != worker_id and entry.lease_expires_at > now:
+            remaining = math.ceil((entry.lease_expires_at - now).total_seconds())
+            db.commit()
+            logger.info(f" Job {video_id} claimed by {entry.worker_id} for {remaining}s more, skipping")
+            return IN_PROGRESS, remaining
+
+        # Claim vencido (el worker dueño murió): tomarlo
+        if entry.worker_id != worker_id:
+            logger.warning(f" Taking over expired claim of {entry.worker_id} on job {video_id}")
+        entry.worker_id = worker_id
+        entry.attempts += 1
+        entry.claimed_at = now
+        entry.lease_expires_at = expires
+        db.commit()
+        return CLAIMED, 0
+
+    raise TransientJobError(f"Could not claim job {video_id}: its ledger entry kept changing")
+
+
+def renew_claim(db: Session, video_id: UUID, version: str, worker_id: str, lease: Optional[int] = None) -> bool:
+    """Extend the lease of a claim still held by worker_id. Returns False if it is no longer ours"""
+    expires = datetime.utcnow() + timedelta(seconds=lease if lease is not None else lease_seconds())
+    result = db.execute(
+        update(JobLedgerEntry)
+        .where(JobLedgerEntry.video_id == video_id, JobLedgerEntry.content_version == version,
+               JobLedgerEntry.status == CLAIMED, JobLedgerEntry.worker_id == worker_id)
+        .values(lease_expires_at=expires)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def complete_job(db: Session, video_id: UUID, version: str) -> None:
+    """Mark the job done: later deliveries of it are acked without work"""
+    db.execute(
+        update(JobLedgerEntry)
+        .where(JobLedgerEntry.video_id == video_id, JobLedgerEntry.content_version == version)
+        .values(status=COMPLETED, completed_at=datetime.utcnow())
+    )
+    db.commit()
+
+
+def release_job(db: Session, video_id: UUID, version: str, worker_id: str) -> None:
+    """Drop the claim of a failed job so that a later delivery can run it again"""
+    db.execute(
+        delete(JobLedgerEntry)
+        .where(JobLedgerEntry.video_id == video_id, JobLedgerEntry.content_version == version,
+               JobLedgerEntry.status == CLAIMED, JobLedgerEntry.worker_id == worker_id)
+    )
+    db.commit()
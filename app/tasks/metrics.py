@@ -0,0 +1,195 @@
+"""
+Per-stage instrumentation of the video worker.
+
+Each job measures its stages (download, probe, render, validate, upload, verify,
+hls_package, hls_upload) with StageTimings and returns the breakdown in its result.
+The worker process aggregates the results in WorkerMetrics, which:
+- serves the Prometheus text format on WORKER_METRICS_PORT (/metrics)
+- appends one JSON line per job to WORKER_METRICS_LOG (see
+  capacity_planning/Entrega5/Worker/analyze_results.py --stages)
+
+Los jobs del pool corren en otros procesos, por eso la agregación se hace con
+el resultado de cada job y no con contadores compartidos.
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Límites (segundos) de los buckets de los histogramas de latencia
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+JOB_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 900)
+
+
+class StageTimings:
+    """Wall time (monotonic clock) and bytes moved by each stage of one job"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def add(self, stage: str, seconds: float = 0.0, nbytes: int = 0) -> None:
+        entry = self.stages.setdefault(stage, {"seconds": 0.0, "bytes": 0})
+        entry["seconds"] += seconds
+        entry["bytes"] += nbytes
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the block as `name` (a stage run several times, like upload per rendition, is summed)"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - start)
+
+    @property
+    def total_seconds(self) -> float:
+        return time.monotonic() - self.started
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {name: {"seconds": round(entry["seconds"], 4), "bytes": int(entry["bytes"])}
+                for name, entry in self.stages.items()}
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class WorkerMetrics:
+    """
+    Aggregates job results of one worker process.
+
+    Args:
+        log_path: Archivo JSON-lines donde se agrega una línea por job (None = sin log)
+    """
+
+    def __init__(self, log_path: Optional[str] = None):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._stage_seconds: Dict[str, _Histogram] = {}
+        self._stage_bytes: Dict[str, int] = {}
+        self._jobs: Dict[str, int] = {}
+        self._job_seconds = _Histogram(JOB_BUCKETS)
+        self._failures: Dict[Tuple[str, str], int] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def observe_job(self, result: Dict) -> None:
+        """Record the stage breakdown of a finished job (the dict returned by process_message)"""
+        stages = result.get("stages") or {}
+        with self._lock:
+            self._jobs[result.get("status", "unknown")] = self._jobs.get(result.get("status", "unknown"), 0) + 1
+            if result.get("total_seconds") is not None:
+                self._job_seconds.observe(result["total_seconds"])
+            for stage, entry in stages.items():
+                self._stage_seconds.setdefault(stage, _Histogram(STAGE_BUCKETS)).observe(entry["seconds"])
+                self._stage_bytes[stage] = self._stage_bytes.get(stage, 0) + int(entry["bytes"])
+
+        if self.log_path:
+            line = {
+                "timestamp": datetime.now().isoformat(),
+                "video_id": result.get("video_id"),
+                "status": result.get("status"),
+                "total_seconds": result.get("total_seconds"),
+                "stages": stages,
+            }
+            try:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(line) + "\n")
+            except OSError as e:
+                logger.warning(f" Could not write metrics log {self.log_path}: {e}")
+
+    def observe_failure(self, failure_class: Optional[str], action: str) -> None:
+        """Count a failed job by class (app/tasks/failures.py) and action taken (retry | dead_letter)"""
+        key = (failure_class or "unknown", action)
+        with self._lock:
+            self._failures[key] = self._failures.get(key, 0) + 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            lines += ["# HELP worker_jobs_total Jobs finished by status",
+                      "# TYPE worker_jobs_total counter"]
+            for status, count in sorted(self._jobs.items()):
+                lines.append(f"worker_jobs_total{_labels(status=status)} {count}")
+
+            lines += ["# HELP worker_job_failures_total Failed jobs by failure class and action (retry or dead_letter)",
+                      "# TYPE worker_job_failures_total counter"]
+            for (failure_class, action), count in sorted(self._failures.items()):
+                lines.append(f"worker_job_failures_total{_labels(**{'class': failure_class, 'action': action})} {count}")
+
+            lines += ["# HELP worker_job_duration_seconds Wall time of a whole job",
+                      "# TYPE worker_job_duration_seconds histogram"]
+            lines += self._render_histogram("worker_job_duration_seconds", self._job_seconds)
+
+            lines += ["# HELP worker_stage_duration_seconds Wall time of each pipeline stage per job",
+                      "# TYPE worker_stage_duration_seconds histogram"]
+            for stage, histogram in sorted(self._stage_seconds.items()):
+                lines += self._render_histogram("worker_stage_duration_seconds", histogram, stage=stage)
+
+            lines += ["# HELP worker_stage_bytes_total Bytes read or written by each pipeline stage",
+                      "# TYPE worker_stage_bytes_total counter"]
+            for stage, nbytes in sorted(self._stage_bytes.items()):
+                lines.append(f"worker_stage_bytes_total{_labels(stage=stage)} {nbytes}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(name: str, histogram: _Histogram, **labels) -> list:
+        lines = [f"{name}_bucket{_labels(**labels, le=bound)} {count}"
+                 for bound, count in zip(histogram.buckets, histogram.counts)]
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+        suffix = _labels(**labels) if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {histogram.count}")
+        return lines
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> int:
+        """Serve /metrics in a daemon thread. Returns the bound port (port=0 picks a free one)"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="worker-metrics", daemon=True).start()
+        logger.info(f" Worker metrics on http://{host}:{self._server.server_port}/metrics")
+        return self._server.server_port
+
+    def shutdown(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
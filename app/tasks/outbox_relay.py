@@ -0,0 +1,136 @@
+"""
+Outbox relay: publica en la cola los jobs escritos en outbox_messages.
+
+Cada vuelta reclama hasta OUTBOX_BATCH_SIZE mensajes con
+SELECT ... FOR UPDATE SKIP LOCKED (varios relays pueden correr en paralelo sin
+publicar dos veces lo mismo), los envía en bulk al backend de cola configurado
+(QUEUE_BACKEND) y borra los publicados en la misma transacción. Los que fallan se reintentan con
+backoff exponencial.
+
+Es el productor de la API: los handlers de upload solo insertan la fila en su
+transacción (sin llamadas de red en el event loop) y el relay hace el envío en
+batch. Con SQS cada vuelta sale en send_message_batch de 10 entradas, hasta
+QUEUE_SEND_CONCURRENCY en paralelo. Medido con
+capacity_planning/benchmarks/bench_outbox_relay.py.
+
+La entrega es at-least-once: si el relay muere entre el envío y el commit, el
+mensaje se vuelve a publicar.
+
+Uso:
+    python -m app.tasks.outbox_relay
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.models.outbox_message import OutboxMessage
+from app.queues import JobQueue, build_job, get_queue
+
+logger = logging.getLogger(__name__)
+
+SYNC_DATABASE_URL = settings.DATABASE_URL.replace("+asyncpg", "")
+
+
+class OutboxRelay:
+    def __init__(self, session_factory: sessionmaker, queue: JobQueue,
+                 batch_size: int = 100, max_backoff: int = 300):
+        """
+        Args:
+            session_factory: Fábrica de sesiones síncronas de SQLAlchemy
+            queue: Cola donde se publican los jobs
+            batch_size: Mensajes reclamados por vuelta
+            max_backoff: Espera máxima (segundos) entre reintentos de un mensaje
+        """
+        self.session_factory = session_factory
+        self.queue = queue
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.published_count = 0
+
+    def _claim(self, db: Session) -> List[OutboxMessage]:
+        return (
+            db.query(OutboxMessage)
+            .filter(OutboxMessage.available_at <= datetime.utcnow())
+            .order_by(OutboxMessage.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+    def _publish(self, db: Session, messages: List[OutboxMessage]) -> int:
+        try:
+            message_ids = self.queue.send_batch([build_job(str(m.video_id), m.file_path) for m in messages])
+            error = "Not accepted by the queue backend"
+        except Exception as e:
+            message_ids = [None] * len(messages)
+            error = str(e)
+
+        published = 0
+        for message, message_id in zip(messages, message_ids):
+            if message_id:
+                db.delete(message)
+                published += 1
+            else:
+                message.attempts += 1
+                message.last_error = error[:500]
+                backoff = min(self.max_backoff, 2 ** message.attempts)
+                message.available_at = datetime.utcnow() + timedelta(seconds=backoff)
+                logger.warning(f"⚠ Outbox message {message.id} not published (attempt {message.attempts}): {error}")
+        return published
+
+    def relay_once(self) -> int:
+        """Reclama y publica un batch. Retorna la cantidad de mensajes publicados"""
+        db = self.session_factory()
+        try:
+            messages = self._claim(db)
+            if not messages:
+                db.rollback()
+                return 0
+            published = self._publish(db, messages)
+            db.commit()
+            self.published_count += published
+            return published
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def start(self, poll_interval: float = 1.0):
+        """Publica continuamente; espera poll_interval cuando el outbox está vacío"""
+        logger.info("=== Outbox relay ===")
+        try:
+            while True:
+                try:
+                    claimed_full_batch = self.relay_once() >= self.batch_size
+                except Exception as e:
+                    logger.error(f"✗ Error en el relay: {e}")
+                    claimed_full_batch = False
+                if not claimed_full_batch:
+                    time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            logger.info("✓ Relay detenido por usuario")
+        finally:
+            logger.info(f"✓ Mensajes publicados: {self.published_count}")
+
+
+def main():
+    """Función principal para ejecutar el relay"""
+    logging.basicConfig(level=logging.INFO)
+    engine = create_engine(SYNC_DATABASE_URL)
+    relay = OutboxRelay(
+        session_factory=sessionmaker(bind=engine),
+        queue=get_queue(),
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        max_backoff=settings.OUTBOX_MAX_BACKOFF_SECONDS
+    )
+    relay.start(poll_interval=settings.OUTBOX_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Video lookups and status transitions of the processing worker.
+
+The job message carries the primary key of the video (build_job(str(video.id), ...)),
+so the worker reads the row by id instead of searching videos.file_path.
+
+Each transition is one conditional UPDATE (WHERE id = ? AND status IN (...)):
+if the row is no longer in an expected status (another delivery of the same
+message already finished it, or it was deleted) nothing is written and the
+caller decides what to do, instead of overwriting the newer state.
+
+    uploaded / processing / waiting_duplicate / failed -> processing   start_processing
+    processing                                -> processed    finish_processing (con duración, renditions y HLS)
+    uploaded / processing / waiting_duplicate -> failed       mark_failed
+
+Desde processing: re-entrega tras una caída del worker o reintento de un fallo
+transitorio. Desde waiting_duplicate: claim_artifact le pasó el render a este video
+porque el job dueño murió. Desde failed: job re-encolado desde la dead-letter queue
+(los duplicados de un job ya terminado los descarta antes el job ledger).
+"""
+import logging
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.video import Video
+from app.tasks.dedup import WAITING_STATUS
+
+logger = logging.getLogger(__name__)
+
+START_FROM = ("uploaded", "processing", WAITING_STATUS, "failed")
+FAIL_FROM = ("uploaded", "processing", WAITING_STATUS)
+
+
+def find_video(db: Session, video_id: str) -> Optional[Video]:
+    """Video of a job message: by primary key, or by the legacy upload path if video_id is not one"""
+    try:
+        video = db.get(Video, UUID(video_id))
+    except ValueError:
+        video = None
+    if video is None:
+        # Mensajes antiguos identificaban el video por el nombre del archivo subido (índice ix_videos_file_path)
+        video = db.query(Video).filter(Video.file_path == f"uploads/{video_id}.mp4").first()
+    return video
+
+
+def transition(db: Session, video_pk: UUID, from_statuses: tuple, status: str, **values) -> bool:
+    """
+    Set status (and values) only if the video is in one of from_statuses, in a single
+    UPDATE, and commit. Returns False if the row was not in an expected status.
+    """
+    result = db.execute(
+        update(Video)
+        .where(Video.id == video_pk, Video.status.in_(from_statuses))
+        .values(status=status, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount != 1:
+        logger.warning(f" Video {video_pk} not in {from_statuses}, '{status}' not applied")
+        return False
+    return True
+
+
+def start_processing(db: Session, video_pk: UUID) -> bool:
+    return transition(db, video_pk, START_FROM, "processing")
+
+
+def finish_processing(db: Session, video_pk: UUID, file_path: str, renditions: dict,
+                      hls_playlist_path: Optional[str], duration_seconds: int) -> bool:
+    return transition(db, video_pk, ("processing",), "processed", file_path=file_path, renditions=renditions,
+                      hls_playlist_path=hls_playlist_path, duration_seconds=duration_seconds)
+
+
+def mark_failed(db: Session, video_pk: UUID) -> bool:
+    return transition(db, video_pk, FAIL_FROM, "failed")
@@ -1,6 +1,5 @@
 import shutil
 from pathlib import Path
-from time import sleep
 from uuid import UUID
 import os
 import logging
@@ -10,22 +9,44 @@ import time
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from moviepy import ImageClip, VideoFileClip, CompositeVideoClip, vfx
 
 from app.core.celery_app import celery_app
 from app.core.config import settings
 from app.utils.video_validator_sync import validate_video_sync
 from app.models.video import Video
+from app.processing import RenderError, RenderSpec, get_renderer, parse_resolution
+from app.processing.hls import HLS_CONTENT_TYPES, MASTER_PLAYLIST, package_hls
+from app.queues import QueueMessage, VisibilityHeartbeat, get_queue
+from app.tasks.dead_letters import dead_letter_body, dead_letter_queue_name
+from app.tasks.failures import classify_failure, retry_delay, should_retry, JobTimeout, JobValidationError, \
+    TransientJobError, MALFORMED, VALIDATION
+from app.tasks.dedup import claim_artifact, publish_artifact, release_artifact, RENDER, REUSED
+from app.tasks.job_ledger import claim_job, claim_token, complete_job, content_version, lease_seconds, release_job, \
+    renew_claim, CLAIMED, COMPLETED
+from app.tasks.metrics import StageTimings, WorkerMetrics
+from app.tasks.video_state import finish_processing, find_video, mark_failed, start_processing
+from app.tasks.workspace import Workspace, get_workspace_manager, sweep_legacy_scratch
+from app.utils.system_resources import worker_slots
 
-import boto3
 import json
+import math
+import signal
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
-from botocore.exceptions import ClientError
-from typing import Optional, Dict
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from multiprocessing import get_context
+from typing import Callable, Optional, Dict, List
 
 logger = logging.getLogger(__name__)
 
+# Con jobs en curso, cada cuánto se revisa si terminaron y si llegaron mensajes nuevos
+POOL_POLL_SECONDS = 5
+
 # Create synchronous database session for Celery worker
 SYNC_DATABASE_URL = settings.DATABASE_URL.replace("+asyncpg", "")
 sync_engine = create_engine(SYNC_DATABASE_URL)
@@ -41,38 +62,600 @@ else:
     logger.info(" Celery using local/NFS storage backend")
 
 
+def _delete_upload(file_path: str) -> None:
+    """Delete an uploaded original that is no longer needed (duplicate of a processed video)"""
+    if settings.STORAGE_TYPE == "s3":
+        storage_s3.delete_file_sync(file_path)
+    else:
+        Path(file_path).unlink(missing_ok=True)
+    logger.info(f" Cleaned duplicate upload: {file_path}")
+
+
+def _get_logo_path() -> Path:
+    """Logo for intro, outro and watermark (in S3 mode it is cached in TEMP_PATH)"""
+    if settings.STORAGE_TYPE != "s3":
+        return Path(settings.RES_PATH) / "logo720.png"
+
+    logo_local = f"{settings.TEMP_PATH}/logo720.png"
+    logo_s3_key = "resources/logo720.png"
+
+    if not os.path.exists(logo_local):
+        logger.info(f" Downloading logo from S3: {logo_s3_key}")
+        if not storage_s3.download_file_sync(logo_s3_key, logo_local):
+            logger.warning(" Logo not found in S3, creating temporary")
+            from PIL import Image, ImageDraw, ImageFont
+            img = Image.new('RGBA', (160, 50), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(img)
+            try:
+                font = ImageFont.truetype("arial.ttf", 20)
+            except:
+                font = ImageFont.load_default()
+            draw.text((10, 15), "ANB Video", fill=(255, 255, 255, 255), font=font)
+            # Temporal + rename: otros jobs pueden estar comprobando logo_local en paralelo
+            temp_logo = f"{logo_local}.{os.getpid()}.{threading.get_ident()}.png"
+            img.save(temp_logo)
+            os.replace(temp_logo, logo_local)
+            logger.info(" Temporary logo created")
+
+    return Path(logo_local)
+
+
+def _directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def _upload_rendition(local_path: str, s3_processed_key: str, scratch_dir: str, timings: StageTimings) -> None:
+    """Validate a rendered file locally, upload it to S3 and verify the uploaded copy (temp files in scratch_dir)"""
+    # Verificar existencia
+    if not os.path.exists(local_path):
+        raise RenderError(f"Rendered file not found: {local_path}")
+
+    output_size = os.path.getsize(local_path)
+    logger.info(f" File size: {output_size / (1024*1024):.2f} MB")
+
+    if output_size < 100000:
+        raise RenderError(f"Rendered file too small: {output_size} bytes")
+
+    #  Validar video LOCAL antes de subir
+    logger.info(f" Validating LOCAL video BEFORE upload: {local_path}")
+    validate_start = time.monotonic()
+    try:
+        # Test 1: FFprobe
+        cmd = ['ffprobe', '-v', 'error', '-show_format', '-show_streams', local_path]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+
+        if result.returncode != 0:
+            logger.error(f" FFprobe FAILED: {result.stderr}")
+            raise Exception(f"Local video CORRUPTED: {result.stderr}")
+
+        # Test 2: Extraer primer frame
+        test_frame = os.path.join(scratch_dir, "test_frame.jpg")
+        cmd_frame = [
+            'ffmpeg', '-i', local_path, 
+            '-frames:v', '1', 
+            '-f', 'image2', test_frame,
+            '-y'
+        ]
+        result_frame = subprocess.run(cmd_frame, capture_output=True, text=True, timeout=10)
+
+        if result_frame.returncode != 0:
+            logger.error(f" Cannot extract frame: {result_frame.stderr}")
+            raise Exception("Local video cannot be decoded - CORRUPTED")
+
+        if os.path.exists(test_frame) and os.path.getsize(test_frame) > 1000:
+            os.remove(test_frame)
+            logger.info(" Local video CAN be decoded - frame extracted")
+        else:
+            raise Exception("Extracted frame is empty - CORRUPTED")
+
+        logger.info(f" LOCAL video validation PASSED")
+
+    except subprocess.TimeoutExpired:
+        raise Exception("Validation timeout - likely CORRUPTED")
+    except Exception as e:
+        # El render se pierde con el workspace; el job queda en la DLQ y se puede reproducir desde ahí
+        logger.error(f" LOCAL VIDEO IS CORRUPTED: {str(e)}")
+        raise RenderError(f"Video rendering FAILED: {str(e)}")
+    finally:
+        timings.add("validate", time.monotonic() - validate_start)
+
+    # Upload to S3
+    logger.info(f" Uploading VALIDATED video to S3: {s3_processed_key}")
+
+    # Cada parte lleva su SHA-256: S3 rechaza la parte si los bytes recibidos no coinciden
+    with timings.stage("upload"):
+        checksum = storage_s3.upload_file_checksummed_sync(local_path, s3_processed_key)
+        if not checksum:
+            raise TransientJobError("Failed to upload to S3")
+    timings.add("upload", nbytes=output_size)
+
+    logger.info(f" Uploaded to S3: {s3_processed_key}")
+
+    #  Verificar archivo subido: comparar el checksum que guardó S3; re-descargar solo si no coincide
+    logger.info(f" Verifying uploaded file in S3...")
+    with timings.stage("verify"):
+        if storage_s3.checksum_matches_sync(s3_processed_key, checksum):
+            logger.info(f" S3 checksum verification PASSED ({checksum})")
+            return
+
+        logger.warning(" Checksum not confirmed, verifying by re-download")
+        temp_download = os.path.join(scratch_dir, f"verify_{Path(local_path).name}")
+        _verify_upload(s3_processed_key, temp_download, output_size, timings)
+
+
+def _verify_upload(s3_processed_key: str, temp_download: str, output_size: int, timings: StageTimings) -> None:
+    """Download the uploaded copy and check its size and container"""
+    if storage_s3.download_file_sync(s3_processed_key, temp_download):
+        verify_size = os.path.getsize(temp_download)
+        timings.add("verify", nbytes=verify_size)
+        logger.info(f" Downloaded size from S3: {verify_size / (1024*1024):.2f} MB")
+
+        if verify_size != output_size:
+            logger.error(f" SIZE MISMATCH! Original: {output_size}, S3: {verify_size}")
+            raise TransientJobError(f"S3 upload corrupted - size mismatch")
+
+        # Validar con ffprobe
+        cmd = ['ffprobe', '-v', 'error', '-show_format', temp_download]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+
+        if result.returncode != 0:
+            logger.error(f" S3 file is CORRUPTED: {result.stderr}")
+            raise TransientJobError("S3 upload corrupted the file")
+
+        logger.info(f" S3 file verification PASSED")
+        os.remove(temp_download)
+    else:
+        logger.warning(" Could not verify S3 upload")
+
+
+@contextmanager
+def job_timeout(seconds: int):
+    """
+    Raise JobTimeout inside the block after `seconds` (SIGALRM, main thread only).
+    subprocess.run mata al proceso hijo (ffmpeg) cuando la excepción interrumpe la espera.
+    """
+    if not seconds or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise JobTimeout(f"Job exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    signal.alarm(seconds)
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+@dataclass
+class VideoJob:
+    """
+    State of one video job between stages (prepare -> render -> publish).
+    Se serializa con pickle al pasar al pool de render, así que solo guarda datos simples.
+    """
+    video_id: str
+    temp_file_path: str
+    attempt: int = 1  # Entrega del mensaje (receive_count), para decidir si un fallo transitorio se reintenta
+    timings: StageTimings = field(default_factory=StageTimings)
+    video_pk: Optional[UUID] = None
+    claimed_sha256: Optional[str] = None
+    # Versión reclamada en el job ledger con el token ledger_worker (se completa al publicar o se libera si falla)
+    ledger_version: Optional[str] = None
+    ledger_worker: Optional[str] = None
+    # Workspace del job (app/tasks/workspace.py): original descargado, renders y archivos de verificación
+    scratch_dir: Optional[str] = None
+    local_temp_input: Optional[str] = None
+    local_render_dir: Optional[str] = None
+    spec: Optional[RenderSpec] = None
+    resolutions: Dict[int, str] = field(default_factory=dict)
+    master_playlist: Optional[str] = None
+    # Resultado final si el job terminó antes de renderizar (duplicado o error)
+    result: Optional[Dict] = None
+    # Error del render (se marca 'failed' en el proceso principal) y su clase (app/tasks/failures.py)
+    error: Optional[str] = None
+    failure_class: Optional[str] = None
+    # Pipeline: límite (time.monotonic) de la etapa de I/O en curso y momento en que se recibió el mensaje
+    deadline: Optional[float] = None
+    received_at: float = field(default_factory=time.monotonic)
+
+    def build_result(self, status: str, file_path: str, **extra) -> Dict:
+        return {
+            "status": status,
+            "video_id": self.video_id,
+            "file_path": file_path,
+            **extra,
+            "stages": self.timings.to_dict(),
+            "total_seconds": round(self.timings.total_seconds, 3)
+        }
+
+
+def _check_deadline(job: VideoJob) -> None:
+    """
+    The I/O stages of run_pipeline run in threads (no SIGALRM): their deadline is checked
+    between steps, so a slow transfer ends the job before the lease and the heartbeat expire.
+    """
+    if job.deadline is not None and time.monotonic() > job.deadline:
+        raise JobTimeout(f"I/O stage exceeded {settings.WORKER_IO_TIMEOUT_SECONDS}s")
+
+
+def prepare_stage(job: VideoJob) -> None:
+    """
+    I/O stage: claim the content hash, download the original and probe it.
+    Sets job.result if there is nothing to render (duplicate content).
+    """
+    db = SyncSessionLocal()
+    try:
+        # El mensaje lo publica el outbox relay después del commit: el video ya es visible
+        logger.info(f" Processing video {job.video_id}")
+
+        # Get video record (por primary key: el mensaje lleva el id del video)
+        video = find_video(db, job.video_id)
+
+        if not video:
+            raise JobValidationError(f"Video {job.video_id} not found in database")
+        job.video_pk = video.id
+
+        # Job ledger: una re-entrega o un mensaje duplicado no repite el trabajo
+        version = content_version(video, job.temp_file_path)
+        worker_id = claim_token()
+        outcome, retry_after = claim_job(db, video.id, version, worker_id)
+        if outcome != CLAIMED:
+            extra = {"retry_after": retry_after} if retry_after else {}
+            job.result = job.build_result(
+                "skipped" if outcome == COMPLETED else "deferred", video.file_path,
+                message=f"Job already {outcome}", **extra
+            )
+            return
+        job.ledger_version, job.ledger_worker = version, worker_id
+
+        # Deduplicación: si el mismo contenido ya se procesó (o se está procesando), no renderizar otra vez
+        if video.content_sha256:
+            outcome = claim_artifact(db, video)
+            if outcome != RENDER:
+                if outcome == REUSED:
+                    _delete_upload(job.temp_file_path)
+                job.result = job.build_result(
+                    "success" if outcome == REUSED else "waiting", video.file_path,
+                    message=f"Duplicate content ({outcome})"
+                )
+                _complete_ledger(db, job)
+                return
+            job.claimed_sha256 = video.content_sha256
+
+        # Update status to processing (solo desde uploaded/processing: un video ya terminado no se vuelve a renderizar)
+        if not start_processing(db, job.video_pk):
+            db.refresh(video)
+            job.result = job.build_result("skipped", video.file_path, message=f"Video is already {video.status}")
+            _complete_ledger(db, job)
+            return
+        logger.info(" Status updated to 'processing'")
+
+        # PASO 1: Download from S3 if needed
+        if settings.STORAGE_TYPE == "s3":
+            job.local_temp_input = os.path.join(job.scratch_dir, "input.mp4")
+
+            logger.info(f" Downloading from S3: {job.temp_file_path}")
+            with job.timings.stage("download"):
+                if not storage_s3.download_file_sync(job.temp_file_path, job.local_temp_input):
+                    raise TransientJobError("Failed to download video from S3")
+            job.timings.add("download", nbytes=os.path.getsize(job.local_temp_input))
+
+            video_file_path = job.local_temp_input
+            logger.info(f" Video downloaded to: {job.local_temp_input}")
+            _check_deadline(job)
+        else:
+            # Para NFS: usar directamente el path
+            video_file_path = job.temp_file_path
+            logger.info(f" Using local file: {video_file_path}")
+
+        # PASO 2: Validate video with FFprobe
+        logger.info(f" Validating video: {video_file_path}")
+        with job.timings.stage("probe"):
+            metadata = validate_video_sync(video_file_path)
+        _check_deadline(job)
+
+        # La duración se guarda junto con el estado final (finish_processing)
+        duration_seconds = int(metadata['duration'])
+        logger.info(f" Duration: {duration_seconds}s")
+
+        logo_path = _get_logo_path()
+        logger.info(f" Using logo: {logo_path}")
+
+        # Una salida por rendition (VIDEO_RESOLUTIONS), todas en la misma pasada
+        job.resolutions = {parse_resolution(resolution): resolution for resolution in settings.VIDEO_RESOLUTIONS}
+        if settings.STORAGE_TYPE == "s3":
+            render_dir = Path(job.scratch_dir) / "render"
+            job.local_render_dir = str(render_dir)
+        else:
+            render_dir = Path(settings.STORAGE_PATH) / "processed" / job.video_id
+        render_dir.mkdir(parents=True, exist_ok=True)
+
+        job.spec = RenderSpec(
+            input_path=video_file_path,
+            outputs={height: str(render_dir / f"{resolution}.mp4") for height, resolution in job.resolutions.items()},
+            logo_path=str(logo_path),
+            duration=duration_seconds,
+            source_width=metadata['width'],
+            source_height=metadata['height']
+        )
+    finally:
+        db.close()
+
+
+def render_stage(job: VideoJob) -> None:
+    """CPU stage: render every rendition and package them as HLS (local disk only, no DB or S3)"""
+    spec = job.spec
+    render_dir = Path(spec.outputs[max(spec.outputs)]).parent
+
+    # PASO 3: Process video (cutting, adding banner, watermark and resizing) con el motor de RENDER_ENGINE
+    logger.info(f" Rendering with {settings.RENDER_ENGINE} to: {render_dir} ({', '.join(job.resolutions.values())})")
+    with job.timings.stage("render"):
+        get_renderer().render(spec)
+    job.timings.add("render", nbytes=sum(os.path.getsize(path) for path in spec.outputs.values()))
+
+    # PASO 4: Empaquetado HLS (copia de streams, sin re-encode)
+    if settings.HLS_ENABLED:
+        hls_dir = render_dir / "hls"
+        with job.timings.stage("hls_package"):
+            job.master_playlist = package_hls(
+                {resolution: spec.outputs[height] for height, resolution in sorted(job.resolutions.items())},
+                str(hls_dir),
+                settings.HLS_SEGMENT_SECONDS,
+                settings.HLS_SEGMENT_TYPE
+            )
+        job.timings.add("hls_package", nbytes=_directory_size(hls_dir))
+
+
+def publish_stage(job: VideoJob) -> Dict:
+    """I/O stage: upload the renditions and the HLS package, mark the video processed and clean up"""
+    db = SyncSessionLocal()
+    try:
+        spec = job.spec
+        resolutions = job.resolutions
+
+        # PASO 5: Upload to S3 or keep in the processed folder
+        if settings.STORAGE_TYPE == "s3":
+            #  Esperar a que los archivos se escriban completamente
+            time.sleep(1)
+            renditions = {}
+            for height, resolution in resolutions.items():
+                s3_processed_key = f"processed/{job.video_id}/{resolution}.mp4"
+                _check_deadline(job)
+                _upload_rendition(spec.outputs[height], s3_processed_key, job.scratch_dir, job.timings)
+                renditions[resolution] = s3_processed_key
+        else:
+            renditions = {resolution: spec.outputs[height] for height, resolution in resolutions.items()}
+
+        # El archivo principal es la rendition más grande
+        processed_file_path = renditions[resolutions[max(resolutions)]]
+
+        hls_playlist_path = None
+        if job.master_playlist:
+            if settings.STORAGE_TYPE == "s3":
+                hls_dir = Path(job.master_playlist).parent
+                hls_prefix = f"processed/{job.video_id}/hls"
+                _check_deadline(job)
+                with job.timings.stage("hls_upload"):
+                    if not storage_s3.upload_directory_sync(str(hls_dir), hls_prefix, HLS_CONTENT_TYPES):
+                        raise TransientJobError("Failed to upload HLS package to S3")
+                job.timings.add("hls_upload", nbytes=_directory_size(hls_dir))
+                hls_playlist_path = f"{hls_prefix}/{MASTER_PLAYLIST}"
+            else:
+                hls_playlist_path = job.master_playlist
+            logger.info(f" HLS playlist: {hls_playlist_path}")
+
+        # PASO 6: Update database (un solo UPDATE condicional processing -> processed)
+        _check_deadline(job)
+        if not finish_processing(db, job.video_pk, str(processed_file_path), renditions,
+                                 hls_playlist_path, spec.duration):
+            raise Exception(f"Video {job.video_id} is no longer 'processing'")
+        _complete_ledger(db, job)
+        logger.info(" Database updated")
+
+        # Publicar el artifact y completar los duplicados que esperaban este render
+        if job.claimed_sha256:
+            video = db.get(Video, job.video_pk)
+            for upload_path in publish_artifact(db, job.claimed_sha256, video):
+                _delete_upload(upload_path)
+
+        # Clean up temp files
+        if settings.STORAGE_TYPE == "s3":
+            _cleanup_scratch(job)
+        else:
+            temp_path = Path(job.temp_file_path)
+            if temp_path.exists():
+                temp_path.unlink()
+                logger.info(f" Cleaned: {job.temp_file_path}")
+
+        logger.info(f" Video {job.video_id} processed successfully!")
+        logger.info(" Stages: " + ", ".join(
+            f"{name} {entry['seconds']:.2f}s" for name, entry in job.timings.to_dict().items()
+        ))
+
+        return job.build_result("success", str(processed_file_path), message="Video processed successfully")
+    finally:
+        db.close()
+
+
+def _complete_ledger(db, job: VideoJob) -> None:
+    if job.ledger_version:
+        complete_job(db, job.video_pk, job.ledger_version)
+        job.ledger_version = None
+
+
+def fail_job(job: VideoJob, error) -> Dict:
+    """
+    End a job that raised. A transient failure with attempts left returns a 'retry'
+    result (retry_after = backoff) and keeps the video in 'processing' for the next
+    delivery; any other one marks the video failed and releases its content hash
+    (re-enqueuing the duplicates waiting on it, unless the content is invalid).
+    The scratch files are removed in both cases.
+    """
+    failure_class = job.failure_class or classify_failure(error)
+    retry = should_retry(failure_class, job.attempt)
+    logger.error(f" ERROR ({failure_class}, attempt {job.attempt}): {str(error)}")
+
+    if job.video_pk:
+        db = SyncSessionLocal()
+        try:
+            if not retry:
+                mark_failed(db, job.video_pk)
+            # El claim del artifact se conserva en un reintento: el mismo video lo retoma
+            if job.ledger_version:
+                release_job(db, job.video_pk, job.ledger_version, job.ledger_worker)
+            if job.claimed_sha256 and not retry:
+                video = db.get(Video, job.video_pk)
+                if video:
+                    # Los duplicados en espera solo fallan si el contenido es inválido; si no, se re-encolan
+                    release_artifact(db, job.claimed_sha256, video, requeue_waiting=failure_class != VALIDATION)
+        except Exception as e:
+            # Con la DB caída el claim del ledger vence solo y el mensaje igual se reintenta o va a la DLQ
+            logger.error(f" Could not record the failure of {job.video_id}: {e}")
+        finally:
+            db.close()
+
+    if settings.STORAGE_TYPE == "s3":
+        _cleanup_scratch(job)
+
+    if retry:
+        delay = retry_delay(job.attempt)
+        logger.warning(f" Retrying {job.video_id} in {delay}s")
+        return job.build_result("retry", job.temp_file_path, error=str(error),
+                                failure_class=failure_class, retry_after=delay)
+    return job.build_result("failed", job.temp_file_path, error=str(error), failure_class=failure_class)
+
+
+def _cleanup_scratch(job: VideoJob) -> None:
+    """
+    Remove the downloaded original and the render directory as soon as the job ends (S3 mode).
+    El workspace completo se borra al resolver el mensaje (WorkspaceManager.release).
+    """
+    if job.local_temp_input and os.path.exists(job.local_temp_input):
+        try:
+            os.remove(job.local_temp_input)
+            logger.info(f" Cleaned: {job.local_temp_input}")
+        except OSError:
+            pass
+    if job.local_render_dir and os.path.exists(job.local_render_dir):
+        shutil.rmtree(job.local_render_dir, ignore_errors=True)
+        logger.info(f" Cleaned: {job.local_render_dir}")
+
+
+# Etapas del pipeline: nunca lanzan excepciones, el error queda en el job / resultado
+
+def prepare_video_job(job: VideoJob) -> VideoJob:
+    job.deadline = time.monotonic() + settings.WORKER_IO_TIMEOUT_SECONDS
+    try:
+        prepare_stage(job)
+    except Exception as e:
+        job.result = fail_job(job, e)
+    return job
+
+
+def render_video_job(job: VideoJob) -> VideoJob:
+    """Runs in the render pool; the hard timeout applies to the CPU stage"""
+    try:
+        with job_timeout(settings.WORKER_JOB_TIMEOUT_SECONDS):
+            render_stage(job)
+    except Exception as e:
+        job.error = str(e) or type(e).__name__
+        job.failure_class = classify_failure(e)
+    return job
+
+
+def publish_video_job(job: VideoJob) -> Dict:
+    job.deadline = time.monotonic() + settings.WORKER_IO_TIMEOUT_SECONDS
+    if job.error:
+        return fail_job(job, job.error)
+    try:
+        return publish_stage(job)
+    except Exception as e:
+        return fail_job(job, e)
+
+
+def pipeline_job_seconds(concurrency: int, prefetch: int) -> int:
+    """
+    Longest a job can take in run_pipeline: prepare, the wait for an I/O thread and publish
+    (WORKER_IO_TIMEOUT_SECONDS each), its render, and the wait for a CPU slot (the renders of
+    the jobs ahead of it: at most ceil(prefetch / concurrency) rounds).
+    """
+    cpu_rounds = 1 + math.ceil(prefetch / max(concurrency, 1))
+    return 3 * settings.WORKER_IO_TIMEOUT_SECONDS + cpu_rounds * settings.WORKER_JOB_TIMEOUT_SECONDS
+
+
+def default_concurrency() -> int:
+    """WORKER_CONCURRENCY, o los jobs que caben en la CPU y memoria de este nodo"""
+    if settings.WORKER_CONCURRENCY > 0:
+        return settings.WORKER_CONCURRENCY
+    return worker_slots(settings.WORKER_CPUS_PER_JOB, settings.WORKER_MEMORY_PER_JOB_MB)
+
+
+# Worker de cada proceso del pool (se crea una vez por proceso)
+_pool_worker = None
+
+
+def _process_job(payload: dict, queue_name: str, region_name: str, shift: int) -> dict:
+    """Entry point of a pool process: run one job with the sequential code path"""
+    global _pool_worker
+    if _pool_worker is None:
+        _pool_worker = SQSProcessWorker(queue_name, region_name, shift, concurrency=1)
+    return _pool_worker.process_message(payload)
+
+
 class SQSProcessWorker:
-    def __init__(self, queue_name='message-queue', region_name='us-east-1', shift=3):
+    def __init__(self, queue_name='message-queue', region_name='us-east-1', shift=3,
+                 concurrency: Optional[int] = None):
         """
-        Inicializa el worker SQS
+        Inicializa el worker
         
         Args:
-            queue_name: Nombre de la cola SQS
-            region_name: Región de AWS
+            queue_name: Nombre de la cola
+            region_name: Región de AWS (solo para QUEUE_BACKEND=sqs)
             shift: Desplazamiento para cifrado César
+            concurrency: Videos procesados en paralelo (None = default_concurrency()).
+                Con más de 1 los jobs corren en un pool de procesos.
         """
         self.queue_name = queue_name
         self.region_name = region_name
         self.shift = shift
+        self.concurrency = concurrency or default_concurrency()
         self.processed_count = 0
         
-        # Crear cliente SQS
-        self.sqs = boto3.client('sqs', region_name=region_name)
+        # Función que ejecuta un job dentro del pool (debe poder serializarse con pickle)
+        self.job_function: Callable[[dict], dict] = partial(
+            _process_job, queue_name=queue_name, region_name=region_name, shift=shift
+        )
         
-        # Obtener URL de la cola
-        self.queue_url = self._get_queue_url()
+        # Etapas de run_pipeline: prepare y publish corren en threads, render en el pool de procesos
+        self.pipeline_stages = (prepare_video_job, render_video_job, publish_video_job)
         
-    def _get_queue_url(self) -> str:
-        """Obtiene la URL de la cola SQS"""
-        try:
-            response = self.sqs.get_queue_url(QueueName=self.queue_name)
-            return response['QueueUrl']
-        except ClientError as e:
-            print(f"✗ Error: Cola '{self.queue_name}' no existe")
-            print(f"  Ejecuta primero el producer para crear la cola")
-            raise
-    
-    def process_video_task(self, video_id: str, temp_file_path: str):
+        # Cola del backend configurado (QUEUE_BACKEND: sqs, redis o local)
+        self.queue = get_queue(queue_name)
+        
+        # Mantiene ocultos los mensajes en proceso para que otro worker no renderice el mismo video.
+        # Pasado el hard timeout (más un margen) se deja de renovar y la cola lo vuelve a entregar.
+        self.heartbeat = VisibilityHeartbeat(
+            self.queue,
+            visibility_timeout=settings.QUEUE_VISIBILITY_TIMEOUT,
+            interval=settings.WORKER_HEARTBEAT_SECONDS,
+            max_age=settings.WORKER_JOB_TIMEOUT_SECONDS + settings.QUEUE_VISIBILITY_TIMEOUT
+        )
+        
+        # Tiempos por etapa de los jobs terminados (Prometheus + JSON-lines)
+        self.metrics = WorkerMetrics(settings.WORKER_METRICS_LOG)
+        
+        # Scratch de los jobs en curso: un directorio por job, con presupuesto de bytes (admisión)
+        self.workspaces = get_workspace_manager()
+        self.job_workspaces: Dict[str, Workspace] = {}
+        
+        # Jobs con fallos permanentes (o sin más intentos), para revisarlos y re-encolarlos (dead_letters.py)
+        self.dead_letters = get_queue(dead_letter_queue_name(queue_name))
+        
+    def process_video_task(self, video_id: str, temp_file_path: str, attempt: int = 1,
+                           workspace: Optional[str] = None):
         """
         Process uploaded video asynchronously.
         
@@ -80,345 +663,28 @@ class SQSProcessWorker:
         1. Download from S3 if needed
         2. Update status to 'processing'
         3. Validate video with FFprobe
-        4. Process video (cutting, resizing, adding banner)
-        5. Upload to S3 or move to processed folder
-        6. Update status to 'processed' or 'failed'
-        """
-        db = SyncSessionLocal()
-        
-        local_temp_input = None
-        local_temp_output = None
+        4. Process video (cutting, resizing, adding banner) into every rendition
+        5. Package the renditions as HLS
+        6. Upload to S3 or keep in the processed folder
+        7. Update status to 'processed' or 'failed'
         
+        Las etapas son las mismas que usa run_pipeline (prepare -> render -> publish),
+        aquí ejecutadas una tras otra en el mismo proceso. Sin `workspace` (directorio
+        scratch que asignó el worker al recibir el mensaje) se usa uno propio del job.
+        """
+        own_workspace = None if workspace else self.workspaces.acquire(video_id)
+        job = VideoJob(video_id, temp_file_path, attempt, scratch_dir=workspace or own_workspace.path)
         try:
-            sleep(5)
-            
-            logger.info(f" Processing video {video_id}")
-
-            # Get video record
-            video = db.query(Video).filter(Video.file_path == 'uploads/' + video_id + '.mp4').first()
-            
-            if not video:
-                raise Exception(f"Video {video_id} with UUID {UUID(video_id)} not found in database")
-            
-            # Update status to processing
-            video.status = "processing"
-            db.commit()
-            logger.info(" Status updated to 'processing'")
-            
-            # PASO 1: Download from S3 if needed
-            if settings.STORAGE_TYPE == "s3":
-                os.makedirs(settings.TEMP_PATH, exist_ok=True)
-                local_temp_input = f"{settings.TEMP_PATH}/{video_id}_input.mp4"
-                
-                logger.info(f" Downloading from S3: {temp_file_path}")
-                if not storage_s3.download_file_sync(temp_file_path, local_temp_input):
-                    raise Exception("Failed to download video from S3")
-                
-                video_file_path = local_temp_input
-                logger.info(f" Video downloaded to: {local_temp_input}")
-            else:
-                # Para NFS: usar directamente el path
-                video_file_path = temp_file_path
-                logger.info(f" Using local file: {video_file_path}")
-            
-            # PASO 2: Validate video with FFprobe
-            logger.info(f" Validating video: {video_file_path}")
-            metadata = validate_video_sync(video_file_path)
-            
-            # Update duration
-            video.duration_seconds = int(metadata['duration'])
-            db.commit()
-            logger.info(f" Duration: {video.duration_seconds}s")
-            
-            # PASO 3: Process video (cutting, adding banner, watermark and resizing.)
-            logger.info(f" Loading video: {video_file_path}")
-            videoclip = VideoFileClip(video_file_path)
-
-            # Intro and Outro logo
-            if settings.STORAGE_TYPE == "s3":
-                logo_local = f"{settings.TEMP_PATH}/logo720.png"
-                logo_s3_key = "resources/logo720.png"
-                
-                if not os.path.exists(logo_local):
-                    logger.info(f" Downloading logo from S3: {logo_s3_key}")
-                    if not storage_s3.download_file_sync(logo_s3_key, logo_local):
-                        logger.warning(" Logo not found in S3, creating temporary")
-                        from PIL import Image, ImageDraw, ImageFont
-                        img = Image.new('RGBA', (160, 50), (0, 0, 0, 0))
-                        draw = ImageDraw.Draw(img)
-                        try:
-                            font = ImageFont.truetype("arial.ttf", 20)
-                        except:
-                            font = ImageFont.load_default()
-                        draw.text((10, 15), "ANB Video", fill=(255, 255, 255, 255), font=font)
-                        img.save(logo_local)
-                        logger.info(" Temporary logo created")
-                
-                logo_path = Path(logo_local)
-            else:
-                logo_path = Path(settings.RES_PATH) / "logo720.png"
-            
-            logger.info(f" Using logo: {logo_path}")
-
-            # Determine durations
-            video_duration = video.duration_seconds if video.duration_seconds <= 30 else 30
-            intro_duration = 2.5
-            outro_duration = 2.5
-            watermark_fadein = 2.0
-
-            # Create clips
-            intro_logo = (ImageClip(str(logo_path))
-                .with_duration(intro_duration)
-                .with_position(("center", "center")))
-            
-            # Trim video if needed
-            if video.duration_seconds > 30:
-                videoclip = videoclip.subclipped(0, 30)
-                logger.info(" Video trimmed to 30s")
-
-            #  FIX CRÍTICO: Redimensionar a 720p (NO 1080p)
-            logger.info(f" Original size: {videoclip.size}")
-            
-            # Usar height=720 para mantener aspect ratio y asegurar 720p
-            videoclip = videoclip.resized(height=720)
-            
-            # Verificar que width es par
-            width, height = videoclip.size
-            logger.info(f" After resize: {width}x{height}")
-            
-            if width % 2 != 0:
-                width = width - 1
-                videoclip = videoclip.resized((width, height))
-                logger.warning(f" Adjusted width to even: {width}")
-            
-            # Aplicar fade DESPUÉS del resize
-            videoclip = videoclip.with_effects([vfx.CrossFadeIn(watermark_fadein)])
-            logger.info(f" Video effects applied. Final size: {videoclip.size}")
-
-            # Watermark (positioned at 50% from top, centered horizontally)
-            watermark = (ImageClip(str(logo_path))
-                .with_duration(video_duration)
-                .resized(height=100)
-                .with_position(("center", 0.5), relative=True)
-                .with_effects([vfx.CrossFadeIn(watermark_fadein)])
-                .with_opacity(0.5)
-                .with_start(intro_duration))
-
-            # Outro logo
-            outro_logo = (ImageClip(str(logo_path))
-                .with_duration(outro_duration)
-                .with_position(("center", "center"))
-                .with_effects([vfx.CrossFadeIn(2.0)])
-                .with_start(intro_duration + video_duration))
-
-            # Composite all clips
-            logger.info(" Compositing clips...")
-            final_clip = CompositeVideoClip([
-                intro_logo,
-                videoclip.with_start(intro_duration),
-                watermark,
-                outro_logo
-            ], size=(width, height))  #  Forzar tamaño exacto
-
-            # Remove audio
-            final_clip = final_clip.without_audio()
-            logger.info(" Audio removed")
-            logger.info(f" Final clip FPS: {final_clip.fps}, Duration: {final_clip.duration}s, Size: {final_clip.size}")
-
-            # PASO 4: Export
-            if settings.STORAGE_TYPE == "s3":
-                os.makedirs(settings.TEMP_PATH, exist_ok=True)
-                local_temp_output = f"{settings.TEMP_PATH}/{video_id}_processed.mp4"
-                
-                logger.info(f" Rendering to: {local_temp_output}")
-                
-                #  FIX: Forzar pixel format para máxima compatibilidad
-                try:
-                    final_clip.write_videofile(
-                        local_temp_output,
-                        codec='libx264',
-                        fps=30,
-                        preset='ultrafast',
-                        threads=4,
-                        bitrate='2000k',
-                        audio=False,
-                        logger=None,
-                        ffmpeg_params=['-pix_fmt', 'yuv420p'] #  CRÍTICO
-                    )
-                except Exception as e:
-                    logger.error(f" MoviePy render failed: {str(e)}")
-                    raise
-                
-                logger.info(f" Video rendered")
-                
-                #  Cerrar clips ANTES de validación
-                try:
-                    videoclip.close()
-                    final_clip.close()
-                    logger.info(" Moviepy resources closed")
-                except Exception as e:
-                    logger.warning(f" Error closing clips: {e}")
-                
-                #  Esperar a que el archivo se escriba completamente
-                time.sleep(1)
-                
-                # Verificar existencia
-                if not os.path.exists(local_temp_output):
-                    raise Exception(f"Rendered file not found: {local_temp_output}")
-                
-                output_size = os.path.getsize(local_temp_output)
-                logger.info(f" File size: {output_size / (1024*1024):.2f} MB")
-                
-                if output_size < 100000:
-                    raise Exception(f"Rendered file too small: {output_size} bytes")
-                
-                #  Validar video LOCAL antes de subir
-                logger.info(f" Validating LOCAL video BEFORE upload: {local_temp_output}")
-                try:
-                    # Test 1: FFprobe
-                    cmd = ['ffprobe', '-v', 'error', '-show_format', '-show_streams', local_temp_output]
-                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                    
-                    if result.returncode != 0:
-                        logger.error(f" FFprobe FAILED: {result.stderr}")
-                        raise Exception(f"Local video CORRUPTED: {result.stderr}")
-                    
-                    # Test 2: Extraer primer frame
-                    test_frame = f"{settings.TEMP_PATH}/test_frame.jpg"
-                    cmd_frame = [
-                        'ffmpeg', '-i', local_temp_output, 
-                        '-frames:v', '1', 
-                        '-f', 'image2', test_frame,
-                        '-y'
-                    ]
-                    result_frame = subprocess.run(cmd_frame, capture_output=True, text=True, timeout=10)
-                    
-                    if result_frame.returncode != 0:
-                        logger.error(f" Cannot extract frame: {result_frame.stderr}")
-                        raise Exception("Local video cannot be decoded - CORRUPTED")
-                    
-                    if os.path.exists(test_frame) and os.path.getsize(test_frame) > 1000:
-                        os.remove(test_frame)
-                        logger.info(" Local video CAN be decoded - frame extracted")
-                    else:
-                        raise Exception("Extracted frame is empty - CORRUPTED")
-                    
-                    logger.info(f" LOCAL video validation PASSED")
-                    
-                except subprocess.TimeoutExpired:
-                    raise Exception("Validation timeout - likely CORRUPTED")
-                except Exception as e:
-                    logger.error(f" LOCAL VIDEO IS CORRUPTED: {str(e)}")
-                    corrupted_copy = f"{settings.TEMP_PATH}/CORRUPTED_{video_id}.mp4"
-                    shutil.copy(local_temp_output, corrupted_copy)
-                    logger.error(f" Corrupted file saved: {corrupted_copy}")
-                    raise Exception(f"Video rendering FAILED: {str(e)}")
-                
-                # Upload to S3
-                s3_processed_key = f"processed/{video_id}.mp4"
-                logger.info(f" Uploading VALIDATED video to S3: {s3_processed_key}")
-                
-                if not storage_s3.upload_file_sync(local_temp_output, s3_processed_key):
-                    raise Exception("Failed to upload to S3")
-                
-                processed_file_path = s3_processed_key
-                logger.info(f" Uploaded to S3: {s3_processed_key}")
-                
-                #  Verificar archivo subido
-                logger.info(f" Verifying uploaded file in S3...")
-                temp_download = f"{settings.TEMP_PATH}/{video_id}_verify.mp4"
-                
-                if storage_s3.download_file_sync(s3_processed_key, temp_download):
-                    verify_size = os.path.getsize(temp_download)
-                    logger.info(f" Downloaded size from S3: {verify_size / (1024*1024):.2f} MB")
-                    
-                    if verify_size != output_size:
-                        logger.error(f" SIZE MISMATCH! Original: {output_size}, S3: {verify_size}")
-                        raise Exception(f"S3 upload corrupted - size mismatch")
-                    
-                    # Validar con ffprobe
-                    cmd = ['ffprobe', '-v', 'error', '-show_format', temp_download]
-                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                    
-                    if result.returncode != 0:
-                        logger.error(f" S3 file is CORRUPTED: {result.stderr}")
-                        raise Exception("S3 upload corrupted the file")
-                    
-                    logger.info(f" S3 file verification PASSED")
-                    os.remove(temp_download)
-                else:
-                    logger.warning(" Could not verify S3 upload")
-                
-            else:
-                # Para NFS
-                temp_path = Path(temp_file_path)
-                processed_folder = Path(settings.STORAGE_PATH) / "processed"
-                processed_folder.mkdir(parents=True, exist_ok=True)
-                
-                processed_file_path = processed_folder / temp_path.name
-                
-                logger.info(f" Rendering to: {processed_file_path}")
-                final_clip.write_videofile(str(processed_file_path))
-                logger.info(" Video rendered")
-                
-                videoclip.close()
-                final_clip.close()
-                logger.info(" Moviepy resources closed")
-            
-            # Update database
-            video.file_path = str(processed_file_path)
-            video.status = "processed"
-            db.commit()
-            logger.info(" Database updated")
-            
-            # Clean up temp files
-            if settings.STORAGE_TYPE == "s3":
-                if local_temp_input and os.path.exists(local_temp_input):
-                    os.remove(local_temp_input)
-                    logger.info(f" Cleaned: {local_temp_input}")
-                if local_temp_output and os.path.exists(local_temp_output):
-                    os.remove(local_temp_output)
-                    logger.info(f" Cleaned: {local_temp_output}")
-            else:
-                temp_path = Path(temp_file_path)
-                if temp_path.exists():
-                    temp_path.unlink()
-                    logger.info(f" Cleaned: {temp_file_path}")
-            
-            logger.info(f" Video {video_id} processed successfully!")
-            
-            return {
-                "status": "success",
-                "video_id": video_id,
-                "message": "Video processed successfully",
-                "file_path": str(processed_file_path)
-            }
-            
+            prepare_stage(job)
+            if job.result:
+                return job.result
+            render_stage(job)
+            return publish_stage(job)
         except Exception as e:
-            logger.error(f" ERROR: {str(e)}")
-            
-            if video:
-                video.status = "failed"
-                db.commit()
-            
-            if settings.STORAGE_TYPE == "s3":
-                for temp_file in [local_temp_input, local_temp_output]:
-                    if temp_file and os.path.exists(temp_file):
-                        try:
-                            os.remove(temp_file)
-                            logger.info(f" Cleaned: {temp_file}")
-                        except:
-                            pass
-            
-            return {
-                "status": "failed",
-                "video_id": video_id,
-                "file_path": temp_file_path,
-                "error": str(e)
-            }
-            
+            return fail_job(job, e)
         finally:
-            db.close()
+            if own_workspace:
+                self.workspaces.release(own_workspace)
     
     def process_message(self, payload: dict) -> dict:
         """
@@ -432,79 +698,373 @@ class SQSProcessWorker:
         """
         video_id = payload.get('videoId', '')
         temp_file_path = payload.get('tempFilePath','')
-        response = self.process_video_task(video_id, temp_file_path)
+        workspace = payload.pop('workspace', None)
+        # Al vencerse, JobTimeout se lanza dentro de process_video_task: el video queda 'failed' y se limpia
+        with job_timeout(settings.WORKER_JOB_TIMEOUT_SECONDS):
+            response = self.process_video_task(video_id, temp_file_path, payload.get('attempt', 1), workspace)
         
         payload['status'] = response["status"]
         payload['video_id'] = response["video_id"]
         payload['file_path'] = response["file_path"]
         payload['process_shift'] = self.shift
+        payload['stages'] = response.get("stages", {})
+        payload['total_seconds'] = response.get("total_seconds")
+        for key in ("retry_after", "failure_class", "error"):
+            if response.get(key):
+                payload[key] = response[key]
         
         return payload
     
     def consume_message(self) -> Optional[Dict]:
         """
-        Consume un mensaje de la cola SQS
+        Consume un mensaje de la cola
         
         Returns:
             dict o None: Mensaje procesado o None si no hay mensajes
         """
+        if not self.workspaces.can_admit():
+            # Sin scratch libre: esperar antes de volver a consultar
+            time.sleep(POOL_POLL_SECONDS)
+            return None
+        
         try:
-            # Recibir mensaje con long polling (WaitTimeSeconds=20)
-            response = self.sqs.receive_message(
-                QueueUrl=self.queue_url,
-                MaxNumberOfMessages=1,
-                WaitTimeSeconds=20,  # Long polling: espera hasta 20 segundos
-                MessageAttributeNames=['All'],
-                AttributeNames=['All']
-            )
-            
-            messages = response.get('Messages', [])
-            
-            if not messages:
-                return None
-            
-            message = messages[0]
-            receipt_handle = message['ReceiptHandle']
-            
-            # Parsear el body del mensaje
-            payload = json.loads(message['Body'])
-            
-            # Procesar el mensaje
-            processed = self.process_message(payload)
-            
-            # IMPORTANTE: Eliminar el mensaje de la cola después de procesarlo
-            self.sqs.delete_message(
-                QueueUrl=self.queue_url,
-                ReceiptHandle=receipt_handle
-            )
-            
-            self.processed_count += 1
-            return processed
-            
-        except ClientError as e:
-            print(f"✗ Error al procesar mensaje: {e}")
+            # Long polling: espera hasta 20 segundos
+            messages = self.queue.receive_batch(max_messages=1, wait_seconds=20)
+        except Exception as e:
+            print(f"✗ Error al recibir mensajes: {e}")
             return None
-        except json.JSONDecodeError as e:
-            print(f"✗ Error al parsear JSON: {e}")
-            # Aún así eliminar el mensaje corrupto
+        
+        if not messages:
+            return None
+        
+        message = messages[0]
+        
+        parsed = self._parse_messages([message])
+        if not parsed:
+            return None
+        _, payload = parsed[0]
+        
+        # Procesar el mensaje (el heartbeat renueva su visibilidad mientras tanto)
+        payload['workspace'] = self._begin_job(message, payload)
+        try:
+            processed = self.process_message(payload)
+        finally:
+            self._end_job(message)
+        self.metrics.observe_job(processed)
+        
+        # IMPORTANTE: Eliminar el mensaje de la cola después de procesarlo
+        self._settle([(message, processed)])
+        
+        self.processed_count += 1
+        return processed
+    
+    def _begin_job(self, message: QueueMessage, payload: dict) -> str:
+        """Empieza a renovar la visibilidad del mensaje y crea el workspace del job. Devuelve su directorio"""
+        self.heartbeat.track(message)
+        workspace = self.workspaces.acquire(str(payload.get('videoId', '')))
+        self.job_workspaces[message.message_id] = workspace
+        return workspace.path
+    
+    def _end_job(self, message: QueueMessage) -> None:
+        """Deja de renovar la visibilidad del mensaje y borra el workspace del job (libera su presupuesto)"""
+        self.heartbeat.untrack(message)
+        workspace = self.job_workspaces.pop(message.message_id, None)
+        if workspace:
+            self.workspaces.release(workspace)
+    
+    def _settle(self, finished: List[tuple]) -> None:
+        """
+        Resuelve los mensajes terminados (mensaje, resultado):
+        
+        - con retry_after (fallo transitorio, u otro worker tiene el job): se ocultan
+          ese tiempo y la cola los vuelve a entregar
+        - 'failed' (fallo permanente o sin intentos): van a la dead-letter queue
+        - el resto se elimina de la cola, en un solo batch
+        """
+        done, dead = [], []
+        for message, result in finished:
+            if result.get('retry_after'):
+                self.queue.nack(message, delay_seconds=result['retry_after'])
+                if result.get('failure_class'):
+                    self.metrics.observe_failure(result['failure_class'], "retry")
+            elif result.get('status') == 'failed':
+                dead.append((message, result.get('failure_class'), result.get('error')))
+            else:
+                done.append(message)
+        done += self._dead_letter(dead)
+        if done:
+            self.queue.ack(done)
+    
+    def _dead_letter(self, entries: List[tuple]) -> List[QueueMessage]:
+        """
+        Envía (mensaje, clase, error) a la DLQ. Devuelve los mensajes enviados, que ya
+        se pueden eliminar; si el envío falla quedan en la cola y se vuelven a entregar.
+        """
+        if not entries:
+            return []
+        bodies = [dead_letter_body(message, failure_class, error) for message, failure_class, error in entries]
+        try:
+            message_ids = self.dead_letters.send_batch(bodies)
+        except Exception as e:
+            logger.error(f" Could not send {len(entries)} job(s) to the dead-letter queue: {e}")
+            return []
+        sent = []
+        for (message, failure_class, _), message_id in zip(entries, message_ids):
+            if message_id is None:
+                continue
+            sent.append(message)
+            self.metrics.observe_failure(failure_class, "dead_letter")
+            logger.warning(f" Job {message.message_id} sent to the dead-letter queue ({failure_class})")
+        return sent
+    
+    def _parse_messages(self, messages: List[QueueMessage]) -> List[tuple]:
+        """
+        (message, payload) de cada mensaje válido, con el número de entrega en payload['attempt'].
+        Los que no son JSON van a la dead-letter queue.
+        """
+        parsed, corrupted = [], []
+        for message in messages:
             try:
-                self.sqs.delete_message(
-                    QueueUrl=self.queue_url,
-                    ReceiptHandle=receipt_handle
+                payload = message.json()
+                if not isinstance(payload, dict):
+                    raise ValueError("job body is not a JSON object")
+            except ValueError as e:
+                print(f"✗ Error al parsear JSON: {e}")
+                corrupted.append((message, MALFORMED, str(e)))
+                continue
+            payload['attempt'] = message.receive_count
+            parsed.append((message, payload))
+        if corrupted:
+            sent = self._dead_letter(corrupted)
+            if sent:
+                self.queue.ack(sent)
+        return parsed
+    
+    def run_pool(self, continuous: bool = True, max_messages: Optional[int] = None,
+                 on_result: Optional[Callable[[dict], None]] = None):
+        """
+        Procesa hasta `concurrency` videos a la vez en un pool de procesos.
+        
+        Recibe en lotes (hasta 10 por llamada) solo los mensajes que caben en los
+        slots libres, y elimina de la cola en un solo batch los que terminan juntos.
+        Mientras un job corre, el heartbeat renueva la visibilidad de su mensaje.
+        Solo se reciben los jobs que caben en el presupuesto de scratch (WorkspaceManager).
+        Si un proceso del pool muere, su mensaje no se elimina y la cola lo vuelve a
+        entregar tras el visibility timeout.
+        """
+        in_flight: Dict[Future, QueueMessage] = {}
+        submitted = 0
+        drained = False  # En modo single run: la cola ya no devolvió mensajes
+        
+        # spawn: cada proceso abre sus propias conexiones (DB, boto3) en vez de heredarlas
+        with ProcessPoolExecutor(max_workers=self.concurrency, mp_context=get_context("spawn")) as executor:
+            while True:
+                free_slots = self.concurrency - len(in_flight)
+                if max_messages:
+                    free_slots = min(free_slots, max_messages - submitted)
+                
+                if free_slots > 0 and not drained:
+                    free_slots = min(free_slots, self.workspaces.admissible())
+                    if free_slots <= 0 and not in_flight:
+                        # Sin scratch libre: esperar antes de volver a consultar
+                        time.sleep(POOL_POLL_SECONDS)
+                        continue
+                
+                if free_slots > 0 and not drained:
+                    try:
+                        # Con jobs en curso no se bloquea: hay que volver a revisar los que terminan
+                        messages = self.queue.receive_batch(
+                            max_messages=free_slots, wait_seconds=0 if in_flight else 20
+                        )
+                    except Exception as e:
+                        print(f"✗ Error al recibir mensajes: {e}")
+                        messages = []
+                    drained = not continuous and not messages
+                    for message, payload in self._parse_messages(messages):
+                        payload['workspace'] = self._begin_job(message, payload)
+                        in_flight[executor.submit(self.job_function, payload)] = message
+                        submitted += 1
+                
+                if not in_flight:
+                    if (max_messages and submitted >= max_messages) or drained:
+                        break
+                    continue
+                
+                # Con slots libres se espera poco para recibir más mensajes; sin slots, hasta que termine uno
+                done, _ = wait(
+                    list(in_flight),
+                    timeout=POOL_POLL_SECONDS if self.concurrency > len(in_flight) else None,
+                    return_when=FIRST_COMPLETED
                 )
-            except:
-                pass
-            return None
+                finished = []
+                for future in done:
+                    message = in_flight.pop(future)
+                    self._end_job(message)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f" Job {message.message_id} crashed, left for redelivery: {e}")
+                        continue
+                    finished.append((message, result))
+                    self.processed_count += 1
+                    self.metrics.observe_job(result)
+                    if on_result:
+                        on_result(result)
+                if finished:
+                    self._settle(finished)
+    
+    def run_pipeline(self, continuous: bool = True, max_messages: Optional[int] = None,
+                     on_result: Optional[Callable[[dict], None]] = None):
+        """
+        Procesa los videos como un pipeline de tres etapas para solapar red y CPU:
+        
+        - prepare (pool de threads, WORKER_IO_CONCURRENCY): claim, descarga y ffprobe
+        - render (pool de procesos, `concurrency`): render + empaquetado HLS
+        - publish (mismo pool de threads): subida, verificación, DB y limpieza
+        
+        Las etapas de I/O tienen su propio límite (WORKER_IO_TIMEOUT_SECONDS). Mientras
+        el job está en curso se renueva el lease de su claim en el job ledger, y el
+        heartbeat mantiene oculto el mensaje hasta pipeline_job_seconds().
+        
+        Mientras un job renderiza, el siguiente ya se está descargando y el anterior
+        subiendo. Backpressure: solo se reciben mensajes nuevos si hay menos de
+        WORKER_PREFETCH_JOBS jobs descargándose o esperando CPU, si las subidas no
+        ocupan todo el pool de I/O y si los jobs nuevos caben en el presupuesto de
+        scratch (WorkspaceManager: bytes de los workspaces en curso y espacio libre).
+        """
+        prepare_job, render_job, publish_job = self.pipeline_stages
+        io_workers = max(settings.WORKER_IO_CONCURRENCY, 1)
+        prefetch = max(settings.WORKER_PREFETCH_JOBS, 1)
+        max_job_seconds = pipeline_job_seconds(self.concurrency, prefetch)
+        self.heartbeat.max_age = max_job_seconds + settings.QUEUE_VISIBILITY_TIMEOUT
+        last_renewal = time.monotonic()
+        
+        futures: Dict[Future, tuple] = {}  # future -> (etapa, mensaje, job)
+        ready: deque = deque()  # (mensaje, job, desde) descargados esperando un slot de CPU
+        preparing = rendering = publishing = 0
+        submitted = 0
+        drained = False
+        
+        with ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="pipeline-io") as io_executor, \
+                ProcessPoolExecutor(max_workers=self.concurrency, mp_context=get_context("spawn")) as cpu_executor:
+            while True:
+                if time.monotonic() - last_renewal >= settings.WORKER_HEARTBEAT_SECONDS:
+                    in_flight = [job for _, _, job in futures.values()] + [job for _, job, _ in ready]
+                    self._renew_leases(in_flight, max_job_seconds)
+                    last_renewal = time.monotonic()
+                
+                # Pasar a render los jobs descargados, mientras haya slots de CPU
+                while ready and rendering < self.concurrency:
+                    message, job, since = ready.popleft()
+                    job.timings.add("cpu_wait", time.monotonic() - since)
+                    futures[cpu_executor.submit(render_job, job)] = ("render", message, job)
+                    rendering += 1
+                
+                can_receive = (
+                    not drained
+                    and preparing + len(ready) < prefetch
+                    and publishing < io_workers
+                    and not (max_messages and submitted >= max_messages)
+                )
+                if can_receive:
+                    admissible = self.workspaces.admissible()
+                    can_receive = admissible > 0
+                if can_receive:
+                    limit = min(prefetch - preparing - len(ready), admissible)
+                    if max_messages:
+                        limit = min(limit, max_messages - submitted)
+                    try:
+                        # Con jobs en curso no se bloquea: hay que seguir moviendo el pipeline
+                        messages = self.queue.receive_batch(max_messages=limit, wait_seconds=0 if futures else 20)
+                    except Exception as e:
+                        print(f"✗ Error al recibir mensajes: {e}")
+                        messages = []
+                    drained = not continuous and not messages
+                    for message, payload in self._parse_messages(messages):
+                        job = VideoJob(payload.get('videoId', ''), payload.get('tempFilePath', ''), payload['attempt'],
+                                       scratch_dir=self._begin_job(message, payload))
+                        futures[io_executor.submit(prepare_job, job)] = ("prepare", message, job)
+                        preparing += 1
+                        submitted += 1
+                
+                if not futures:
+                    if (max_messages and submitted >= max_messages) or drained:
+                        break
+                    if not can_receive:
+                        # Sin scratch libre: esperar antes de volver a consultar
+                        time.sleep(POOL_POLL_SECONDS)
+                    continue
+                
+                # Sin slots para recibir se espera igual como máximo un intervalo: hay que renovar los leases
+                done, _ = wait(list(futures),
+                               timeout=POOL_POLL_SECONDS if can_receive else settings.WORKER_HEARTBEAT_SECONDS,
+                               return_when=FIRST_COMPLETED)
+                finished = []
+                for future in done:
+                    stage, message, job = futures.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        # El proceso de render murió: borrar su workspace y dejar el mensaje para que se reentregue
+                        logger.error(f" Job {message.message_id} crashed in {stage}, left for redelivery: {e}")
+                        self._end_job(message)
+                        outcome = None
+                    
+                    if stage == "prepare":
+                        preparing -= 1
+                        if outcome is None:
+                            continue
+                        if outcome.result:
+                            result = outcome.result
+                        else:
+                            ready.append((message, outcome, time.monotonic()))
+                            continue
+                    elif stage == "render":
+                        rendering -= 1
+                        if outcome is None:
+                            continue
+                        futures[io_executor.submit(publish_job, outcome)] = ("publish", message, outcome)
+                        publishing += 1
+                        continue
+                    else:
+                        publishing -= 1
+                        if outcome is None:
+                            continue
+                        result = outcome
+                    
+                    # Job terminado: el resultado tiene el mismo formato que process_message
+                    result['process_shift'] = self.shift
+                    self._end_job(message)
+                    finished.append((message, result))
+                    self.processed_count += 1
+                    self.metrics.observe_job(result)
+                    if on_result:
+                        on_result(result)
+                if finished:
+                    self._settle(finished)
+    
+    def _renew_leases(self, jobs: List[VideoJob], max_job_seconds: int) -> None:
+        """Extiende el claim en el job ledger de los jobs en curso que no superaron max_job_seconds"""
+        now = time.monotonic()
+        claimed = [job for job in jobs if job.ledger_version and now - job.received_at <= max_job_seconds]
+        if not claimed:
+            return
+        db = SyncSessionLocal()
+        try:
+            for job in claimed:
+                if not renew_claim(db, job.video_pk, job.ledger_version, job.ledger_worker):
+                    logger.warning(f" Claim of job {job.video_id} is no longer held by this worker")
+        except Exception as e:
+            # Se reintenta en la siguiente vuelta; el lease cubre varios intervalos
+            logger.error(f" Could not renew job leases: {e}")
+        finally:
+            db.close()
     
     def get_queue_stats(self) -> dict:
         """Obtiene estadísticas de la cola"""
         try:
-            response = self.sqs.get_queue_attributes(
-                QueueUrl=self.queue_url,
-                AttributeNames=['All']
-            )
-            return response['Attributes']
-        except ClientError:
+            return {'ApproximateNumberOfMessages': self.queue.depth()}
+        except Exception:
             return {}
     
     def start(self, continuous: bool = True, max_messages: Optional[int] = None):
@@ -519,13 +1079,28 @@ class SQSProcessWorker:
         print(f"Cola: {self.queue_name}")
         print(f"Region: {self.region_name}")
         print(f"Modo: {'Continuo' if continuous else 'Single run'}")
+        print(f"Concurrencia: {self.concurrency}{' (pipeline)' if settings.WORKER_PIPELINE else ''}")
         
         # Estadísticas iniciales
         stats = self.get_queue_stats()
         print(f"Mensajes en cola: {stats.get('ApproximateNumberOfMessages', 'N/A')}")
         print("\nEsperando mensajes...\n")
         
+        # Scratch que dejaron workers caídos (workspaces sin lock y archivos sueltos de versiones anteriores)
+        self.workspaces.sweep_orphans()
+        sweep_legacy_scratch(settings.TEMP_PATH, lease_seconds())
+        
+        if settings.WORKER_METRICS_PORT:
+            self.metrics.serve(settings.WORKER_METRICS_PORT)
+        self.heartbeat.start()
         try:
+            if settings.WORKER_PIPELINE:
+                self.run_pipeline(continuous, max_messages, on_result=self._print_result)
+                return
+            if self.concurrency > 1:
+                self.run_pool(continuous, max_messages, on_result=self._print_result)
+                return
+            
             while True:
                 # Verificar límite de mensajes
                 if max_messages and self.processed_count >= max_messages:
@@ -535,10 +1110,7 @@ class SQSProcessWorker:
                 result = self.consume_message()
                 
                 if result:
-                    print(f"[{self.processed_count}] Procesado:")
-                    print(f"  Status:  {result['status']}")
-                    print(f"  Video_id:   {result['video_id']}")
-                    print(f"  file_path:   {result['file_path']}")
+                    self._print_result(result)
                 else:
                     if not continuous:
                         print("⏳ No hay mensajes disponibles")
@@ -549,8 +1121,16 @@ class SQSProcessWorker:
         except KeyboardInterrupt:
             print(f"\n✓ Worker detenido por usuario")
         finally:
+            self.heartbeat.stop()
+            self.metrics.shutdown()
             self._shutdown()
     
+    def _print_result(self, result: dict):
+        print(f"[{self.processed_count}] Procesado:")
+        print(f"  Status:  {result['status']}")
+        print(f"  Video_id:   {result['video_id']}")
+        print(f"  file_path:   {result['file_path']}")
+    
     def _shutdown(self):
         """Cierre limpio del worker"""
         print(f"✓ Mensajes procesados: {self.processed_count}")
@@ -564,8 +1144,8 @@ class SQSProcessWorker:
 def main():
     """Función principal para ejecutar el worker"""
     worker = SQSProcessWorker(
-        queue_name='message-queue',
-        region_name='us-east-1',
+        queue_name=settings.QUEUE_NAME,
+        region_name=settings.AWS_REGION,
         shift=3
     )
     
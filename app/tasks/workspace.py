@@ -0,0 +1,216 @@
+"""
+Per-job scratch workspaces of the video worker.
+
+Each job gets its own directory (original, renders, verification copies, test
+frames) instead of sharing flat names in TEMP_PATH:
+
+    TEMP_PATH/jobs/<video_id>.<random>/
+        .lock          flock held by the worker while the job is in flight
+        input.mp4
+        render/...
+
+The WorkspaceManager of a worker process:
+- gates admission of new jobs with a byte budget (WORKER_SCRATCH_BUDGET_MB):
+  every workspace counts max(its size on disk, WORKER_SCRATCH_JOB_MB reserved),
+  and the disk must keep WORKER_SCRATCH_MIN_FREE_MB free
+- places a workspace on tmpfs (WORKER_SCRATCH_TMPFS_PATH) when the reservation
+  fits in WORKER_SCRATCH_TMPFS_MB and in the free space there, on disk otherwise
+- removes, at startup, the workspaces whose lock is free (their worker crashed)
+
+El lock es un flock: lo libera el kernel cuando muere el proceso que lo tiene,
+así que un worker que arranca nunca borra el workspace de otro worker vivo.
+"""
+import fcntl
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LOCK_FILE = ".lock"
+
+MB = 1024 * 1024
+
+# Un directorio sin lock más nuevo que esto puede estar creándose (mkdtemp antes del flock)
+UNLOCKED_GRACE_SECONDS = 60
+
+# Nombres de scratch de versiones anteriores del worker (archivos sueltos en TEMP_PATH)
+LEGACY_SCRATCH_PATTERNS = ("*_input.mp4", "*_processed", "*_verify_*", "*_test_frame.jpg", "CORRUPTED_*")
+
+
+@dataclass
+class Workspace:
+    path: str
+    reserved_bytes: int
+    tmpfs: bool = False
+    lock_fd: Optional[int] = None
+
+    def file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class WorkspaceManager:
+    """
+    Args:
+        root: Directorio de los workspaces en disco
+        budget_bytes: Bytes de scratch entre todos los jobs en curso
+        job_bytes: Reserva mínima de cada job
+        min_free_bytes: Espacio libre que debe quedar en el disco de root
+        tmpfs_root: Directorio en tmpfs (None = solo disco)
+        tmpfs_budget_bytes: Bytes como máximo en tmpfs (usa RAM)
+    """
+
+    def __init__(self, root: str, budget_bytes: int, job_bytes: int, min_free_bytes: int = 0,
+                 tmpfs_root: Optional[str] = None, tmpfs_budget_bytes: int = 0):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.job_bytes = job_bytes
+        self.min_free_bytes = min_free_bytes
+        self.tmpfs_root = tmpfs_root if tmpfs_root and tmpfs_budget_bytes > 0 else None
+        self.tmpfs_budget_bytes = tmpfs_budget_bytes
+        self.active: Dict[str, Workspace] = {}
+        os.makedirs(self.root, exist_ok=True)
+        if self.tmpfs_root:
+            os.makedirs(self.tmpfs_root, exist_ok=True)
+
+    def _charge(self, workspace: Workspace) -> int:
+        return max(directory_size(workspace.path), workspace.reserved_bytes)
+
+    def used_bytes(self, tmpfs: Optional[bool] = None) -> int:
+        """Bytes charged to the budget by the workspaces in flight (only tmpfs or only disk if given)"""
+        return sum(self._charge(workspace) for workspace in list(self.active.values())
+                   if tmpfs is None or workspace.tmpfs == tmpfs)
+
+    @staticmethod
+    def _disk_free(path: str) -> int:
+        try:
+            return shutil.disk_usage(path).free
+        except OSError:
+            # Sin poder consultar el disco no se frena la admisión (solo queda el presupuesto)
+            return sys.maxsize
+
+    def admissible(self) -> int:
+        """How many new jobs fit in the budget and the free disk right now"""
+        room = self.budget_bytes - self.used_bytes()
+        disk_room = self._disk_free(self.root) - self.min_free_bytes
+        if self.tmpfs_root:
+            disk_room += min(self._disk_free(self.tmpfs_root), self.tmpfs_budget_bytes - self.used_bytes(tmpfs=True))
+        jobs = min(room, disk_room) // max(self.job_bytes, 1)
+        if jobs <= 0:
+            logger.warning(f" Scratch budget full ({self.used_bytes() // MB} MB in use, "
+                           f"{self._disk_free(self.root) // MB} MB free on disk), not taking new jobs")
+        return max(int(jobs), 0)
+
+    def can_admit(self) -> bool:
+        return self.admissible() > 0
+
+    def _fits_tmpfs(self) -> bool:
+        if not self.tmpfs_root:
+            return False
+        in_tmpfs = self.used_bytes(tmpfs=True)
+        return (in_tmpfs + self.job_bytes <= self.tmpfs_budget_bytes
+                and self._disk_free(self.tmpfs_root) >= self.job_bytes)
+
+    def acquire(self, name: str) -> Workspace:
+        """Create and lock the workspace of a job (name: video id)"""
+        tmpfs = self._fits_tmpfs()
+        prefix = re.sub(r"[^A-Za-z0-9_-]", "_", name)[:64] or "job"
+        path = tempfile.mkdtemp(prefix=f"{prefix}.", dir=self.tmpfs_root if tmpfs else self.root)
+        lock_fd = os.open(os.path.join(path, LOCK_FILE), os.O_CREAT | os.O_RDWR, 0o600)
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        workspace = Workspace(path, self.job_bytes, tmpfs, lock_fd)
+        self.active[path] = workspace
+        logger.info(f" Workspace {path}{' (tmpfs)' if tmpfs else ''}")
+        return workspace
+
+    def release(self, workspace: Workspace) -> None:
+        """Remove the workspace with whatever the job left in it and give back its budget"""
+        self.active.pop(workspace.path, None)
+        shutil.rmtree(workspace.path, ignore_errors=True)
+        if workspace.lock_fd is not None:
+            os.close(workspace.lock_fd)
+            workspace.lock_fd = None
+
+    def sweep_orphans(self) -> int:
+        """Remove workspaces left by crashed workers (lock not held). Returns how many were removed"""
+        removed = 0
+        for root in filter(None, (self.root, self.tmpfs_root)):
+            for entry in Path(root).iterdir():
+                if not entry.is_dir() or str(entry) in self.active:
+                    continue
+                if self._is_orphan(entry):
+                    shutil.rmtree(entry, ignore_errors=True)
+                    removed += 1
+        if removed:
+            logger.warning(f" Removed {removed} orphaned job workspace(s)")
+        return removed
+
+    @staticmethod
+    def _is_orphan(path: Path) -> bool:
+        try:
+            lock_fd = os.open(path / LOCK_FILE, os.O_RDWR)
+        except FileNotFoundError:
+            try:
+                return time.time() - path.stat().st_mtime > UNLOCKED_GRACE_SECONDS
+            except OSError:
+                return False
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+        finally:
+            os.close(lock_fd)
+
+
+def sweep_legacy_scratch(temp_path: str, older_than: float) -> List[str]:
+    """Remove flat scratch files of older worker versions from temp_path, if older than `older_than` seconds"""
+    removed = []
+    now = time.time()
+    for pattern in LEGACY_SCRATCH_PATTERNS:
+        for path in Path(temp_path).glob(pattern):
+            try:
+                if now - path.stat().st_mtime < older_than:
+                    continue
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink()
+                removed.append(str(path))
+            except OSError:
+                pass
+    if removed:
+        logger.warning(f" Removed {len(removed)} legacy scratch file(s) from {temp_path}")
+    return removed
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    """Manager configured in settings (one per worker process)"""
+    return WorkspaceManager(
+        os.path.join(settings.TEMP_PATH, "jobs"),
+        budget_bytes=settings.WORKER_SCRATCH_BUDGET_MB * MB,
+        job_bytes=settings.WORKER_SCRATCH_JOB_MB * MB,
+        min_free_bytes=settings.WORKER_SCRATCH_MIN_FREE_MB * MB,
+        tmpfs_root=settings.WORKER_SCRATCH_TMPFS_PATH,
+        tmpfs_budget_bytes=settings.WORKER_SCRATCH_TMPFS_MB * MB,
+    )
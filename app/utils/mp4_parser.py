@@ -0,0 +1,352 @@
+"""
+In-process ISO-BMFF (MP4/MOV) metadata parser.
+
+Reads only the box headers and the `moov` box (mvhd, trak/tkhd, mdia/hdlr,
+stsd) to get duration, width, height and codec, so the worker and the API
+don't have to fork ffprobe for every video. Works on a file path, an mmap /
+bytes buffer or any byte-range reader (ej: ranged GETs to S3).
+
+Raises MP4ParseError for anything it cannot handle (fragmented MP4, missing
+moov, other containers); callers fall back to ffprobe in that case.
+"""
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+# Boxes con los que puede empezar un archivo ISO-BMFF/QuickTime
+LEADING_BOXES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid", b"styp"}
+
+# Límite de tamaño del moov que aceptamos leer a memoria
+MAX_MOOV_SIZE = 64 * 1024 * 1024
+
+# Sample entry (fourcc) -> codec_name como lo reporta ffprobe
+CODEC_NAMES = {
+    b"avc1": "h264",
+    b"avc3": "h264",
+    b"hvc1": "hevc",
+    b"hev1": "hevc",
+    b"av01": "av1",
+    b"vp09": "vp9",
+    b"vp08": "vp8",
+    b"mp4v": "mpeg4",
+    b"jpeg": "mjpeg",
+    b"mjpa": "mjpeg",
+    b"apch": "prores",
+    b"apcn": "prores",
+    b"apcs": "prores",
+    b"apco": "prores",
+    b"ap4h": "prores",
+    b"s263": "h263",
+}
+
+
+class MP4ParseError(Exception):
+    """The container could not be parsed in-process"""
+    pass
+
+
+class MP4UnsupportedError(MP4ParseError):
+    """The file is a valid ISO-BMFF the in-process parser does not handle (ffprobe can)"""
+    pass
+
+
+class RangeReader:
+    """
+    Byte-range reader used by the parser.
+
+    Args:
+        read_range: Function (offset, length) -> bytes
+        size: Total size of the file in bytes
+    """
+
+    def __init__(self, read_range: Callable[[int, int], bytes], size: int):
+        self.read_range = read_range
+        self.size = size
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset >= self.size or length <= 0:
+            return b""
+        return self.read_range(offset, min(length, self.size - offset))
+
+
+class FileReader(RangeReader):
+    """Range reader over a local file path"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.file = open(path, "rb")
+        super().__init__(self._read_file, os.fstat(self.file.fileno()).st_size)
+
+    def _read_file(self, offset: int, length: int) -> bytes:
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class BufferReader(RangeReader):
+    """Range reader over an in-memory buffer or a memory-mapped file"""
+
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview, mmap.mmap]):
+        self.buffer = buffer
+        super().__init__(lambda offset, length: bytes(buffer[offset:offset + length]), len(buffer))
+
+
+def _iter_boxes(reader: RangeReader, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, payload_offset, payload_size) for every box in [start, end)"""
+    offset = start
+    while offset + 8 <= end:
+        header = reader.read(offset, 16)
+        if len(header) < 8:
+            raise MP4ParseError("Truncated box header")
+
+        size, box_type = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                raise MP4ParseError("Truncated 64-bit box header")
+            size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+
+        if size < header_size or offset + size > end:
+            raise MP4ParseError(f"Invalid size for box '{box_type.decode('latin-1')}'")
+
+        yield box_type, offset + header_size, size - header_size
+        offset += size
+
+
+class _BoxView:
+    """Navigate the boxes inside an in-memory moov payload"""
+
+    def __init__(self, data: bytes):
+        self.reader = BufferReader(data)
+        self.data = data
+
+    def children(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int]]:
+        return _iter_boxes(self.reader, start, len(self.data) if end is None else end)
+
+    def find(self, box_type: bytes, start: int, end: int) -> Optional[Tuple[int, int]]:
+        for child_type, offset, size in self.children(start, end):
+            if child_type == box_type:
+                return offset, size
+        return None
+
+
+def _parse_mvhd(data: bytes, offset: int) -> Tuple[int, int]:
+    """Return (timescale, duration) from a mvhd payload (mdhd has the same layout)"""
+    version = data[offset]
+    if version == 1:
+        timescale, duration = struct.unpack(">IQ", data[offset + 20:offset + 32])
+    else:
+        timescale, duration = struct.unpack(">II", data[offset + 12:offset + 20])
+    return timescale, duration
+
+
+def _parse_tkhd(data: bytes, offset: int, size: int) -> Tuple[int, int]:
+    """Return display (width, height) from a tkhd payload (16.16 fixed point, at the end of the box)"""
+    width, height = struct.unpack(">II", data[offset + size - 8:offset + size])
+    return width >> 16, height >> 16
+
+
+def _parse_video_trak(view: _BoxView, start: int, end: int) -> Optional[Dict]:
+    """Return the metadata of a trak if it is a video track, else None"""
+    data = view.data
+    mdia = view.find(b"mdia", start, end)
+    if not mdia:
+        return None
+
+    hdlr = view.find(b"hdlr", mdia[0], mdia[0] + mdia[1])
+    # hdlr: version/flags (4) + pre_defined (4) + handler_type (4)
+    if not hdlr or data[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+        return None
+
+    track = {"width": 0, "height": 0, "codec": "unknown", "duration": None}
+
+    tkhd = view.find(b"tkhd", start, end)
+    if tkhd:
+        track["width"], track["height"] = _parse_tkhd(data, tkhd[0], tkhd[1])
+
+    mdhd = view.find(b"mdhd", mdia[0], mdia[0] + mdia[1])
+    if mdhd:
+        timescale, duration = _parse_mvhd(data, mdhd[0])
+        if timescale:
+            track["duration"] = duration / timescale
+
+    minf = view.find(b"minf", mdia[0], mdia[0] + mdia[1])
+    stbl = view.find(b"stbl", minf[0], minf[0] + minf[1]) if minf else None
+    stsd = view.find(b"stsd", stbl[0], stbl[0] + stbl[1]) if stbl else None
+    if stsd:
+        # stsd: version/flags (4) + entry_count (4), luego el primer sample entry
+        entry_offset = stsd[0] + 8
+        entry_size, fourcc = struct.unpack(">I4s", data[entry_offset:entry_offset + 8])
+        track["codec"] = CODEC_NAMES.get(fourcc, fourcc.decode("latin-1").strip())
+        # VisualSampleEntry: header (8) + reserved (6) + data_ref_index (2) + pre_defined/reserved (16)
+        if entry_size >= 36:
+            coded_width, coded_height = struct.unpack(">HH", data[entry_offset + 32:entry_offset + 36])
+            if coded_width and coded_height:
+                track["width"], track["height"] = coded_width, coded_height
+
+    return track
+
+
+def parse_mp4(source: Union[str, Path, bytes, bytearray, memoryview, mmap.mmap, RangeReader]) -> Dict:
+    """
+    Parse MP4/MOV metadata without ffprobe
+
+    Args:
+        source: File path, bytes/mmap buffer or RangeReader
+
+    Returns:
+        dict with duration, width, height, codec and has_video
+
+    Raises:
+        MP4ParseError: If the container is not a parseable ISO-BMFF file
+    """
+    if isinstance(source, (str, Path)):
+        reader = FileReader(source)
+        try:
+            return parse_mp4(reader)
+        finally:
+            reader.close()
+
+    reader = source if isinstance(source, RangeReader) else BufferReader(source)
+
+    moov = None
+    for index, (box_type, offset, size) in enumerate(_iter_boxes(reader, 0, reader.size)):
+        if index == 0 and box_type not in LEADING_BOXES:
+            raise MP4ParseError("Not an ISO-BMFF/QuickTime file")
+        if box_type == b"moov":
+            moov = (offset, size)
+            break
+
+    if moov is None:
+        raise MP4ParseError("moov box not found")
+    if moov[1] > MAX_MOOV_SIZE:
+        raise MP4UnsupportedError("moov box too large")
+
+    return parse_moov(reader.read(moov[0], moov[1]))
+
+
+def parse_moov(moov_payload: bytes) -> Dict:
+    """Parse the payload of a moov box (without its 8-byte header)"""
+    view = _BoxView(moov_payload)
+
+    mvhd = None
+    video_track = None
+    try:
+        for box_type, offset, size in view.children():
+            if box_type == b"mvhd":
+                mvhd = _parse_mvhd(moov_payload, offset)
+            elif box_type == b"mvex":
+                # MP4 fragmentado: la duración real está en los moof, no en el moov
+                raise MP4UnsupportedError("Fragmented MP4 is not supported")
+            elif box_type == b"trak" and video_track is None:
+                video_track = _parse_video_trak(view, offset, offset + size)
+    except (struct.error, IndexError) as e:
+        raise MP4ParseError(f"Truncated moov box: {e}")
+
+    if not mvhd or not mvhd[0]:
+        raise MP4ParseError("mvhd box not found")
+
+    # Igual que ffprobe: la duración del formato sale del mvhd
+    timescale, duration = mvhd
+    duration_seconds = duration / timescale
+    if not duration_seconds and video_track and video_track["duration"]:
+        duration_seconds = video_track["duration"]
+
+    return {
+        "duration": duration_seconds,
+        "width": video_track["width"] if video_track else 0,
+        "height": video_track["height"] if video_track else 0,
+        "codec": video_track["codec"] if video_track else "unknown",
+        "has_video": video_track is not None,
+    }
+
+
+class MP4StreamParser:
+    """
+    Incremental version of parse_mp4 for data that arrives in chunks (ej: an upload).
+
+    Top-level boxes other than moov are skipped without buffering, so memory is
+    bounded by the moov size no matter where it is in the file. feed() returns
+    the metadata as soon as the moov box is complete, and None before that.
+    """
+
+    def __init__(self):
+        self.metadata: Optional[Dict] = None
+        self._header = bytearray()
+        self._moov: Optional[bytearray] = None
+        self._moov_size = 0
+        self._skip = 0
+        self._boxes = 0
+
+    def feed(self, chunk: bytes) -> Optional[Dict]:
+        """Consume a chunk. Raises MP4ParseError if the data is not a parseable ISO-BMFF file"""
+        view = memoryview(chunk)
+        while view and self.metadata is None:
+            if self._skip:
+                skipped = min(self._skip, len(view))
+                self._skip -= skipped
+                view = view[skipped:]
+            elif self._moov is not None:
+                needed = self._moov_size - len(self._moov)
+                self._moov += view[:needed]
+                view = view[needed:]
+                if len(self._moov) == self._moov_size:
+                    self.metadata = parse_moov(bytes(self._moov))
+            else:
+                view = self._read_header(view)
+        return self.metadata
+
+    def _read_header(self, view: memoryview) -> memoryview:
+        needed = (16 if len(self._header) >= 8 and self._header[:4] == b"\x00\x00\x00\x01" else 8) - len(self._header)
+        self._header += view[:needed]
+        view = view[needed:]
+        if len(self._header) < 8:
+            return view
+
+        size, box_type = struct.unpack(">I4s", self._header[:8])
+        if size == 1:
+            if len(self._header) < 16:
+                return view
+            size = struct.unpack(">Q", self._header[8:16])[0]
+        header_size = len(self._header)
+        self._header.clear()
+
+        if self._boxes == 0 and box_type not in LEADING_BOXES:
+            raise MP4ParseError("Not an ISO-BMFF/QuickTime file")
+        self._boxes += 1
+
+        if size == 0:
+            # La caja llega hasta el final del archivo: si no es el moov, ya no hay moov
+            raise MP4ParseError("moov box not found")
+        if size < header_size:
+            raise MP4ParseError(f"Invalid size for box '{box_type.decode('latin-1')}'")
+
+        if box_type == b"moov":
+            if size - header_size > MAX_MOOV_SIZE:
+                raise MP4UnsupportedError("moov box too large")
+            self._moov = bytearray()
+            self._moov_size = size - header_size
+            if not self._moov_size:
+                raise MP4ParseError("Empty moov box")
+        else:
+            self._skip = size - header_size
+        return view
+
+    @property
+    def is_iso_bmff(self) -> bool:
+        """The data started with a valid ISO-BMFF/QuickTime box"""
+        return self._boxes > 0
+
+    def finish(self) -> Dict:
+        """Return the metadata once all the data was fed. Raises MP4ParseError if the moov is missing or truncated"""
+        if self.metadata is None:
+            if self._moov is not None:
+                raise MP4ParseError(f"Truncated moov box ({len(self._moov)} of {self._moov_size} bytes)")
+            raise MP4ParseError("moov box not found")
+        return self.metadata
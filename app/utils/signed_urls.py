@@ -0,0 +1,32 @@
+import hmac
+import hashlib
+import time
+from typing import Optional
+from app.core.config import settings
+
+
+def sign_upload(key: str, expires: int) -> str:
+    """
+    Create an HMAC signature for a local upload URL
+
+    Args:
+        key: Storage key the URL allows writing to (ej: "uploads/video123.mp4")
+        expires: Unix timestamp after which the URL is no longer valid
+
+    Returns:
+        Hex encoded HMAC-SHA256 signature
+    """
+    message = f"PUT:{key}:{expires}".encode("utf-8")
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def verify_upload_signature(key: str, expires: int, signature: Optional[str]) -> bool:
+    """
+    Verify a local upload URL signature and expiration
+
+    Returns:
+        True if the signature matches and the URL has not expired
+    """
+    if not signature or expires < int(time.time()):
+        return False
+    return hmac.compare_digest(sign_upload(key, expires), signature)
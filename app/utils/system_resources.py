@@ -0,0 +1,62 @@
+"""
+CPU and memory available to this process, honouring cgroup limits
+(a container sees the host's cores and RAM in os.cpu_count() and /proc/meminfo).
+"""
+import math
+import os
+from pathlib import Path
+from typing import Optional
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def available_cpus() -> float:
+    """Cores this process may use: CPU affinity, capped by the cgroup CPU quota"""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = float(len(os.sched_getaffinity(0)))
+    else:
+        cpus = float(os.cpu_count() or 1)
+
+    # cgroup v2: "<quota> <period>" o "max <period>"
+    cpu_max = _read(CGROUP_ROOT / "cpu.max")
+    if cpu_max and not cpu_max.startswith("max"):
+        quota, period = cpu_max.split()
+        cpus = min(cpus, int(quota) / int(period))
+    return cpus
+
+
+def available_memory_mb() -> int:
+    """Memory this process may still allocate: MemAvailable, capped by the cgroup memory limit"""
+    available = None
+    meminfo = _read(Path("/proc/meminfo"))
+    if meminfo:
+        for line in meminfo.splitlines():
+            if line.startswith("MemAvailable:"):
+                available = int(line.split()[1]) * 1024
+                break
+    if available is None:
+        available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+    # cgroup v2: límite del contenedor menos lo que ya usa
+    limit = _read(CGROUP_ROOT / "memory.max")
+    usage = _read(CGROUP_ROOT / "memory.current")
+    if limit and limit != "max" and usage:
+        available = min(available, int(limit) - int(usage))
+    return max(0, available // (1024 * 1024))
+
+
+def worker_slots(cpus_per_job: float, memory_per_job_mb: int,
+                 cpus: Optional[float] = None, memory_mb: Optional[int] = None) -> int:
+    """Jobs that fit in parallel on this node (at least 1)"""
+    cpus = available_cpus() if cpus is None else cpus
+    memory_mb = available_memory_mb() if memory_mb is None else memory_mb
+    by_cpu = math.floor(cpus / cpus_per_job)
+    by_memory = memory_mb // memory_per_job_mb
+    return max(1, min(by_cpu, by_memory))
@@ -0,0 +1,105 @@
+import hashlib
+import logging
+from typing import AsyncIterator, Dict, Optional, Union
+from fastapi import UploadFile
+from app.core.exceptions import ValidationException
+from app.utils.mp4_parser import MP4StreamParser, MP4ParseError, MP4UnsupportedError
+from app.utils.video_validator_sync import check_video_rules
+
+logger = logging.getLogger(__name__)
+
+
+class UploadStream:
+    """
+    Iterate an upload in fixed-size chunks enforcing the maximum size.
+
+    The source is either an UploadFile (multipart form) or an async iterator of
+    bytes (raw request body, e.g. request.stream()). Only one chunk is held in
+    memory at a time, so the API memory stays flat regardless of the upload
+    size. `size` holds the bytes read so far and `sha256` the hex digest of
+    the content once the iteration finishes (used to deduplicate uploads).
+
+    With validate=True the MP4/MOV header is parsed as the chunks go by and the
+    upload rules (check_video_rules) are applied as soon as the moov box is
+    complete, so an invalid video is rejected before it is persisted. `metadata`
+    holds the validated metadata, or None if the container could not be parsed
+    in-process (the worker validates those files): other containers (.avi, .mkv)
+    and ISO-BMFF features the parser does not handle (fragmented MP4). A stream
+    that starts as ISO-BMFF but is corrupt (bad box sizes, no moov, truncated
+    moov) is rejected with ValidationException.
+
+    With min_size the iteration raises ValidationException at the end of a
+    shorter stream, before the consumer gets past its last chunk (a resumable
+    chunk too small to be stored as a multipart part).
+    """
+
+    def __init__(self, upload: Union[UploadFile, AsyncIterator[bytes]], max_size: int, chunk_size: int,
+                 validate: bool = False, min_size: int = 0):
+        self.upload = upload
+        self.max_size = max_size
+        self.min_size = min_size
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.sha256: Optional[str] = None
+        self._hash = hashlib.sha256()
+        self.metadata: Optional[Dict] = None
+        self._header_parser = MP4StreamParser() if validate else None
+
+    async def _read(self) -> AsyncIterator[bytes]:
+        if hasattr(self.upload, "read"):
+            while True:
+                chunk = await self.upload.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            async for chunk in self.upload:
+                if chunk:
+                    yield chunk
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Yield the upload chunk by chunk. Raises ValidationException if it exceeds max_size"""
+        async for chunk in self._read():
+            self.size += len(chunk)
+            if self.size > self.max_size:
+                raise ValidationException(
+                    f"File size exceeds maximum allowed ({self.max_size // (1024 * 1024)}MB)"
+                )
+
+            if self._header_parser:
+                self._inspect(chunk)
+
+            self._hash.update(chunk)
+            yield chunk
+
+        self.sha256 = self._hash.hexdigest()
+
+        if self.size < self.min_size:
+            raise ValidationException(f"Chunks must be at least {self.min_size} bytes except the last one")
+
+        if self._header_parser:
+            parser, self._header_parser = self._header_parser, None
+            try:
+                parser.finish()
+            except MP4ParseError as e:
+                self._reject_or_skip(parser, e)
+
+    def _inspect(self, chunk: bytes) -> None:
+        """Feed the header parser; raises ValidationException if the video breaks the upload rules"""
+        try:
+            metadata = self._header_parser.feed(chunk)
+        except MP4ParseError as e:
+            parser, self._header_parser = self._header_parser, None
+            self._reject_or_skip(parser, e)
+            return
+
+        if metadata:
+            self._header_parser = None
+            self.metadata = check_video_rules(metadata)
+
+    @staticmethod
+    def _reject_or_skip(parser: MP4StreamParser, error: MP4ParseError) -> None:
+        """A corrupt ISO-BMFF file is rejected; anything else is left to the worker (ffprobe)"""
+        if parser.is_iso_bmff and not isinstance(error, MP4UnsupportedError):
+            raise ValidationException(f"Corrupted MP4 file: {error}")
+        logger.info(f" Upload container could not be validated in the API ({error})")
@@ -1,66 +1,49 @@
-import subprocess
+import asyncio
 import json
+import logging
 from typing import Dict
 from app.core.exceptions import ValidationException
+from app.utils.mp4_parser import parse_mp4, MP4ParseError
+from app.utils.video_validator_sync import FFPROBE_CMD, parse_ffprobe_output, check_video_rules
+
+logger = logging.getLogger(__name__)
+
+
+async def _probe_with_ffprobe(file_path: str) -> Dict:
+    """Run ffprobe as an async subprocess so the event loop is not blocked"""
+    process = await asyncio.create_subprocess_exec(
+        *FFPROBE_CMD, file_path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout=30)
+    except asyncio.TimeoutError:
+        process.kill()
+        raise
+
+    if process.returncode != 0:
+        raise ValidationException("Unable to process video file")
+
+    return parse_ffprobe_output(stdout.decode())
 
 
 async def validate_video(file_path: str) -> Dict:
     """
-    Validate video file using ffprobe
+    Validate video file reading its MP4/MOV boxes in-process (ffprobe as fallback)
     Returns metadata dict with duration, width, height
     Raises ValidationException if video is invalid
     """
     try:
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            file_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode != 0:
-            raise ValidationException("Unable to process video file")
-        
-        metadata = json.loads(result.stdout)
-        
-        # Find video stream
-        video_stream = next(
-            (s for s in metadata.get('streams', []) if s.get('codec_type') == 'video'),
-            None
-        )
-        
-        if not video_stream:
-            raise ValidationException("No video stream found in file")
-        
-        # Extract information
-        duration = float(metadata.get('format', {}).get('duration', 0))
-        width = int(video_stream.get('width', 0))
-        height = int(video_stream.get('height', 0))
-        
-        # Validate duration (20-60 seconds as per requirements)
-        if duration < 20 or duration > 60:
-            raise ValidationException(
-                f"Video duration must be between 20 and 60 seconds (current: {duration:.1f}s)"
-            )
-        
-        # Validate resolution (minimum 1080p as per requirements)
-        if height < 1080:
-            raise ValidationException(
-                f"Video resolution must be at least 1080p (current: {height}p)"
-            )
-        
-        return {
-            'duration': duration,
-            'width': width,
-            'height': height,
-            'codec': video_stream.get('codec_name', 'unknown')
-        }
-        
-    except subprocess.TimeoutExpired:
+        try:
+            metadata = parse_mp4(file_path)
+        except MP4ParseError as e:
+            logger.info(f" MP4 parser could not read {file_path} ({e}), falling back to ffprobe")
+            metadata = await _probe_with_ffprobe(file_path)
+
+        return check_video_rules(metadata)
+
+    except asyncio.TimeoutError:
         raise ValidationException("Video validation timeout")
     except json.JSONDecodeError:
         raise ValidationException("Unable to parse video metadata")
@@ -68,4 +51,3 @@ async def validate_video(file_path: str) -> Dict:
         if isinstance(e, ValidationException):
             raise
         raise ValidationException(f"Video validation error: {str(e)}")
-
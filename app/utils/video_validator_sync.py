@@ -1,66 +1,107 @@
 import subprocess
 import json
+import logging
 from typing import Dict
 from app.core.exceptions import ValidationException
+from app.utils.mp4_parser import parse_mp4, MP4ParseError
+
+logger = logging.getLogger(__name__)
+
+FFPROBE_CMD = [
+    'ffprobe',
+    '-v', 'quiet',
+    '-print_format', 'json',
+    '-show_format',
+    '-show_streams'
+]
+
+
+def parse_ffprobe_output(output: str) -> Dict:
+    """
+    Extract the metadata dict (duration, width, height, codec, has_video)
+    from ffprobe JSON output.
+    """
+    metadata = json.loads(output)
+
+    # Find video stream
+    video_stream = next(
+        (s for s in metadata.get('streams', []) if s.get('codec_type') == 'video'),
+        None
+    )
+
+    return {
+        'duration': float(metadata.get('format', {}).get('duration', 0)),
+        'width': int(video_stream.get('width', 0)) if video_stream else 0,
+        'height': int(video_stream.get('height', 0)) if video_stream else 0,
+        'codec': video_stream.get('codec_name', 'unknown') if video_stream else 'unknown',
+        'has_video': video_stream is not None
+    }
+
+
+def probe_with_ffprobe(file_path: str) -> Dict:
+    """Read video metadata forking ffprobe (fallback for containers the MP4 parser can't read)"""
+    result = subprocess.run(FFPROBE_CMD + [file_path], capture_output=True, text=True, timeout=30)
+
+    if result.returncode != 0:
+        raise ValidationException("Unable to process video file")
+
+    return parse_ffprobe_output(result.stdout)
+
+
+def probe_video_metadata(file_path: str) -> Dict:
+    """
+    Read video metadata in-process from the MP4/MOV boxes.
+    Falls back to ffprobe only for containers the parser cannot handle.
+    """
+    try:
+        return parse_mp4(file_path)
+    except MP4ParseError as e:
+        logger.info(f" MP4 parser could not read {file_path} ({e}), falling back to ffprobe")
+        return probe_with_ffprobe(file_path)
+
+
+def check_video_rules(metadata: Dict) -> Dict:
+    """
+    Apply the upload rules to probed metadata.
+    Returns metadata dict with duration, width, height, codec.
+    Raises ValidationException if video is invalid.
+    """
+    if not metadata.get('has_video'):
+        raise ValidationException("No video stream found in file")
+
+    duration = metadata['duration']
+    height = metadata['height']
+
+    # Validate duration (20-60 seconds as per requirements)
+    if duration < 20 or duration > 60:
+        raise ValidationException(
+            f"Video duration must be between 20 and 60 seconds (current: {duration:.1f}s)"
+        )
+
+    # Validate resolution (minimum 1080p as per requirements)
+    if height < 1080:
+        raise ValidationException(
+            f"Video resolution must be at least 1080p (current: {height}p)"
+        )
+
+    return {
+        'duration': duration,
+        'width': metadata['width'],
+        'height': height,
+        'codec': metadata['codec']
+    }
 
 
 def validate_video_sync(file_path: str) -> Dict:
     """
     Synchronous version of validate_video for Celery workers.
-    Validate video file using ffprobe.
+    Validate video file reading its container metadata (ffprobe as fallback).
     Returns metadata dict with duration, width, height.
     Raises ValidationException if video is invalid.
     """
     try:
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            file_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode != 0:
-            raise ValidationException("Unable to process video file")
-        
-        metadata = json.loads(result.stdout)
-        
-        # Find video stream
-        video_stream = next(
-            (s for s in metadata.get('streams', []) if s.get('codec_type') == 'video'),
-            None
-        )
-        
-        if not video_stream:
-            raise ValidationException("No video stream found in file")
-        
-        # Extract information
-        duration = float(metadata.get('format', {}).get('duration', 0))
-        width = int(video_stream.get('width', 0))
-        height = int(video_stream.get('height', 0))
-        
-        # Validate duration (20-60 seconds as per requirements)
-        if duration < 20 or duration > 60:
-            raise ValidationException(
-                f"Video duration must be between 20 and 60 seconds (current: {duration:.1f}s)"
-            )
-        
-        # Validate resolution (minimum 1080p as per requirements)
-        if height < 1080:
-            raise ValidationException(
-                f"Video resolution must be at least 1080 (current: {height}p)"
-            )
-        
-        return {
-            'duration': duration,
-            'width': width,
-            'height': height,
-            'codec': video_stream.get('codec_name', 'unknown')
-        }
-        
+        return check_video_rules(probe_video_metadata(file_path))
+
     except subprocess.TimeoutExpired:
         raise ValidationException("Video validation timeout")
     except json.JSONDecodeError:
@@ -76,4 +117,4 @@ async def validate_video(file_path: str) -> Dict:
     Async version - just wraps the sync version for compatibility.
     This is used by the FastAPI endpoints.
     """
-    return validate_video_sync(file_path)
\ No newline at end of file
+    return validate_video_sync(file_path)
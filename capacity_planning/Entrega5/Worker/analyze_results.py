@@ -93,6 +93,74 @@ def analyze_test_results(stats_file: str):
     return summary
 
 
+def analyze_stage_log(log_file: str):
+    """Desglose por etapa del log JSON-lines del worker (WORKER_METRICS_LOG)"""
+    
+    rows = []
+    with open(log_file, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            for stage, entry in job.get('stages', {}).items():
+                rows.append({
+                    'video_id': job.get('video_id'),
+                    'status': job.get('status'),
+                    'stage': stage,
+                    'seconds': entry['seconds'],
+                    'bytes': entry['bytes']
+                })
+    
+    if not rows:
+        print(f"No se encontraron etapas en {log_file}")
+        return None
+    
+    df = pd.DataFrame(rows)
+    jobs = df['video_id'].nunique()
+    total_seconds = df['seconds'].sum()
+    
+    print(f"\n{'='*100}")
+    print(f"⏱️  DESGLOSE POR ETAPA")
+    print(f"{'='*100}")
+    print(f"Archivo: {log_file}")
+    print(f"Jobs: {jobs}")
+    print(f"\n{'Etapa':<14} {'Jobs':>6} {'Media (s)':>11} {'p50 (s)':>9} {'p95 (s)':>9} {'% tiempo':>10} {'MB/s':>9}")
+    print(f"{'-'*100}")
+    
+    stats = df.groupby('stage').agg(
+        jobs=('seconds', 'count'),
+        mean=('seconds', 'mean'),
+        p50=('seconds', 'median'),
+        p95=('seconds', lambda values: values.quantile(0.95)),
+        total=('seconds', 'sum'),
+        total_bytes=('bytes', 'sum')
+    ).sort_values('total', ascending=False)
+    
+    for stage, row in stats.iterrows():
+        throughput = row['total_bytes'] / (1024 * 1024) / row['total'] if row['total'] > 0 and row['total_bytes'] else 0
+        print(f"{stage:<14} {int(row['jobs']):>6} {row['mean']:>11.2f} {row['p50']:>9.2f} {row['p95']:>9.2f} "
+              f"{100 * row['total'] / total_seconds:>9.1f}% {throughput:>9.1f}")
+    
+    # Gráfica: tiempo medio por etapa
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.barh(stats.index, stats['mean'], color='steelblue', label='Media')
+    ax.scatter(stats['p95'], stats.index, color='red', zorder=3, label='p95')
+    ax.set_xlabel('Segundos por job', fontsize=11)
+    ax.set_title(f'Tiempo por etapa del worker ({jobs} jobs)', fontsize=13, fontweight='bold')
+    ax.legend(loc='best')
+    ax.grid(True, alpha=0.3, axis='x')
+    ax.invert_yaxis()
+    
+    plt.tight_layout()
+    output_img = str(Path(log_file).with_suffix('.png'))
+    plt.savefig(output_img, dpi=300, bbox_inches='tight')
+    print(f"\n📈 Gráfica guardada: {output_img}")
+    
+    plt.show()
+    
+    return stats
+
+
 def generate_comparison_table(results_dir='results'):
     """Genera tabla comparativa de todos los tests"""
     
@@ -150,17 +218,21 @@ def main():
     parser = argparse.ArgumentParser(description='Analizar resultados de pruebas')
     parser.add_argument('stats_file', nargs='?', help='Archivo JSON con estadísticas')
     parser.add_argument('--compare', action='store_true', help='Comparar todos los tests')
+    parser.add_argument('--stages', metavar='LOG', help='Log JSON-lines del worker (WORKER_METRICS_LOG)')
     
     args = parser.parse_args()
     
     if args.compare:
         generate_comparison_table()
+    elif args.stages:
+        analyze_stage_log(args.stages)
     elif args.stats_file:
         analyze_test_results(args.stats_file)
     else:
         print("Uso:")
         print("  python analyze_results.py <archivo.json>")
         print("  python analyze_results.py --compare")
+        print("  python analyze_results.py --stages <worker_metrics.jsonl>")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,119 @@
+"""
+Benchmark: un send_message por upload vs. publicación en batch del outbox relay.
+
+Usa moto como stand-in local de SQS. Como moto responde en microsegundos, se
+agrega una latencia de red simulada (--rtt-ms) a cada llamada a SQS con un
+hook de botocore.
+
+Modos:
+- por-mensaje: el camino anterior, un send_message por video (lo que hacía el
+  handler de upload dentro del event loop)
+- relay-1: OutboxRelay con send_message_batch de 10 entradas, de a un bloque
+- relay-N: igual, con --send-concurrency bloques en paralelo
+
+Para los modos relay, el handler solo inserta la fila de outbox_messages en su
+transacción (sin red); se mide el tiempo hasta que todo está en la cola y la
+cantidad de llamadas a SQS.
+
+Uso (desde la raíz del repo):
+    python -m capacity_planning.benchmarks.bench_outbox_relay --messages 500 --rtt-ms 20 --send-concurrency 4
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+from moto import mock_aws  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.models import OutboxMessage, User, Video  # noqa: E402
+from app.queues import build_job  # noqa: E402
+from app.queues.sqs import SQSJobQueue  # noqa: E402
+from app.tasks.outbox_relay import OutboxRelay  # noqa: E402
+
+
+def add_simulated_rtt(queue: SQSJobQueue, rtt_ms: float, counter: list) -> None:
+    """Cada request a SQS duerme rtt_ms (latencia de red simulada)"""
+    def before_send(**kwargs):
+        counter.append(1)
+        time.sleep(rtt_ms / 1000)
+
+    queue.sqs.meta.events.register('before-send.sqs.SendMessage', before_send)
+    queue.sqs.meta.events.register('before-send.sqs.SendMessageBatch', before_send)
+
+
+def fill_outbox(session_factory, messages: int) -> None:
+    db = session_factory()
+    user = User(email="bench@test.com", password_hash="x", first_name="B", last_name="B", city="Bogotá", country="Colombia")
+    db.add(user)
+    db.flush()
+    for i in range(messages):
+        video = Video(id=uuid.uuid4(), user_id=user.id, title=f"Video {i}", original_filename="v.mp4",
+                      file_path=f"uploads/{i}.mp4", file_size_bytes=1, status="uploaded")
+        db.add(video)
+        db.flush()
+        db.add(OutboxMessage(video_id=video.id, file_path=video.file_path))
+    db.commit()
+    db.close()
+
+
+def run_per_message(queue: SQSJobQueue, messages: int) -> None:
+    for i in range(messages):
+        queue.send(build_job(f"video-{i}", f"uploads/video-{i}.mp4"))
+
+
+def run_relay(queue: SQSJobQueue, messages: int, batch_size: int) -> None:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    fill_outbox(session_factory, messages)
+
+    relay = OutboxRelay(session_factory, queue, batch_size=batch_size)
+    while relay.relay_once():
+        pass
+    assert relay.published_count == messages
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark send_message por upload vs outbox relay')
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--rtt-ms', type=float, default=20)
+    parser.add_argument('--batch-size', type=int, default=100, help='OUTBOX_BATCH_SIZE')
+    parser.add_argument('--send-concurrency', type=int, default=4, help='QUEUE_SEND_CONCURRENCY')
+    args = parser.parse_args()
+
+    print(f"\n{args.messages} mensajes, RTT simulado {args.rtt_ms} ms, batch del relay {args.batch_size}\n")
+    print(f"{'Modo':<14}{'total (s)':>12}{'msg/s':>12}{'llamadas':>10}")
+    print('-' * 48)
+
+    modes = [('por-mensaje', 1), ('relay-1', 1), (f'relay-{args.send_concurrency}', args.send_concurrency)]
+    for name, concurrency in modes:
+        with mock_aws():
+            queue = SQSJobQueue('bench-queue', send_concurrency=concurrency)
+            calls = []
+            add_simulated_rtt(queue, args.rtt_ms, calls)
+
+            start = time.perf_counter()
+            if name == 'por-mensaje':
+                run_per_message(queue, args.messages)
+            else:
+                run_relay(queue, args.messages, args.batch_size)
+            total = time.perf_counter() - start
+            assert queue.depth() == args.messages
+            print(f"{name:<14}{total:>12.2f}{args.messages / total:>12.0f}{len(calls):>10}")
+
+
+if __name__ == '__main__':
+    main()
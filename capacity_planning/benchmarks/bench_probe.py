@@ -0,0 +1,97 @@
+"""
+Benchmark: lectura de metadata con el parser MP4 en proceso vs. ffprobe.
+
+Genera los videos sintéticos de prueba (testsrc 1920x1080, igual que en las
+pruebas de capacidad del worker) y mide cuánto tarda cada camino en obtener
+duration/width/height/codec.
+
+Uso (desde la raíz del repo):
+    python -m capacity_planning.benchmarks.bench_probe --iterations 50
+"""
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from app.utils.mp4_parser import parse_mp4  # noqa: E402
+from app.utils.video_validator_sync import probe_with_ffprobe  # noqa: E402
+
+SYNTHETIC_VIDEOS = {
+    'corto': {'duration': 20, 'bitrate': '2M'},
+    'medio': {'duration': 40, 'bitrate': '4M'},
+    'largo': {'duration': 60, 'bitrate': '8M'},
+}
+
+
+def create_test_videos(output_dir: Path) -> list:
+    """Genera los videos sintéticos con ffmpeg (si no existen ya)"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+
+    for name, params in SYNTHETIC_VIDEOS.items():
+        output_file = output_dir / f'test_video_{name}.mp4'
+        if not output_file.exists():
+            print(f"   Generando {name}...")
+            subprocess.run([
+                'ffmpeg', '-f', 'lavfi', '-i',
+                f'testsrc=duration={params["duration"]}:size=1920x1080:rate=30',
+                '-f', 'lavfi', '-i', f'sine=frequency=1000:duration={params["duration"]}',
+                '-c:v', 'libx264', '-b:v', params['bitrate'],
+                '-c:a', 'aac', '-b:a', '128k',
+                '-pix_fmt', 'yuv420p',
+                '-y', str(output_file)
+            ], check=True, capture_output=True)
+        files.append(output_file)
+
+    return files
+
+
+def time_call(func, path: Path, iterations: int) -> list:
+    """Tiempos en milisegundos de cada llamada"""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(str(path))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parser MP4 vs ffprobe')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--videos-dir', default=str(Path(tempfile.gettempdir()) / 'bench_probe_videos'))
+    args = parser.parse_args()
+
+    if not shutil.which('ffmpeg') or not shutil.which('ffprobe'):
+        print("❌ ffmpeg/ffprobe no encontrados en el PATH")
+        sys.exit(1)
+
+    videos = create_test_videos(Path(args.videos_dir))
+    sample = ROOT / 'tests' / 'test_data' / 'flex.mp4'
+    if sample.exists():
+        videos.append(sample)
+
+    print(f"\n{'Video':<22}{'parser p50 (ms)':>18}{'ffprobe p50 (ms)':>19}{'speedup':>10}")
+    print('-' * 69)
+
+    for video in videos:
+        parsed = parse_mp4(video)
+        probed = probe_with_ffprobe(str(video))
+        if (parsed['width'], parsed['height'], parsed['codec']) != (probed['width'], probed['height'], probed['codec']) \
+                or abs(parsed['duration'] - probed['duration']) > 0.1:
+            print(f"⚠️  {video.name}: metadata distinta\n   parser:  {parsed}\n   ffprobe: {probed}")
+
+        parser_ms = statistics.median(time_call(parse_mp4, video, args.iterations))
+        ffprobe_ms = statistics.median(time_call(probe_with_ffprobe, video, args.iterations))
+        print(f"{video.name:<22}{parser_ms:>18.3f}{ffprobe_ms:>19.3f}{ffprobe_ms / parser_ms:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
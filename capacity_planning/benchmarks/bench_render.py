@@ -0,0 +1,93 @@
+"""
+Benchmark: render con MoviePy (composición en Python) vs. un solo proceso ffmpeg.
+
+Renderiza los mismos videos sintéticos que bench_probe con cada motor (las tres
+renditions 360p/480p/720p) y reporta el tiempo por video y los videos/min que
+daría un worker con un solo slot.
+
+Con --segment-cache cada motor se mide también renderizando solo el cuerpo y
+uniendo el intro/outro pre-codificados (la caché se llena antes de medir).
+
+Uso (desde la raíz del repo):
+    python -m capacity_planning.benchmarks.bench_render --engines moviepy ffmpeg --segment-cache
+"""
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from app.processing import RenderSpec  # noqa: E402
+from app.utils.mp4_parser import parse_mp4  # noqa: E402
+from capacity_planning.benchmarks.bench_probe import create_test_videos  # noqa: E402
+
+
+def get_renderer(engine: str, cache_dir: Path = None):
+    if engine.startswith('moviepy'):
+        from app.processing.moviepy_renderer import MoviePyRenderer
+        renderer = MoviePyRenderer()
+    else:
+        from app.processing.ffmpeg_renderer import FFmpegRenderer
+        renderer = FFmpegRenderer()
+    if cache_dir is None:
+        return renderer
+    from app.processing.segment_cache import SegmentCache, SegmentCacheRenderer
+    return SegmentCacheRenderer(renderer, SegmentCache(str(cache_dir)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark motores de render')
+    parser.add_argument('--engines', nargs='+', default=['moviepy', 'ffmpeg'], choices=['moviepy', 'ffmpeg'])
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--videos-dir', default=str(Path(tempfile.gettempdir()) / 'bench_probe_videos'))
+    parser.add_argument('--segment-cache', action='store_true', help='Medir también con intro/outro pre-codificados')
+    args = parser.parse_args()
+
+    if not shutil.which('ffmpeg'):
+        print("❌ ffmpeg no encontrado en el PATH")
+        sys.exit(1)
+
+    videos = create_test_videos(Path(args.videos_dir))
+    logo_path = ROOT / 'app' / 'res' / 'logo720.png'
+    output_dir = Path(tempfile.mkdtemp(prefix='bench_render_'))
+
+    variants = [(engine, None) for engine in args.engines]
+    if args.segment_cache:
+        variants += [(f'{engine}+cache', output_dir / 'segment-cache') for engine in args.engines]
+
+    print(f"\n{'Video':<22}{'Motor':<16}{'p50 (s)':>10}{'videos/min':>13}")
+    print('-' * 61)
+
+    try:
+        for video in videos:
+            metadata = parse_mp4(video)
+            for engine, cache_dir in variants:
+                renderer = get_renderer(engine, cache_dir)
+                spec = RenderSpec(
+                    input_path=str(video),
+                    outputs={height: str(output_dir / f'{video.stem}_{engine}_{height}p.mp4') for height in (360, 480, 720)},
+                    logo_path=str(logo_path),
+                    duration=int(metadata['duration']),
+                    source_width=metadata['width'],
+                    source_height=metadata['height']
+                )
+                if cache_dir is not None:
+                    renderer.render(spec)  # Llenar la caché: en producción se codifica una sola vez
+                timings = []
+                for _ in range(args.iterations):
+                    start = time.perf_counter()
+                    renderer.render(spec)
+                    timings.append(time.perf_counter() - start)
+                seconds = statistics.median(timings)
+                print(f"{video.name:<22}{engine:<16}{seconds:>10.2f}{60 / seconds:>13.1f}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: descarga de S3 con un solo GET (Body.read()) vs. GETs por rangos en paralelo.
+
+Sube un objeto aleatorio de --size-mb al bucket y lo descarga con cada modo,
+reportando MB/s y el pico de memoria Python (tracemalloc) de la descarga. Con
+--moto corre contra un S3 en memoria (solo sirve para validar el script: las
+cifras de MB/s se miden contra un bucket real, desde la instancia del worker).
+
+Uso (desde la raíz del repo):
+    python -m capacity_planning.benchmarks.bench_s3_download --bucket mi-bucket --size-mb 200 --concurrency 1 4 8 16
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import boto3  # noqa: E402
+
+from app.storage.s3_storage import S3RangedDownloader  # noqa: E402
+
+BENCH_KEY = 'benchmarks/bench_s3_download.bin'
+
+
+def download_single_get(s3_client, bucket: str, local_path: str) -> None:
+    """El camino anterior: todo el objeto en memoria y luego al disco"""
+    response = s3_client.get_object(Bucket=bucket, Key=BENCH_KEY)
+    with open(local_path, 'wb') as f:
+        f.write(response['Body'].read())
+
+
+def measure(download, iterations: int, size: int) -> tuple:
+    speeds, peaks = [], []
+    for _ in range(iterations):
+        tracemalloc.start()
+        start = time.perf_counter()
+        download()
+        elapsed = time.perf_counter() - start
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        speeds.append(size / (1024 * 1024) / elapsed)
+    return statistics.median(speeds), max(peaks) / (1024 * 1024)
+
+
+def run(s3_client, bucket: str, args) -> None:
+    size = args.size_mb * 1024 * 1024
+    print(f"Subiendo objeto de prueba ({args.size_mb} MB) a s3://{bucket}/{BENCH_KEY}...")
+    s3_client.put_object(Bucket=bucket, Key=BENCH_KEY, Body=os.urandom(size))
+    local_path = str(Path(tempfile.gettempdir()) / 'bench_s3_download.bin')
+
+    print(f"\n{'Modo':<22}{'MB/s (p50)':>12}{'Memoria pico (MB)':>20}")
+    print('-' * 54)
+    try:
+        speed, peak = measure(lambda: download_single_get(s3_client, bucket, local_path), args.iterations, size)
+        print(f"{'GET único':<22}{speed:>12.1f}{peak:>20.1f}")
+
+        for concurrency in args.concurrency:
+            downloader = S3RangedDownloader(s3_client, bucket, part_size=args.part_size_mb * 1024 * 1024,
+                                            max_concurrency=concurrency)
+            speed, peak = measure(lambda: downloader.download_path(BENCH_KEY, local_path), args.iterations, size)
+            print(f"{f'Rangos x{concurrency}':<22}{speed:>12.1f}{peak:>20.1f}")
+            downloader.executor.shutdown()
+    finally:
+        Path(local_path).unlink(missing_ok=True)
+        s3_client.delete_object(Bucket=bucket, Key=BENCH_KEY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark descargas de S3')
+    parser.add_argument('--bucket', help='Bucket real (requerido salvo con --moto)')
+    parser.add_argument('--moto', action='store_true', help='Usar un S3 en memoria (moto)')
+    parser.add_argument('--size-mb', type=int, default=100)
+    parser.add_argument('--part-size-mb', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--region', default=os.environ.get('AWS_REGION', 'us-east-1'))
+    args = parser.parse_args()
+
+    if args.moto:
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        from moto import mock_aws
+        with mock_aws():
+            s3_client = boto3.client('s3', region_name=args.region)
+            s3_client.create_bucket(Bucket='bench-bucket')
+            run(s3_client, 'bench-bucket', args)
+    elif args.bucket:
+        run(boto3.client('s3', region_name=args.region), args.bucket, args)
+    else:
+        parser.error('--bucket o --moto')
+
+
+if __name__ == '__main__':
+    main()
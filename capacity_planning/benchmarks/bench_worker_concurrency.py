@@ -0,0 +1,92 @@
+"""
+Benchmark: videos/min de un nodo worker según el número de slots del pool.
+
+Renderiza (las tres renditions 360p/480p/720p) el mismo lote de videos sintéticos
+de bench_probe con 1..N procesos en paralelo, igual que SQSProcessWorker.run_pool,
+y reporta el throughput por configuración. Sin cola ni S3: mide solo el techo de
+CPU/memoria del nodo. N por defecto es el que calcularía WORKER_CONCURRENCY=0.
+
+Uso (desde la raíz del repo):
+    python -m capacity_planning.benchmarks.bench_worker_concurrency --engine ffmpeg --jobs 12
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from app.processing import RenderSpec  # noqa: E402
+from app.utils.mp4_parser import parse_mp4  # noqa: E402
+from app.utils.system_resources import available_cpus, available_memory_mb, worker_slots  # noqa: E402
+from capacity_planning.benchmarks.bench_probe import create_test_videos  # noqa: E402
+from capacity_planning.benchmarks.bench_render import get_renderer  # noqa: E402
+
+
+def render_job(engine: str, video: str, output_dir: str, logo_path: str) -> float:
+    """Un job del pool: renderiza un video y devuelve los segundos que tardó"""
+    metadata = parse_mp4(Path(video))
+    output = Path(tempfile.mkdtemp(dir=output_dir))
+    spec = RenderSpec(
+        input_path=video,
+        outputs={height: str(output / f'{height}p.mp4') for height in (360, 480, 720)},
+        logo_path=logo_path,
+        duration=int(metadata['duration']),
+        source_width=metadata['width'],
+        source_height=metadata['height']
+    )
+    start = time.perf_counter()
+    get_renderer(engine).render(spec)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(output, ignore_errors=True)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de concurrencia del worker')
+    parser.add_argument('--engine', default='ffmpeg', choices=['moviepy', 'ffmpeg'])
+    parser.add_argument('--jobs', type=int, default=12, help='Videos renderizados por configuración')
+    parser.add_argument('--max-slots', type=int, default=None)
+    parser.add_argument('--cpus-per-job', type=float, default=1.0)
+    parser.add_argument('--memory-per-job-mb', type=int, default=1500)
+    parser.add_argument('--videos-dir', default=str(Path(tempfile.gettempdir()) / 'bench_probe_videos'))
+    args = parser.parse_args()
+
+    if not shutil.which('ffmpeg'):
+        print("❌ ffmpeg no encontrado en el PATH")
+        sys.exit(1)
+
+    max_slots = args.max_slots or worker_slots(args.cpus_per_job, args.memory_per_job_mb)
+    print(f"CPUs: {available_cpus():.1f}  Memoria disponible: {available_memory_mb()} MB  Slots: 1..{max_slots}")
+
+    videos = create_test_videos(Path(args.videos_dir))
+    batch = [str(videos[i % len(videos)]) for i in range(args.jobs)]
+    logo_path = str(ROOT / 'app' / 'res' / 'logo720.png')
+    output_dir = tempfile.mkdtemp(prefix='bench_worker_')
+
+    print(f"\n{'Slots':<8}{'Total (s)':>12}{'s/video':>10}{'videos/min':>13}{'por slot':>11}")
+    print('-' * 54)
+
+    try:
+        for slots in range(1, max_slots + 1):
+            with ProcessPoolExecutor(max_workers=slots, mp_context=get_context('spawn')) as executor:
+                # Calentar los procesos (imports) fuera de la medición
+                list(executor.map(time.sleep, [0] * slots))
+                start = time.perf_counter()
+                timings = list(executor.map(render_job, [args.engine] * len(batch), batch,
+                                            [output_dir] * len(batch), [logo_path] * len(batch)))
+                total = time.perf_counter() - start
+            per_minute = len(batch) * 60 / total
+            print(f"{slots:<8}{total:>12.1f}{sum(timings) / len(timings):>10.2f}"
+                  f"{per_minute:>13.1f}{per_minute / slots:>11.1f}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1 import videos
+from app.core.admission import AdmissionController
+from app.core.exceptions import OverloadedException
+from app.db.base import Base
+from app.models import OutboxMessage
+
+
+def make_controller(backlog_source, max_backlog=10, max_in_flight=2, sample_interval=60):
+    return AdmissionController(
+        backlog_source=backlog_source,
+        max_backlog=max_backlog,
+        max_in_flight=max_in_flight,
+        sample_interval=sample_interval,
+        retry_after=15
+    )
+
+
+@pytest.mark.asyncio
+class TestAdmissionController:
+
+    async def test_admits_below_thresholds(self):
+        """Test that uploads are admitted and counted while in flight"""
+        controller = make_controller(lambda: 3)
+
+        async with controller.admit():
+            assert controller.in_flight == 1
+
+        assert controller.in_flight == 0
+
+    async def test_rejects_when_backlog_saturated(self):
+        """Test that queue backlog plus uploads in flight above the threshold gives a 503"""
+        controller = make_controller(lambda: 9)
+
+        async with controller.admit():
+            with pytest.raises(OverloadedException) as exc_info:
+                await controller.check()
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.retry_after == 15
+
+    async def test_rejects_when_too_many_in_flight(self):
+        """Test that too many uploads in this process gives a 429"""
+        controller = make_controller(lambda: 0)
+
+        async with controller.admit(), controller.admit():
+            with pytest.raises(OverloadedException) as exc_info:
+                await controller.check()
+
+        assert exc_info.value.status_code == 429
+
+    async def test_backlog_is_sampled_not_queried_per_request(self):
+        """Test that the queue is only queried again once the sample is stale"""
+        calls = []
+
+        def backlog_source():
+            calls.append(1)
+            return 0
+
+        controller = make_controller(backlog_source, sample_interval=60)
+        for _ in range(5):
+            await controller.check()
+        assert len(calls) == 1
+
+        controller.sample_interval = 0
+        await controller.check()
+        await asyncio.sleep(0.05)
+        assert len(calls) == 2
+
+    async def test_fails_open_when_queue_unavailable(self):
+        """Test that uploads are admitted if the backlog cannot be sampled"""
+        def backlog_source():
+            raise ConnectionError("queue down")
+
+        controller = make_controller(backlog_source)
+
+        async with controller.admit():
+            pass
+
+
+class TestUploadBacklog:
+
+    def test_backlog_counts_jobs_not_yet_published(self, monkeypatch):
+        """Test that jobs waiting in the outbox (relay lagging or down) count towards admission"""
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as db:
+            db.add_all([OutboxMessage(video_id=uuid.uuid4(), file_path=f"uploads/{i}.mp4") for i in range(2)])
+            db.commit()
+        monkeypatch.setattr(videos, "SyncSessionLocal", session_factory)
+        monkeypatch.setattr(videos, "get_queue", lambda: type("Queue", (), {"depth": lambda self: 3})())
+
+        assert videos._queue_backlog() == 5
@@ -0,0 +1,147 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.db.base import Base
+from app.models import JobLedgerEntry, OutboxMessage, ProcessedArtifact, User, Video
+from app.tasks.dedup import claim_artifact, publish_artifact, release_artifact, RENDER, REUSED, WAITING, WAITING_STATUS
+
+SHA = "a" * 64
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def make_video(db):
+    user = User(email="dedup@test.com", password_hash="x", first_name="D", last_name="D", city="Bogotá", country="Colombia")
+    db.add(user)
+    db.commit()
+
+    def make_video(status: str = "uploaded") -> Video:
+        video_id = uuid.uuid4()
+        video = Video(id=video_id, user_id=user.id, title="Video", original_filename="v.mp4",
+                      file_path=f"uploads/{video_id}.mp4", file_size_bytes=1, status=status, content_sha256=SHA)
+        db.add(video)
+        db.commit()
+        return video
+
+    return make_video
+
+
+def processed(video: Video) -> Video:
+    video.file_path = f"processed/{video.id}/720p.mp4"
+    video.renditions = {"720p": video.file_path}
+    video.duration_seconds = 30
+    video.status = "processed"
+    return video
+
+
+class TestClaimArtifact:
+
+    def test_first_video_renders_and_duplicates_wait(self, db, make_video):
+        owner, duplicate = make_video(), make_video()
+
+        assert claim_artifact(db, owner) == RENDER
+        assert claim_artifact(db, duplicate) == WAITING
+
+        db.refresh(duplicate)
+        assert duplicate.status == WAITING_STATUS
+        assert db.get(ProcessedArtifact, SHA).source_video_id == owner.id
+
+    def test_redelivery_of_the_owner_renders_again(self, db, make_video):
+        owner = make_video()
+        claim_artifact(db, owner)
+
+        assert claim_artifact(db, owner) == RENDER
+
+    def test_stale_claim_is_taken_over(self, db, make_video):
+        """Test that a duplicate takes the render when the owner's claim is older than DEDUP_CLAIM_TIMEOUT_SECONDS"""
+        owner, duplicate = make_video(), make_video()
+        claim_artifact(db, owner)
+        artifact = db.get(ProcessedArtifact, SHA)
+        artifact.updated_at = datetime.utcnow() - timedelta(seconds=settings.DEDUP_CLAIM_TIMEOUT_SECONDS + 1)
+        db.commit()
+
+        assert claim_artifact(db, duplicate) == RENDER
+        assert db.get(ProcessedArtifact, SHA).source_video_id == duplicate.id
+
+    def test_ready_artifact_is_reused(self, db, make_video):
+        owner = make_video()
+        claim_artifact(db, owner)
+        publish_artifact(db, SHA, processed(owner))
+        duplicate = make_video()
+
+        assert claim_artifact(db, duplicate) == REUSED
+
+        db.refresh(duplicate)
+        assert duplicate.status == "processed"
+        assert duplicate.file_path == owner.file_path and duplicate.renditions == owner.renditions
+
+
+class TestPublishArtifact:
+
+    def test_waiting_duplicates_are_completed(self, db, make_video):
+        owner, duplicate = make_video(), make_video()
+        upload_path = duplicate.file_path
+        claim_artifact(db, owner)
+        claim_artifact(db, duplicate)
+
+        assert publish_artifact(db, SHA, processed(owner)) == [upload_path]
+
+        db.refresh(duplicate)
+        assert (duplicate.status, duplicate.file_path, duplicate.duration_seconds) == ("processed", owner.file_path, 30)
+        assert db.get(ProcessedArtifact, SHA).status == "ready"
+
+
+class TestReleaseArtifact:
+
+    def test_waiting_duplicates_are_requeued(self, db, make_video):
+        """Test that duplicates of a failed render get a new job and lose their completed ledger entry"""
+        owner, duplicate = make_video(), make_video()
+        claim_artifact(db, owner)
+        claim_artifact(db, duplicate)
+        db.add(JobLedgerEntry(video_id=duplicate.id, content_version=SHA, status="completed", worker_id="w:1:a",
+                              lease_expires_at=datetime.utcnow()))
+        db.commit()
+
+        release_artifact(db, SHA, owner)
+
+        db.refresh(duplicate)
+        assert duplicate.status == "uploaded"
+        assert db.get(ProcessedArtifact, SHA) is None
+        assert db.get(JobLedgerEntry, (duplicate.id, SHA)) is None
+        outbox = db.query(OutboxMessage).all()
+        assert [(message.video_id, message.file_path) for message in outbox] == [(duplicate.id, duplicate.file_path)]
+        # El job re-encolado vuelve a reclamar el render
+        assert claim_artifact(db, duplicate) == RENDER
+
+    def test_invalid_content_fails_the_duplicates(self, db, make_video):
+        owner, duplicate = make_video(), make_video()
+        claim_artifact(db, owner)
+        claim_artifact(db, duplicate)
+
+        release_artifact(db, SHA, owner, requeue_waiting=False)
+
+        db.refresh(duplicate)
+        assert duplicate.status == "failed"
+        assert db.query(OutboxMessage).count() == 0
+
+    def test_only_the_owner_releases_the_claim(self, db, make_video):
+        owner, other = make_video(), make_video()
+        claim_artifact(db, owner)
+
+        release_artifact(db, SHA, other)
+
+        assert db.get(ProcessedArtifact, SHA).source_video_id == owner.id
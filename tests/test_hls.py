@@ -0,0 +1,85 @@
+import subprocess
+import pytest
+
+from app.processing.hls import build_hls_command, package_hls, rewrite_playlist
+from tests.test_renderers import find_ffmpeg
+
+MASTER = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-STREAM-INF:BANDWIDTH=585475,RESOLUTION=640x360,CODECS="avc1.42c01e"
+360p/index.m3u8
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-TARGETDURATION:4
+#EXT-X-MAP:URI="init_0.mp4"
+#EXTINF:4.000000,
+seg_000.m4s
+#EXT-X-ENDLIST
+"""
+
+
+class TestHLSCommand:
+
+    def test_single_process_with_stream_copy(self):
+        """Test that every rendition is segmented by one ffmpeg process without re-encoding"""
+        command = build_hls_command({"360p": "a/360p.mp4", "720p": "a/720p.mp4"}, "a/hls", 4)
+
+        assert command.count("-i") == 2
+        assert command[command.index("-c") + 1] == "copy"
+        assert command[command.index("-var_stream_map") + 1] == "v:0,name:360p v:1,name:720p"
+        assert command[command.index("-hls_segment_filename") + 1] == "a/hls/%v/seg_%03d.m4s"
+
+    def test_mpegts_segments(self):
+        """Test the TS variant for older players"""
+        command = build_hls_command({"360p": "a/360p.mp4"}, "a/hls", 4, "mpegts")
+
+        assert command[command.index("-hls_segment_filename") + 1].endswith(".ts")
+        assert "-hls_fmp4_init_filename" not in command
+
+    def test_unknown_segment_type(self):
+        with pytest.raises(ValueError):
+            build_hls_command({"360p": "a/360p.mp4"}, "a/hls", 4, "webm")
+
+
+class TestRewritePlaylist:
+
+    def test_master_playlist_keeps_relative_references(self):
+        """Test that variant playlists stay relative (served by the same endpoint)"""
+        assert rewrite_playlist(MASTER, "p/hls/master.m3u8", lambda path: f"signed:{path}") == MASTER
+
+    def test_media_playlist_resolves_segments_and_init(self):
+        """Test that init and segment URIs are resolved from the playlist location"""
+        rewritten = rewrite_playlist(MEDIA, "p/hls/360p/index.m3u8", lambda path: f"signed:{path}")
+
+        assert '#EXT-X-MAP:URI="signed:p/hls/360p/init_0.mp4"' in rewritten
+        assert "\nsigned:p/hls/360p/seg_000.m4s\n" in rewritten
+        assert "#EXTINF:4.000000," in rewritten
+
+
+class TestPackageHLS:
+
+    def test_package_renditions(self, tmp_path):
+        """Test segmenting real renditions into a master playlist with one variant each"""
+        ffmpeg = find_ffmpeg()
+        if not ffmpeg:
+            pytest.skip("ffmpeg not available")
+
+        renditions = {}
+        for height in (360, 720):
+            path = tmp_path / f"{height}p.mp4"
+            subprocess.run([
+                ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30:duration=9",
+                "-vf", f"scale=-2:{height}", "-c:v", "libx264", "-preset", "ultrafast",
+                "-force_key_frames", "expr:gte(t,n_forced*2)", "-pix_fmt", "yuv420p", str(path)
+            ], check=True)
+            renditions[f"{height}p"] = str(path)
+
+        master = package_hls(renditions, str(tmp_path / "hls"), 4, ffmpeg_binary=ffmpeg)
+
+        master_text = (tmp_path / "hls" / "master.m3u8").read_text()
+        assert master == str(tmp_path / "hls" / "master.m3u8")
+        assert "360p/index.m3u8" in master_text and "720p/index.m3u8" in master_text
+        media = (tmp_path / "hls" / "360p" / "index.m3u8").read_text()
+        assert media.count("#EXTINF:4.0") == 2
+        assert len(list((tmp_path / "hls" / "720p").glob("seg_*.m4s"))) == 3
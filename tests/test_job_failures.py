@@ -0,0 +1,110 @@
+import json
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.processing import RenderError
+from app.queues import QueueMessage, build_job
+from app.queues.local import LocalJobQueue
+from app.tasks.dead_letters import dead_letter_body, replay
+from app.tasks.failures import classify_failure, retry_delay, should_retry, JobTimeout, TransientJobError
+from app.tasks.video_tasks import VideoJob, fail_job
+
+
+def json_job(video_id: str) -> str:
+    return json.dumps(build_job(video_id, f"uploads/{video_id}.mp4"))
+
+
+def client_error(code: str, status: int) -> ClientError:
+    return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "GetObject")
+
+
+class TestClassifyFailure:
+
+    @pytest.mark.parametrize("error,expected", [
+        (TransientJobError("Failed to download video from S3"), "transient_io"),
+        (client_error("SlowDown", 503), "transient_io"),
+        (client_error("InternalError", 500), "transient_io"),
+        (EndpointConnectionError(endpoint_url="https://s3.amazonaws.com"), "transient_io"),
+        (OperationalError("SELECT 1", {}, Exception("server closed the connection")), "transient_io"),
+        (ConnectionResetError(), "transient_io"),
+        (client_error("NoSuchKey", 404), "render_crash"),
+        (ValidationException("No video stream found in file"), "validation"),
+        (RenderError("ffmpeg render failed"), "render_crash"),
+        (JobTimeout("Job exceeded 900s"), "timeout"),
+        (KeyError("width"), "render_crash"),
+    ])
+    def test_classes(self, error, expected):
+        assert classify_failure(error) == expected
+
+    def test_only_transient_failures_are_retried(self):
+        assert should_retry("transient_io", 1)
+        assert not should_retry("transient_io", settings.WORKER_MAX_ATTEMPTS)
+        assert not should_retry("render_crash", 1)
+
+    def test_backoff_grows_and_is_capped(self, monkeypatch):
+        """Test that the delay doubles per attempt (with jitter between half and full) up to the maximum"""
+        monkeypatch.setattr(settings, "WORKER_RETRY_BASE_SECONDS", 30)
+        monkeypatch.setattr(settings, "WORKER_RETRY_MAX_SECONDS", 900)
+
+        for attempt, full in ((1, 30), (2, 60), (3, 120), (10, 900)):
+            delays = [retry_delay(attempt) for _ in range(50)]
+            assert all(full // 2 <= delay <= full for delay in delays)
+
+
+class TestFailJob:
+
+    def test_transient_failure_is_retried_with_backoff(self):
+        result = fail_job(VideoJob("v1", "uploads/v1.mp4", attempt=1), TransientJobError("Failed to upload to S3"))
+
+        assert result["status"] == "retry"
+        assert result["failure_class"] == "transient_io"
+        assert result["retry_after"] >= 1
+
+    def test_last_attempt_fails_permanently(self):
+        job = VideoJob("v1", "uploads/v1.mp4", attempt=settings.WORKER_MAX_ATTEMPTS)
+
+        result = fail_job(job, TransientJobError("Failed to upload to S3"))
+
+        assert result["status"] == "failed"
+        assert "retry_after" not in result
+
+    def test_render_failure_class_survives_the_pool(self):
+        """Test that a render error recorded in the pool process keeps its class in the main process"""
+        job = VideoJob("v1", "uploads/v1.mp4", error="ffmpeg timed out", failure_class="timeout")
+
+        assert fail_job(job, job.error)["failure_class"] == "timeout"
+
+
+class TestDeadLetters:
+
+    @pytest.fixture
+    def queues(self, tmp_path):
+        return (LocalJobQueue(str(tmp_path / "queue.db"), "jobs"),
+                LocalJobQueue(str(tmp_path / "queue.db"), "jobs-dlq", visibility_timeout=60))
+
+    def test_body_keeps_the_original_job(self):
+        message = QueueMessage("1", "r", '{"videoId": "v1", "attempt": 5}', receive_count=5)
+
+        body = dead_letter_body(message, "transient_io", "Failed to upload to S3")
+
+        assert body["job"] == {"videoId": "v1"}
+        assert (body["failureClass"], body["attempts"]) == ("transient_io", 5)
+
+    def test_replay_by_failure_class(self, queues):
+        """Test that a bulk replay moves only the selected class back to the work queue"""
+        queue, dead_letters = queues
+        for index, failure_class in enumerate(["render_crash", "timeout", "render_crash"]):
+            message = QueueMessage(str(index), "r", json_job(f"v{index}"))
+            dead_letters.send(dead_letter_body(message, failure_class, "boom"))
+        dead_letters.send(dead_letter_body(QueueMessage("9", "r", "not json"), "malformed", "bad"))
+
+        assert replay(dead_letters, queue, failure_class="render_crash") == 2
+
+        replayed = queue.receive_batch(max_messages=10, wait_seconds=0)
+        assert sorted(message.json()["videoId"] for message in replayed) == ["v0", "v2"]
+        assert dead_letters._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE queue = 'jobs-dlq'"
+        ).fetchone()[0] == 2
@@ -0,0 +1,111 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models import JobLedgerEntry, User, Video
+from app.tasks.job_ledger import claim_job, claim_token, complete_job, release_job, renew_claim, \
+    CLAIMED, COMPLETED, IN_PROGRESS
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def video_id(db):
+    user = User(email="ledger@test.com", password_hash="x", first_name="L", last_name="L", city="Bogotá", country="Colombia")
+    db.add(user)
+    db.flush()
+    video = Video(id=uuid.uuid4(), user_id=user.id, title="Video", original_filename="v.mp4",
+                  file_path="uploads/v.mp4", file_size_bytes=1, status="uploaded")
+    db.add(video)
+    db.commit()
+    return video.id
+
+
+class TestJobLedger:
+
+    def test_first_claim_wins(self, db, video_id):
+        """Test that a second delivery while the job runs is skipped until the claim expires"""
+        assert claim_job(db, video_id, "sha-1", "worker-a", lease=600) == (CLAIMED, 0)
+
+        outcome, retry_after = claim_job(db, video_id, "sha-1", "worker-b", lease=600)
+        assert outcome == IN_PROGRESS
+        assert 590 < retry_after <= 600
+
+    def test_duplicate_delivery_in_the_same_process(self, db, video_id):
+        """Test that two deliveries prepared by threads of one worker process do not both claim the job"""
+        first, second = claim_token(), claim_token()
+        assert first.rsplit(":", 1)[0] == second.rsplit(":", 1)[0]
+
+        assert claim_job(db, video_id, "sha-1", first, lease=600) == (CLAIMED, 0)
+        assert claim_job(db, video_id, "sha-1", second, lease=600)[0] == IN_PROGRESS
+        assert db.get(JobLedgerEntry, (video_id, "sha-1")).attempts == 1
+
+    def test_completed_job_is_skipped(self, db, video_id):
+        claim_job(db, video_id, "sha-1", "worker-a")
+        complete_job(db, video_id, "sha-1")
+
+        assert claim_job(db, video_id, "sha-1", "worker-b") == (COMPLETED, 0)
+        assert claim_job(db, video_id, "sha-1", "worker-a") == (COMPLETED, 0)
+
+    def test_new_content_version_is_a_new_job(self, db, video_id):
+        claim_job(db, video_id, "sha-1", "worker-a")
+        complete_job(db, video_id, "sha-1")
+
+        assert claim_job(db, video_id, "sha-2", "worker-b") == (CLAIMED, 0)
+
+    def test_expired_claim_is_taken_over(self, db, video_id):
+        """Test that the claim of a worker that died is taken by the next delivery"""
+        claim_job(db, video_id, "sha-1", "worker-a", lease=600)
+        entry = db.get(JobLedgerEntry, (video_id, "sha-1"))
+        entry.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+
+        assert claim_job(db, video_id, "sha-1", "worker-b") == (CLAIMED, 0)
+        db.refresh(entry)
+        assert (entry.worker_id, entry.attempts) == ("worker-b", 2)
+
+    def test_release_lets_a_retry_run(self, db, video_id):
+        """Test that a failed job releases its claim, and only its owner can release it"""
+        claim_job(db, video_id, "sha-1", "worker-a")
+
+        release_job(db, video_id, "sha-1", "worker-b")
+        assert claim_job(db, video_id, "sha-1", "worker-c")[0] == IN_PROGRESS
+
+        release_job(db, video_id, "sha-1", "worker-a")
+        assert claim_job(db, video_id, "sha-1", "worker-c") == (CLAIMED, 0)
+
+    def test_renew_extends_only_our_claim(self, db, video_id):
+        """Test that a job in flight keeps its claim, and a claim taken over is not renewed by the old owner"""
+        claim_job(db, video_id, "sha-1", "worker-a", lease=1)
+
+        assert renew_claim(db, video_id, "sha-1", "worker-a", lease=600)
+        assert claim_job(db, video_id, "sha-1", "worker-b")[0] == IN_PROGRESS
+        assert not renew_claim(db, video_id, "sha-1", "worker-b", lease=600)
+
+        complete_job(db, video_id, "sha-1")
+        assert not renew_claim(db, video_id, "sha-1", "worker-a", lease=600)
+
+    def test_claim_gives_up_if_the_entry_keeps_vanishing(self, db, video_id, monkeypatch):
+        """Test that the insert/select race is retried a bounded number of times"""
+        from app.tasks import job_ledger
+        from app.tasks.failures import TransientJobError
+        claim_job(db, video_id, "sha-1", "worker-a")
+        lookups = []
+        monkeypatch.setattr(job_ledger, "_lock_entry", lambda *args: lookups.append(1))
+
+        with pytest.raises(TransientJobError):
+            claim_job(db, video_id, "sha-1", "worker-b")
+
+        assert len(lookups) == job_ledger.CLAIM_ATTEMPTS
@@ -0,0 +1,200 @@
+import hashlib
+import mmap
+import struct
+import pytest
+from pathlib import Path
+
+from app.core.exceptions import ValidationException
+from app.utils.mp4_parser import parse_mp4, RangeReader, MP4ParseError, MP4StreamParser
+from app.utils.upload_stream import UploadStream
+from app.utils import video_validator_sync
+
+
+def box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def build_mp4(duration_s: float = 30, width: int = 1920, height: int = 1080,
+              fourcc: bytes = b"avc1", mvhd_version: int = 0, moov_last: bool = False) -> bytes:
+    """Build a minimal ISO-BMFF file with one video track"""
+    timescale = 1000
+    if mvhd_version == 1:
+        mvhd = struct.pack(">B3xQQIQ", 1, 0, 0, timescale, int(duration_s * timescale)) + b"\x00" * 80
+    else:
+        mvhd = struct.pack(">B3xIIII", 0, 0, 0, timescale, int(duration_s * timescale)) + b"\x00" * 80
+    tkhd = b"\x00" * 76 + struct.pack(">II", width << 16, height << 16)
+    hdlr = b"\x00" * 8 + b"vide" + b"\x00" * 13
+    mdhd = struct.pack(">B3xIIII", 0, 0, 0, timescale, int(duration_s * timescale)) + b"\x00" * 4
+    sample_entry = box(fourcc, b"\x00" * 24 + struct.pack(">HH", width, height) + b"\x00" * 50)
+    stsd = box(b"stsd", struct.pack(">II", 0, 1) + sample_entry)
+    minf = box(b"minf", box(b"stbl", stsd))
+    trak = box(b"trak", box(b"tkhd", tkhd) + box(b"mdia", box(b"mdhd", mdhd) + box(b"hdlr", hdlr) + minf))
+    moov = box(b"moov", box(b"mvhd", mvhd) + trak)
+    ftyp = box(b"ftyp", b"isom\x00\x00\x02\x00isomavc1")
+    mdat = box(b"mdat", b"\x00" * 4096)
+    return ftyp + (mdat + moov if moov_last else moov + mdat)
+
+
+class TestMP4Parser:
+
+    def test_parse_real_video(self):
+        """Test parsing the sample video from a file path"""
+        video_path = Path("tests/test_data/flex.mp4")
+
+        if not video_path.exists():
+            pytest.skip("Test video file not found")
+
+        metadata = parse_mp4(video_path)
+
+        assert metadata["has_video"]
+        assert metadata["codec"] == "h264"
+        assert (metadata["width"], metadata["height"]) == (1280, 720)
+        assert 61 < metadata["duration"] < 62
+
+    def test_parse_memory_mapped_file(self, tmp_path):
+        """Test parsing through mmap gives the same result as the path"""
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(build_mp4(duration_s=42.5))
+
+        with open(video_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            assert parse_mp4(mapped) == parse_mp4(str(video_file))
+
+    def test_parse_with_range_reader_and_moov_at_end(self):
+        """Test that only the box headers and the moov are read through a range reader"""
+        data = build_mp4(duration_s=25, mvhd_version=1, moov_last=True)
+        reads = []
+
+        def read_range(offset, length):
+            reads.append(length)
+            return data[offset:offset + length]
+
+        metadata = parse_mp4(RangeReader(read_range, len(data)))
+
+        assert metadata == {"duration": 25.0, "width": 1920, "height": 1080, "codec": "h264", "has_video": True}
+        assert sum(reads) < len(data)
+
+    def test_hevc_codec_name(self):
+        """Test that sample entry fourccs map to ffprobe codec names"""
+        assert parse_mp4(build_mp4(fourcc=b"hvc1"))["codec"] == "hevc"
+
+    def test_not_an_mp4(self):
+        """Test that other containers raise MP4ParseError"""
+        with pytest.raises(MP4ParseError):
+            parse_mp4(b"\x1a\x45\xdf\xa3" + b"\x00" * 64)
+
+    def test_validation_falls_back_to_ffprobe(self, tmp_path, monkeypatch):
+        """Test that ffprobe is only used when the parser cannot read the container"""
+        video_file = tmp_path / "video.mkv"
+        video_file.write_bytes(b"\x1a\x45\xdf\xa3" + b"\x00" * 64)
+        monkeypatch.setattr(
+            video_validator_sync, "probe_with_ffprobe",
+            lambda path: {"duration": 30.0, "width": 1920, "height": 1080, "codec": "vp9", "has_video": True}
+        )
+
+        metadata = video_validator_sync.validate_video_sync(str(video_file))
+
+        assert metadata["codec"] == "vp9"
+
+    def test_validation_rejects_low_resolution(self, tmp_path):
+        """Test that the upload rules are applied on parsed metadata"""
+        video_file = tmp_path / "video.mp4"
+        video_file.write_bytes(build_mp4(height=720, width=1280))
+
+        with pytest.raises(ValidationException) as exc_info:
+            video_validator_sync.validate_video_sync(str(video_file))
+
+        assert "1080p" in str(exc_info.value)
+
+
+class TestMP4StreamParser:
+
+    @pytest.mark.parametrize("moov_last", [False, True])
+    def test_chunked_parse_matches_parse_mp4(self, moov_last):
+        """Test that feeding the file in small chunks gives the same metadata"""
+        data = build_mp4(duration_s=33, mvhd_version=1, moov_last=moov_last)
+        parser = MP4StreamParser()
+
+        for i in range(0, len(data), 7):
+            parser.feed(data[i:i + 7])
+
+        assert parser.finish() == parse_mp4(data)
+
+    def test_metadata_ready_before_mdat(self):
+        """Test that with the moov first, metadata is available before the media data arrives"""
+        data = build_mp4()
+        parser = MP4StreamParser()
+
+        assert parser.feed(data[:len(data) - 4096]) is not None
+
+    def test_not_an_mp4(self):
+        """Test that other containers raise MP4ParseError on the first chunk"""
+        with pytest.raises(MP4ParseError):
+            MP4StreamParser().feed(b"\x1a\x45\xdf\xa3" + b"\x00" * 64)
+
+
+async def _chunks_of(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.mark.asyncio
+class TestUploadStreamValidation:
+
+    async def test_rejects_short_video_while_streaming(self):
+        """Test that the upload fails before the last chunk is yielded"""
+        data = build_mp4(duration_s=15)
+        upload_stream = UploadStream(_chunks_of(data, 64), max_size=len(data), chunk_size=64, validate=True)
+        received = 0
+
+        with pytest.raises(ValidationException) as exc_info:
+            async for chunk in upload_stream.chunks():
+                received += len(chunk)
+
+        assert "duration" in str(exc_info.value).lower()
+        assert received < len(data)
+
+    async def test_accepts_valid_video(self):
+        """Test that a valid video streams through and exposes its metadata"""
+        data = build_mp4(duration_s=30)
+        upload_stream = UploadStream(_chunks_of(data, 64), max_size=len(data), chunk_size=64, validate=True)
+
+        received = b"".join([chunk async for chunk in upload_stream.chunks()])
+
+        assert received == data
+        assert upload_stream.metadata["duration"] == 30
+        assert upload_stream.sha256 == hashlib.sha256(data).hexdigest()
+
+    async def test_unknown_container_is_left_to_the_worker(self):
+        """Test that containers the parser can't read are not rejected in the API"""
+        data = b"\x1a\x45\xdf\xa3" + b"\x00" * 256
+        upload_stream = UploadStream(_chunks_of(data, 64), max_size=len(data), chunk_size=64, validate=True)
+
+        received = b"".join([chunk async for chunk in upload_stream.chunks()])
+
+        assert received == data
+        assert upload_stream.metadata is None
+
+    @pytest.mark.parametrize("cut", ["no_moov", "truncated_moov"])
+    async def test_corrupt_mp4_is_rejected_at_end_of_stream(self, cut):
+        """Test that an ISO-BMFF upload without a complete moov box gets a 400 instead of being queued"""
+        data = build_mp4(duration_s=30, moov_last=True)
+        moov_start = data.index(b"moov") - 4
+        data = data[:moov_start] if cut == "no_moov" else data[:moov_start + 40]
+        upload_stream = UploadStream(_chunks_of(data, 64), max_size=len(data), chunk_size=64, validate=True)
+
+        with pytest.raises(ValidationException) as exc_info:
+            async for _ in upload_stream.chunks():
+                pass
+
+        assert "corrupted mp4" in str(exc_info.value).lower()
+
+    async def test_fragmented_mp4_is_left_to_the_worker(self):
+        """Test that a valid ISO-BMFF feature the parser does not handle is not rejected"""
+        moov = box(b"moov", box(b"mvhd", b"\x00" * 100) + box(b"mvex", box(b"trex", b"\x00" * 24)))
+        data = box(b"ftyp", b"isom\x00\x00\x02\x00isomavc1") + moov + box(b"moof", b"\x00" * 64)
+        upload_stream = UploadStream(_chunks_of(data, 64), max_size=len(data), chunk_size=64, validate=True)
+
+        received = b"".join([chunk async for chunk in upload_stream.chunks()])
+
+        assert received == data
+        assert upload_stream.metadata is None
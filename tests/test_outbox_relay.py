@@ -0,0 +1,88 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models import User, Video, OutboxMessage
+from app.queues.local import LocalJobQueue
+from app.tasks.outbox_relay import OutboxRelay
+
+
+@pytest.fixture
+def session_factory():
+    """In-memory database (SKIP LOCKED is a no-op outside Postgres)"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return LocalJobQueue(str(tmp_path / "queue.db"), "test-outbox-queue")
+
+
+def add_outbox_messages(session_factory, count: int) -> list:
+    db = session_factory()
+    user = User(email="relay@test.com", password_hash="x", first_name="R", last_name="R", city="Bogotá", country="Colombia")
+    db.add(user)
+    db.flush()
+    video_ids = []
+    for i in range(count):
+        video = Video(
+            id=uuid.uuid4(), user_id=user.id, title=f"Video {i}", original_filename="v.mp4",
+            file_path=f"uploads/{i}.mp4", file_size_bytes=1, status="uploaded"
+        )
+        db.add(video)
+        db.flush()
+        db.add(OutboxMessage(video_id=video.id, file_path=video.file_path))
+        video_ids.append(str(video.id))
+    db.commit()
+    db.close()
+    return video_ids
+
+
+def received_video_ids(queue: LocalJobQueue) -> list:
+    video_ids = []
+    while True:
+        messages = queue.receive_batch(max_messages=10, wait_seconds=0)
+        if not messages:
+            return video_ids
+        video_ids.extend(message.json()["videoId"] for message in messages)
+        queue.ack(messages)
+
+
+class TestOutboxRelay:
+
+    def test_relay_publishes_and_deletes(self, session_factory, queue):
+        """Test that pending outbox messages are published in batches and removed"""
+        video_ids = add_outbox_messages(session_factory, 23)
+        relay = OutboxRelay(session_factory, queue, batch_size=100)
+
+        assert relay.relay_once() == 23
+        assert relay.relay_once() == 0
+
+        assert sorted(received_video_ids(queue)) == sorted(video_ids)
+        db = session_factory()
+        assert db.query(OutboxMessage).count() == 0
+        db.close()
+
+    def test_failed_messages_are_kept_with_backoff(self, session_factory, queue, monkeypatch):
+        """Test that messages the queue rejects stay in the outbox for a later retry"""
+        add_outbox_messages(session_factory, 2)
+        monkeypatch.setattr(queue, "send_batch", lambda bodies: [None] * len(bodies))
+        relay = OutboxRelay(session_factory, queue)
+
+        assert relay.relay_once() == 0
+
+        db = session_factory()
+        messages = db.query(OutboxMessage).all()
+        assert [m.attempts for m in messages] == [1, 1]
+        assert all(m.available_at > datetime.utcnow() for m in messages)
+        db.close()
+
+        # Con backoff pendiente no se vuelven a reclamar
+        assert relay.relay_once() == 0
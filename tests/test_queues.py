@@ -0,0 +1,142 @@
+import os
+import time
+import pytest
+from moto import mock_aws
+
+from app.queues import VisibilityHeartbeat, build_job
+from app.queues.local import LocalJobQueue
+
+
+@pytest.fixture(params=["local", "sqs", "redis"])
+def queue(request, tmp_path, monkeypatch):
+    """Every JobQueue backend, with a 1 second visibility timeout"""
+    if request.param == "local":
+        yield LocalJobQueue(str(tmp_path / "queue.db"), "test-queue", visibility_timeout=1, poll_interval=0.05)
+
+    elif request.param == "sqs":
+        monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+        monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+        with mock_aws():
+            from app.queues.sqs import SQSJobQueue
+            yield SQSJobQueue("test-queue", "us-east-1", visibility_timeout=1)
+
+    else:
+        import redis
+        from app.queues.redis_streams import RedisStreamJobQueue
+        redis_url = os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15")
+        try:
+            redis.Redis.from_url(redis_url).ping()
+        except redis.ConnectionError:
+            pytest.skip("Redis not available")
+        queue = RedisStreamJobQueue(redis_url, "test-queue", visibility_timeout=1)
+        yield queue
+        queue.redis.delete(queue.stream)
+
+
+class TestJobQueue:
+
+    def test_send_receive_ack(self, queue):
+        """Test the basic lifecycle of a batch of jobs"""
+        message_ids = queue.send_batch([build_job(f"video-{i}", f"uploads/video-{i}.mp4") for i in range(12)])
+        assert all(message_ids)
+        assert queue.depth() == 12
+
+        received = []
+        while len(received) < 12:
+            messages = queue.receive_batch(max_messages=10, wait_seconds=1)
+            assert messages
+            received.extend(messages)
+            queue.ack(messages)
+
+        assert sorted(m.json()["videoId"] for m in received) == sorted(f"video-{i}" for i in range(12))
+        assert queue.receive_batch(max_messages=10, wait_seconds=0) == []
+        assert queue.depth() == 0
+
+    def test_unacked_message_is_redelivered(self, queue):
+        """Test that a message comes back after the visibility timeout if it was not acked"""
+        queue.send(build_job("video-1", "uploads/video-1.mp4"))
+
+        first = queue.receive_batch(max_messages=1, wait_seconds=1)
+        assert len(first) == 1
+        assert queue.receive_batch(max_messages=1, wait_seconds=0) == []
+
+        time.sleep(1.5)
+        again = queue.receive_batch(max_messages=1, wait_seconds=1)
+
+        assert [m.json()["videoId"] for m in again] == ["video-1"]
+        assert again[0].receive_count == 2
+        queue.ack(again)
+
+    def test_nack_and_extend_visibility(self, queue):
+        """Test that nack makes a message visible at once and extend_visibility hides it longer"""
+        queue.send(build_job("video-1", "uploads/video-1.mp4"))
+
+        message = queue.receive_batch(max_messages=1, wait_seconds=1)[0]
+        queue.nack(message)
+        message = queue.receive_batch(max_messages=1, wait_seconds=1)[0]
+
+        queue.extend_visibility(message, 5)
+        time.sleep(1.5)
+        assert queue.receive_batch(max_messages=1, wait_seconds=0) == []
+        queue.ack([message])
+
+
+class TestVisibilityHeartbeat:
+
+    def test_keeps_in_progress_message_hidden(self, queue):
+        """Test that a tracked message outlives the visibility timeout and reappears once untracked"""
+        queue.send(build_job("video-1", "uploads/video-1.mp4"))
+        message = queue.receive_batch(max_messages=1, wait_seconds=1)[0]
+
+        with VisibilityHeartbeat(queue, visibility_timeout=1, interval=0.3) as heartbeat:
+            heartbeat.track(message)
+            time.sleep(2)
+            assert queue.receive_batch(max_messages=1, wait_seconds=0) == []
+
+            heartbeat.untrack(message)
+            time.sleep(1.5)
+            again = queue.receive_batch(max_messages=1, wait_seconds=1)
+
+        assert [m.json()["videoId"] for m in again] == ["video-1"]
+        queue.ack(again)
+
+    def test_stops_extending_after_max_age(self, queue):
+        """Test that a job stuck past its hard timeout gets its message redelivered"""
+        queue.send(build_job("video-1", "uploads/video-1.mp4"))
+        message = queue.receive_batch(max_messages=1, wait_seconds=1)[0]
+
+        with VisibilityHeartbeat(queue, visibility_timeout=1, interval=0.3, max_age=0.5) as heartbeat:
+            heartbeat.track(message)
+            time.sleep(2)
+            again = queue.receive_batch(max_messages=1, wait_seconds=1)
+
+        assert [m.json()["videoId"] for m in again] == ["video-1"]
+        queue.ack(again)
+
+    def test_interval_shorter_than_visibility(self, queue):
+        with pytest.raises(ValueError):
+            VisibilityHeartbeat(queue, visibility_timeout=30, interval=30)
+
+
+class TestSQSJobQueue:
+
+    @pytest.fixture
+    def sqs_queue(self, monkeypatch):
+        monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+        monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+        with mock_aws():
+            from app.queues.sqs import SQSJobQueue
+            yield SQSJobQueue("test-queue", "us-east-1", visibility_timeout=1, send_concurrency=4)
+
+    def test_send_batch_in_parallel_blocks_of_ten(self, sqs_queue):
+        """Test that a relay batch goes out as send_message_batch calls of up to 10 entries, in order"""
+        calls = []
+        sqs_queue.sqs.meta.events.register(
+            'before-parameter-build.sqs.SendMessageBatch', lambda params, **kwargs: calls.append(len(params['Entries']))
+        )
+
+        message_ids = sqs_queue.send_batch([build_job(f"video-{i}", f"uploads/video-{i}.mp4") for i in range(25)])
+
+        assert sorted(calls) == [5, 10, 10]
+        assert all(message_ids) and len(set(message_ids)) == 25
+        assert sqs_queue.depth() == 25
@@ -79,4 +79,42 @@ class TestRankings:
         # Verify private video is not in the list
         video_ids = [v["video_id"] for v in data]
         assert str(test_video.id) not in video_ids
-        assert str(public_test_video.id) in video_ids
\ No newline at end of file
+        assert str(public_test_video.id) in video_ids
+    
+    async def test_list_public_videos_playlist_url(self, client: AsyncClient, test_db, public_test_video):
+        """Test that videos with an HLS package expose its playlist URL"""
+        public_test_video.hls_playlist_path = f"processed/{public_test_video.id}/hls/master.m3u8"
+        await test_db.commit()
+
+        response = await client.get("/api/public/videos")
+
+        video = next(v for v in response.json() if v["video_id"] == str(public_test_video.id))
+        assert video["playlist_url"] == f"/api/public/videos/{public_test_video.id}/hls/master.m3u8"
+
+    async def test_get_video_playlist_resolves_segments(self, client: AsyncClient, test_db, public_test_video, monkeypatch):
+        """Test that media playlists point segments at storage URLs and keep playlist references relative"""
+        from unittest.mock import AsyncMock
+        base = f"processed/{public_test_video.id}/hls"
+        public_test_video.hls_playlist_path = f"{base}/master.m3u8"
+        await test_db.commit()
+        media_playlist = b'#EXTM3U\n#EXT-X-MAP:URI="init_0.mp4"\n#EXTINF:4.000000,\nseg_000.m4s\n#EXT-X-ENDLIST\n'
+        read_mock = AsyncMock(return_value=media_playlist)
+        monkeypatch.setattr("app.api.v1.public.fileservice.read_file", read_mock)
+        monkeypatch.setattr("app.api.v1.public.fileservice.get_file_url", lambda path: f"https://cdn.test/{path}?sig=1")
+
+        response = await client.get(f"/api/public/videos/{public_test_video.id}/hls/360p/index.m3u8")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/vnd.apple.mpegurl")
+        read_mock.assert_awaited_once_with(f"{base}/360p/index.m3u8")
+        assert f'URI="https://cdn.test/{base}/360p/init_0.mp4?sig=1"' in response.text
+        assert f"https://cdn.test/{base}/360p/seg_000.m4s?sig=1" in response.text
+
+    async def test_get_video_playlist_private_video(self, client: AsyncClient, test_db, test_video):
+        """Test that playlists of private videos are not served"""
+        test_video.hls_playlist_path = f"processed/{test_video.id}/hls/master.m3u8"
+        await test_db.commit()
+
+        response = await client.get(f"/api/public/videos/{test_video.id}/hls/master.m3u8")
+
+        assert response.status_code == 404
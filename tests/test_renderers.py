@@ -0,0 +1,241 @@
+import math
+import shutil
+import subprocess
+import pytest
+from pathlib import Path
+
+from app.processing import RenderSpec, scaled_size
+from app.processing.ffmpeg_renderer import FFmpegRenderer, build_command, build_filter_graph, build_rendition_command
+from app.processing.segment_cache import SegmentCache, SegmentCacheRenderer, build_segment_command
+
+LOGO_PATH = Path("app/res/logo720.png")
+
+
+def find_ffmpeg():
+    """ffmpeg del sistema o el que trae imageio-ffmpeg (dependencia de MoviePy)"""
+    binary = shutil.which("ffmpeg")
+    if binary:
+        return binary
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def make_spec(**overrides) -> RenderSpec:
+    values = dict(input_path="in.mp4", outputs={720: "720p.mp4"}, logo_path=str(LOGO_PATH),
+                  duration=45, source_width=1920, source_height=1080)
+    values.update(overrides)
+    return RenderSpec(**values)
+
+
+def psnr(frame_a, frame_b) -> float:
+    mse = ((frame_a.astype(float) - frame_b.astype(float)) ** 2).mean()
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+
+class TestRenderSpec:
+
+    @pytest.mark.parametrize("source,expected", [
+        ((1920, 1080), (1280, 720)),
+        ((1080, 1920), (404, 720)),
+        ((2560, 1080), (1706, 720)),
+    ])
+    def test_scaled_size_keeps_even_width(self, source, expected):
+        """Test that the output width is truncated and made even, like the MoviePy resize"""
+        assert scaled_size(*source, 720) == expected
+
+    def test_durations(self):
+        """Test that the original is trimmed to 30 s between intro and outro"""
+        assert make_spec(duration=45).total_duration == 35
+        assert make_spec(duration=22).total_duration == 27
+
+    def test_keyframes_follow_the_final_timeline(self):
+        """Test that a piece starting mid-video gets keyframes on its first frame and every 2 s of the final video"""
+        assert make_spec().keyframe_args == ["-force_key_frames", "expr:gte(t,n_forced*2)"]
+
+        body = make_spec(duration=7).body_spec({720: "body.mp4"})
+        assert body.total_duration == 7
+        assert body.keyframe_args == ["-force_key_frames", "0,1.5,3.5,5.5"]
+
+
+class TestFFmpegCommand:
+
+    def test_single_process_without_audio(self):
+        """Test that the whole render is one ffmpeg command with one output and no audio"""
+        command = build_command(make_spec(), "ffmpeg")
+
+        assert command.count("-filter_complex") == 1
+        assert command.count("-i") == 4
+        assert "-an" in command
+        assert command[-1] == "720p.mp4"
+
+    def test_renditions_from_one_decode(self):
+        """Test that every rendition is split from the composite in the same process, with its own bitrate"""
+        spec = make_spec(outputs={360: "360p.mp4", 480: "480p.mp4", 720: "720p.mp4"})
+        command = build_command(spec)
+        graph = build_filter_graph(spec)
+
+        assert command.count("-i") == 4
+        assert "[out]split=3[s360][s480][s720]" in graph
+        assert "[s360]scale=640:360" in graph
+        assert "[s480]scale=852:480" in graph
+        assert "[s720]null[r720]" in graph
+        assert [command[i + 1] for i, arg in enumerate(command) if arg == "-map"] == ["[r360]", "[r480]", "[r720]"]
+        assert [command[i + 1] for i, arg in enumerate(command) if arg == "-b:v"] == ["500k", "888k", "2000k"]
+        assert command[-1] == "720p.mp4"
+
+    def test_rendition_command_scales_an_existing_composite(self):
+        """Test the single-decode fan-out used after a MoviePy composite"""
+        spec = make_spec(outputs={360: "360p.mp4", 480: "480p.mp4", 720: "720p.mp4"})
+        command = build_rendition_command(spec, "720p.mp4", [360, 480])
+
+        assert command.count("-i") == 1
+        assert "[0:v]split=2[s360][s480]" in command[command.index("-filter_complex") + 1]
+        assert command[-1] == "480p.mp4"
+
+    def test_filter_graph_layers(self):
+        """Test the timing of the trim, watermark and outro layers"""
+        graph = build_filter_graph(make_spec(duration=45))
+
+        assert "trim=end=30" in graph
+        assert "s=1280x720" in graph
+        assert "colorchannelmixer=aa=0.5" in graph
+        assert "setpts=PTS+2.5/TB[watermark]" in graph
+        assert "setpts=PTS+32.5/TB[outro]" in graph
+
+    def test_body_only_command(self):
+        """Test that a body spec has no intro/outro layers and is cut at the end of the clip"""
+        spec = make_spec(duration=45).body_spec({720: "body.mp4"})
+        command = build_command(spec)
+        graph = build_filter_graph(spec)
+
+        assert command.count("-i") == 2
+        assert "[1:v]scale=-1:100" in graph
+        assert "[intro]" not in graph and "[outro]" not in graph
+        assert "setpts=PTS+0/TB[clip]" in graph
+        assert command[command.index("-t") + 1] == "30"
+
+    def test_segment_command(self):
+        """Test that the outro is encoded like its rendition of the full render, with keyframes on the final timeline"""
+        spec = make_spec(duration=45, outputs={360: "360p.mp4", 720: "720p.mp4"})
+        command = build_segment_command("outro", spec, 360, "outro.mp4")
+        graph = command[command.index("-filter_complex") + 1]
+
+        assert "color=c=black:s=1280x720:r=30:d=2.5" in command
+        assert "fade=t=in:st=0:d=2:alpha=1" in graph
+        assert "[out]scale=640:360,setsar=1[r360]" in graph
+        assert command[command.index("-b:v") + 1] == "500k"
+        assert command[command.index("-force_key_frames") + 1] == "0,1.5"
+
+
+class TestSegmentCache:
+
+    def test_key_depends_on_logo_and_encoding(self, tmp_path):
+        """Test that a different logo or bitrate never reuses a cached segment"""
+        logo = tmp_path / "logo.png"
+        logo.write_bytes(LOGO_PATH.read_bytes())
+        cache = SegmentCache(str(tmp_path / "cache"))
+        spec = make_spec(logo_path=str(logo), outputs={360: "360p.mp4", 720: "720p.mp4"})
+
+        key = cache.segment_key("intro", spec, 720)
+        assert cache.segment_key("intro", make_spec(logo_path=str(logo), duration=10), 720) == key
+        assert cache.segment_key("intro", spec, 360) != key
+        assert cache.segment_key("outro", spec, 720) != key
+        assert cache.segment_key("intro", make_spec(logo_path=str(logo), bitrate="3000k"), 720) != key
+
+        logo.write_bytes(LOGO_PATH.read_bytes() + b"\0")
+        assert cache.segment_key("intro", spec, 720) != key
+
+    def test_outro_key_only_depends_on_keyframe_phase(self):
+        """Test that clips of 4 s and 6 s share the outro (same keyframe phase) but 5 s does not"""
+        cache = SegmentCache("unused")
+        keys = {duration: cache.segment_key("outro", make_spec(duration=duration), 720) for duration in (4, 5, 6)}
+
+        assert keys[4] == keys[6] != keys[5]
+
+    def test_cached_render_matches_full_render(self, tmp_path):
+        """Test that body + cached intro/outro joined with stream copy match the single-pass render"""
+        moviepy = pytest.importorskip("moviepy")
+        ffmpeg = find_ffmpeg()
+        if not ffmpeg:
+            pytest.skip("ffmpeg not available")
+        source = tmp_path / "source.mp4"
+        subprocess.run([
+            ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30:duration=3",
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", str(source)
+        ], check=True)
+
+        def spec(name):
+            return make_spec(input_path=str(source), duration=3, source_width=1280, source_height=720,
+                             outputs={height: str(tmp_path / f"{name}_{height}p.mp4") for height in (360, 720)})
+
+        cache = SegmentCache(str(tmp_path / "cache"), ffmpeg)
+        FFmpegRenderer(ffmpeg).render(spec("full"))
+        SegmentCacheRenderer(FFmpegRenderer(ffmpeg), cache).render(spec("first"))
+        cached = sorted(path.name for path in (tmp_path / "cache").iterdir())
+        SegmentCacheRenderer(FFmpegRenderer(ffmpeg), cache).render(spec("cached"))
+
+        assert len(cached) == 4
+        assert sorted(path.name for path in (tmp_path / "cache").iterdir()) == cached
+        assert not list(tmp_path.glob("*.body.mp4")) and not list(tmp_path.glob("*.concat.txt"))
+
+        for height in (360, 720):
+            full_clip = moviepy.VideoFileClip(str(tmp_path / f"full_{height}p.mp4"))
+            cached_clip = moviepy.VideoFileClip(str(tmp_path / f"cached_{height}p.mp4"))
+            try:
+                assert cached_clip.size == full_clip.size
+                assert cached_clip.duration == pytest.approx(full_clip.duration, abs=0.05)
+                for frame_index in range(0, 240, 10):
+                    t = frame_index / 30
+                    assert psnr(full_clip.get_frame(t), cached_clip.get_frame(t)) > 30, f"frame at {t:.2f}s differs"
+            finally:
+                full_clip.close()
+                cached_clip.close()
+
+
+class TestRenderEnginesMatch:
+
+    @pytest.fixture(scope="class")
+    def source_video(self, tmp_path_factory):
+        ffmpeg = find_ffmpeg()
+        if not ffmpeg:
+            pytest.skip("ffmpeg not available")
+        path = tmp_path_factory.mktemp("render") / "source.mp4"
+        subprocess.run([
+            ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=1920x1080:rate=30:duration=4.4",
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", str(path)
+        ], check=True)
+        return ffmpeg, path
+
+    def test_ffmpeg_output_matches_moviepy(self, source_video, tmp_path):
+        """Test frame by frame (intro, fade, clip, watermark, outro) that both engines render the same video"""
+        moviepy = pytest.importorskip("moviepy")
+        from app.processing.moviepy_renderer import MoviePyRenderer
+
+        ffmpeg, source = source_video
+        outputs = {}
+        for name, renderer in (("ffmpeg", FFmpegRenderer(ffmpeg)), ("moviepy", MoviePyRenderer())):
+            outputs[name] = {height: str(tmp_path / f"{name}_{height}p.mp4") for height in (360, 720)}
+            renderer.render(make_spec(input_path=str(source), outputs=outputs[name],
+                                      duration=4, source_width=1920, source_height=1080))
+
+        small_clip = moviepy.VideoFileClip(outputs["ffmpeg"][360])
+        assert small_clip.size == [640, 360]
+        assert small_clip.duration == pytest.approx(9, abs=0.05)
+        small_clip.close()
+
+        ffmpeg_clip = moviepy.VideoFileClip(outputs["ffmpeg"][720])
+        moviepy_clip = moviepy.VideoFileClip(outputs["moviepy"][720])
+        try:
+            assert ffmpeg_clip.size == moviepy_clip.size == [1280, 720]
+            assert ffmpeg_clip.duration == pytest.approx(moviepy_clip.duration, abs=0.05)
+            assert ffmpeg_clip.audio is None
+
+            for frame_index in range(0, 270, 10):
+                t = frame_index / 30
+                assert psnr(ffmpeg_clip.get_frame(t), moviepy_clip.get_frame(t)) > 30, f"frame at {t:.2f}s differs"
+        finally:
+            ffmpeg_clip.close()
+            moviepy_clip.close()
@@ -0,0 +1,286 @@
+import base64
+import hashlib
+import os
+import pytest
+import boto3
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from app.core.config import settings
+
+BUCKET = "anb-test-bucket"
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3_storage(monkeypatch):
+    """S3Storage against a moto in-memory S3"""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr(settings, "S3_BUCKET_NAME", BUCKET)
+    monkeypatch.setattr(settings, "S3_PART_SIZE_MB", 5)
+    monkeypatch.setattr(settings, "S3_MULTIPART_CONCURRENCY", 3)
+
+    with mock_aws():
+        boto3.client("s3", region_name=settings.AWS_REGION).create_bucket(Bucket=BUCKET)
+
+        from app.storage.s3_storage import S3Storage
+        yield S3Storage()
+
+
+def read_object(storage, key: str) -> bytes:
+    return storage.s3_client.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+async def chunked(data: bytes, chunk_size: int = 1024 * 1024):
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+
+
+class TestS3MultipartUploader:
+
+    def test_upload_path_multipart(self, s3_storage, tmp_path):
+        """Test uploading a local file in several parallel parts"""
+        data = os.urandom(2 * PART_SIZE + 1234)
+        local_file = tmp_path / "video.mp4"
+        local_file.write_bytes(data)
+
+        assert s3_storage.upload_file_sync(str(local_file), "processed/video.mp4")
+        assert read_object(s3_storage, "processed/video.mp4") == data
+
+    async def test_save_stream_multipart(self, s3_storage):
+        """Test streaming an async chunk iterator into a multipart upload"""
+        data = os.urandom(PART_SIZE * 2 + 10)
+
+        key = await s3_storage.save_stream(chunked(data), "video.mp4", "uploads")
+
+        assert key == "uploads/video.mp4"
+        assert read_object(s3_storage, key) == data
+
+    async def test_save_stream_small_file(self, s3_storage):
+        """Test that a file smaller than one part is uploaded as a single part"""
+        data = b"small video"
+
+        key = await s3_storage.save_stream(chunked(data), "small.mp4", "uploads")
+
+        assert read_object(s3_storage, key) == data
+
+    def test_part_is_retried(self, s3_storage, tmp_path, monkeypatch):
+        """Test that a failed part is retried instead of failing the upload"""
+        data = os.urandom(PART_SIZE + 100)
+        local_file = tmp_path / "video.mp4"
+        local_file.write_bytes(data)
+
+        original_upload_part = s3_storage.s3_client.upload_part
+        calls = {"count": 0}
+
+        def flaky_upload_part(**kwargs):
+            calls["count"] += 1
+            if calls["count"] == 1:
+                raise ClientError({"Error": {"Code": "SlowDown", "Message": "throttled"}}, "UploadPart")
+            return original_upload_part(**kwargs)
+
+        monkeypatch.setattr(s3_storage.s3_client, "upload_part", flaky_upload_part)
+        monkeypatch.setattr("app.storage.s3_storage.time.sleep", lambda _: None)
+
+        assert s3_storage.upload_file_sync(str(local_file), "processed/video.mp4")
+        assert calls["count"] == 3
+        assert read_object(s3_storage, "processed/video.mp4") == data
+
+    def test_upload_with_part_checksums(self, s3_storage, tmp_path, monkeypatch):
+        """Test that every part carries the SHA-256 of its bytes and the composite checksum is returned"""
+        from app.storage.s3_storage import composite_sha256
+        data = os.urandom(2 * PART_SIZE + 1234)
+        local_file = tmp_path / "video.mp4"
+        local_file.write_bytes(data)
+
+        original_upload_part = s3_storage.s3_client.upload_part
+        sent = {}
+
+        def spy_upload_part(**kwargs):
+            sent[kwargs["PartNumber"]] = kwargs["ChecksumSHA256"]
+            return original_upload_part(**kwargs)
+
+        monkeypatch.setattr(s3_storage.s3_client, "upload_part", spy_upload_part)
+
+        checksum = s3_storage.upload_file_checksummed_sync(str(local_file), "processed/video.mp4")
+
+        parts = [data[:PART_SIZE], data[PART_SIZE:2 * PART_SIZE], data[2 * PART_SIZE:]]
+        expected = [base64.b64encode(hashlib.sha256(part).digest()).decode() for part in parts]
+        assert [sent[number] for number in (1, 2, 3)] == expected
+        assert checksum == composite_sha256(expected)
+        assert checksum.endswith("-3")
+        assert read_object(s3_storage, "processed/video.mp4") == data
+
+    @pytest.mark.parametrize("reported,matches", [
+        ("abc123=-3", True),
+        ("abc123=", True),      # sin el sufijo de partes
+        ("zzz999=-3", False),
+        (None, False),          # S3 no guardó checksum
+    ])
+    def test_checksum_matches(self, s3_storage, monkeypatch, reported, matches):
+        """Test the comparison with the checksum S3 reports for the object"""
+        response = {"ContentLength": 10, **({"ChecksumSHA256": reported} if reported else {})}
+        monkeypatch.setattr(s3_storage.s3_client, "head_object", lambda **kwargs: response)
+
+        assert s3_storage.checksum_matches_sync("processed/video.mp4", "abc123=-3") is matches
+
+    async def test_failed_stream_aborts_upload(self, s3_storage):
+        """Test that a failing stream aborts the multipart upload and leaves no object"""
+        async def broken_stream():
+            yield os.urandom(PART_SIZE)
+            raise RuntimeError("client disconnected")
+
+        with pytest.raises(RuntimeError):
+            await s3_storage.save_stream(broken_stream(), "broken.mp4", "uploads")
+
+        assert not s3_storage.file_exists("uploads/broken.mp4")
+        uploads = s3_storage.s3_client.list_multipart_uploads(Bucket=BUCKET)
+        assert not uploads.get("Uploads")
+
+
+class TestS3DirectUpload:
+
+    async def test_bad_part_etag_keeps_upload_open(self, s3_storage):
+        """Test that wrong ETags from the client raise a retryable error without aborting the upload"""
+        from app.storage.base_storage import UploadCompletionError
+        data = os.urandom(1024)
+        upload_id = (await s3_storage.create_upload_url("uploads/direct.mp4", len(data), 60, multipart=True))["upload_id"]
+        part = s3_storage.multipart.upload_part("uploads/direct.mp4", upload_id, 1, data)
+
+        with pytest.raises(UploadCompletionError) as error:
+            await s3_storage.complete_upload("uploads/direct.mp4", upload_id, [{"part_number": 1, "etag": '"bad"'}])
+
+        assert error.value.retryable
+        await s3_storage.complete_upload("uploads/direct.mp4", upload_id, [{"part_number": 1, "etag": part["ETag"]}])
+        assert read_object(s3_storage, "uploads/direct.mp4") == data
+
+    async def test_missing_upload_is_not_retryable(self, s3_storage, monkeypatch):
+        """Test that an upload S3 no longer has (aborted or expired) cannot be completed again"""
+        from app.storage.base_storage import UploadCompletionError
+        upload_id = (await s3_storage.create_upload_url("uploads/direct.mp4", 1024, 60, multipart=True))["upload_id"]
+        await s3_storage.abort_upload("uploads/direct.mp4", upload_id)
+        assert not s3_storage.s3_client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+
+        def no_such_upload(**kwargs):
+            raise ClientError({"Error": {"Code": "NoSuchUpload"}}, "CompleteMultipartUpload")
+        monkeypatch.setattr(s3_storage.s3_client, "complete_multipart_upload", no_such_upload)
+
+        with pytest.raises(UploadCompletionError) as error:
+            await s3_storage.complete_upload("uploads/direct.mp4", upload_id, [{"part_number": 1, "etag": '"x"'}])
+
+        assert not error.value.retryable
+
+    async def test_undersized_chunk_is_not_uploaded(self, s3_storage):
+        """Test that a resumable chunk below the part minimum is rejected before upload_part"""
+        from app.core.exceptions import ValidationException
+        from app.utils.upload_stream import UploadStream
+        upload_id = await s3_storage.begin_chunked_upload("uploads/resumable.mp4")
+        upload_stream = UploadStream(chunked(b"\x00" * 1024), max_size=PART_SIZE, chunk_size=1024,
+                                     min_size=s3_storage.min_chunk_size)
+
+        with pytest.raises(ValidationException):
+            await s3_storage.append_chunk("uploads/resumable.mp4", upload_id, 1, 0, upload_stream.chunks())
+
+        parts = s3_storage.s3_client.list_parts(Bucket=BUCKET, Key="uploads/resumable.mp4", UploadId=upload_id)
+        assert not parts.get("Parts")
+
+
+class TestS3RangedDownloader:
+
+    def test_download_in_ranges(self, s3_storage, tmp_path, monkeypatch):
+        """Test that an object is downloaded as several ranged GETs into one file"""
+        data = os.urandom(2 * PART_SIZE + 1234)
+        s3_storage.s3_client.put_object(Bucket=BUCKET, Key="uploads/video.mp4", Body=data)
+
+        original_get_object = s3_storage.s3_client.get_object
+        ranges = []
+
+        def spy_get_object(**kwargs):
+            ranges.append(kwargs["Range"])
+            return original_get_object(**kwargs)
+
+        monkeypatch.setattr(s3_storage.s3_client, "get_object", spy_get_object)
+        local_file = tmp_path / "input.mp4"
+
+        assert s3_storage.download_file_sync("uploads/video.mp4", str(local_file))
+
+        assert local_file.read_bytes() == data
+        assert sorted(ranges) == sorted([
+            f"bytes=0-{PART_SIZE - 1}",
+            f"bytes={PART_SIZE}-{2 * PART_SIZE - 1}",
+            f"bytes={2 * PART_SIZE}-{len(data) - 1}",
+        ])
+
+    def test_range_is_retried_from_last_byte(self, s3_storage, tmp_path, monkeypatch):
+        """Test that a connection dropped mid-range resumes where it stopped"""
+        data = os.urandom(PART_SIZE + 100)
+        s3_storage.s3_client.put_object(Bucket=BUCKET, Key="uploads/video.mp4", Body=data)
+
+        original_get_object = s3_storage.s3_client.get_object
+        ranges = []
+
+        class TruncatedBody:
+            """Body that delivers only the first MB and then drops the connection"""
+            def __init__(self, body):
+                self.body = body
+
+            def iter_chunks(self, chunk_size):
+                yield self.body.read(1024 * 1024)
+
+        def flaky_get_object(**kwargs):
+            ranges.append(kwargs["Range"])
+            response = original_get_object(**kwargs)
+            if kwargs["Range"] == f"bytes=0-{PART_SIZE - 1}":
+                response["Body"] = TruncatedBody(response["Body"])
+            return response
+
+        monkeypatch.setattr(s3_storage.s3_client, "get_object", flaky_get_object)
+        monkeypatch.setattr("app.storage.s3_storage.time.sleep", lambda _: None)
+        local_file = tmp_path / "input.mp4"
+
+        assert s3_storage.download_file_sync("uploads/video.mp4", str(local_file))
+
+        assert local_file.read_bytes() == data
+        assert f"bytes={1024 * 1024}-{PART_SIZE - 1}" in ranges
+
+    def test_missing_object(self, s3_storage, tmp_path):
+        """Test that a missing key fails without leaving a partial file"""
+        local_file = tmp_path / "input.mp4"
+
+        assert not s3_storage.download_file_sync("uploads/missing.mp4", str(local_file))
+        assert not local_file.exists()
+
+    def test_failed_range_removes_partial_file(self, s3_storage, tmp_path, monkeypatch):
+        data = os.urandom(PART_SIZE + 100)
+        s3_storage.s3_client.put_object(Bucket=BUCKET, Key="uploads/video.mp4", Body=data)
+
+        def broken_get_object(**kwargs):
+            raise ClientError({"Error": {"Code": "InternalError", "Message": "boom"}}, "GetObject")
+
+        monkeypatch.setattr(s3_storage.s3_client, "get_object", broken_get_object)
+        monkeypatch.setattr("app.storage.s3_storage.time.sleep", lambda _: None)
+        local_file = tmp_path / "input.mp4"
+
+        assert not s3_storage.download_file_sync("uploads/video.mp4", str(local_file))
+        assert not local_file.exists()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_existing_file_is_replaced_only_when_complete(self, s3_storage, tmp_path, monkeypatch):
+        """Test that a reader never sees a partial file: a failed download keeps the previous one intact"""
+        data = os.urandom(PART_SIZE + 100)
+        s3_storage.s3_client.put_object(Bucket=BUCKET, Key="resources/logo720.png", Body=data)
+        local_file = tmp_path / "logo720.png"
+        local_file.write_bytes(b"previous logo")
+        original_get_object = s3_storage.s3_client.get_object
+
+        def slow_get_object(**kwargs):
+            # Mientras se descarga, el archivo de destino sigue siendo el anterior
+            assert local_file.read_bytes() == b"previous logo"
+            return original_get_object(**kwargs)
+
+        monkeypatch.setattr(s3_storage.s3_client, "get_object", slow_get_object)
+
+        assert s3_storage.download_file_sync("resources/logo720.png", str(local_file))
+        assert local_file.read_bytes() == data
+        assert [path.name for path in tmp_path.iterdir()] == ["logo720.png"]
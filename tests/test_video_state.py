@@ -0,0 +1,130 @@
+import uuid
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models import User, Video
+from app.tasks.video_state import find_video, finish_processing, mark_failed, start_processing
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def video(db) -> Video:
+    user = User(email="worker@test.com", password_hash="x", first_name="W", last_name="W", city="Bogotá", country="Colombia")
+    db.add(user)
+    db.flush()
+    video_id = uuid.uuid4()
+    video = Video(id=video_id, user_id=user.id, title="Video", original_filename="v.mp4",
+                  file_path=f"uploads/{video_id}.mp4", file_size_bytes=1, status="uploaded")
+    db.add(video)
+    db.commit()
+    return video
+
+
+def statements(engine) -> list:
+    """SQL statements sent to the database (filled while the test runs)"""
+    sent = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: sent.append(statement))
+    return sent
+
+
+class TestFindVideo:
+
+    def test_by_primary_key(self, engine, db, video):
+        """Test that the message id is resolved with a primary key lookup, not a file_path scan"""
+        video_id = video.id
+        db.expunge_all()
+        sent = statements(engine)
+
+        assert find_video(db, str(video_id)).id == video_id
+        assert len(sent) == 1
+        assert "videos.id = " in sent[0] and "file_path" not in sent[0].split("WHERE")[1]
+
+    def test_legacy_upload_path(self, db, video):
+        """Test the fallback for messages that identify the video by its upload file name"""
+        legacy_id = uuid.uuid4()
+        video.file_path = f"uploads/{legacy_id}.mp4"
+        db.commit()
+
+        assert find_video(db, str(legacy_id)).id == video.id
+        assert find_video(db, "not-a-uuid") is None
+
+
+class TestTransitions:
+
+    def test_happy_path_is_two_updates(self, engine, db, video):
+        """Test processing -> processed as single conditional UPDATEs, with the final values in the last one"""
+        sent = statements(engine)
+
+        assert start_processing(db, video.id)
+        assert finish_processing(db, video.id, "processed/x/720p.mp4", {"720p": "processed/x/720p.mp4"},
+                                 "processed/x/hls/master.m3u8", 12)
+
+        updates = [statement for statement in sent if statement.startswith("UPDATE")]
+        assert len(updates) == 2
+        assert all("videos.status IN" in statement for statement in updates)
+        db.refresh(video)
+        assert (video.status, video.duration_seconds, video.file_path) == ("processed", 12, "processed/x/720p.mp4")
+        assert video.hls_playlist_path == "processed/x/hls/master.m3u8"
+
+    def test_redelivery_resumes_processing(self, db, video):
+        """Test that a message redelivered after a crash can take a video stuck in 'processing'"""
+        assert start_processing(db, video.id)
+        assert start_processing(db, video.id)
+
+    def test_waiting_duplicate_takes_over_the_render(self, db, video):
+        """Test that a waiting duplicate can start when claim_artifact hands it a stale render"""
+        video.status = "waiting_duplicate"
+        db.commit()
+
+        assert start_processing(db, video.id)
+
+    def test_replayed_failed_video_restarts(self, db, video):
+        """Test that a job replayed from the dead-letter queue can process a failed video again"""
+        start_processing(db, video.id)
+        mark_failed(db, video.id)
+
+        assert start_processing(db, video.id)
+
+    @pytest.mark.parametrize("status", ["processed", "deleted"])
+    def test_finished_video_is_not_restarted(self, db, video, status):
+        """Test that a duplicate message does not move a video out of a final or waiting status"""
+        video.status = status
+        db.commit()
+
+        assert not start_processing(db, video.id)
+        db.refresh(video)
+        assert video.status == status
+
+    def test_failure_does_not_overwrite_processed(self, db, video):
+        """Test that a late failure of another delivery keeps the processed result"""
+        start_processing(db, video.id)
+        finish_processing(db, video.id, "processed/x/720p.mp4", {}, None, 5)
+
+        assert not mark_failed(db, video.id)
+        assert not finish_processing(db, video.id, "other.mp4", {}, None, 5)
+        db.refresh(video)
+        assert (video.status, video.file_path) == ("processed", "processed/x/720p.mp4")
+
+    def test_mark_failed(self, db, video):
+        start_processing(db, video.id)
+
+        assert mark_failed(db, video.id)
+        db.refresh(video)
+        assert video.status == "failed"
@@ -2,6 +2,15 @@ import pytest
 from httpx import AsyncClient
 from io import BytesIO
 from pathlib import Path
+from sqlalchemy import select, func
+from uuid import UUID
+
+from app.models import OutboxMessage, Video
+
+
+async def count_outbox_messages(db) -> int:
+    """Processing jobs written to the outbox (published later by the relay)"""
+    return (await db.execute(select(func.count()).select_from(OutboxMessage))).scalar_one()
 
 
 @pytest.mark.asyncio
@@ -236,6 +245,55 @@ class TestVideos:
         assert "deleted successfully" in data["message"].lower()
         assert data["video_id"] == str(test_video.id)
     
+    async def test_delete_video_keeps_shared_file(self, client: AsyncClient, test_db, test_user, test_user_token, monkeypatch):
+        """Test that deleting a deduplicated video keeps the processed file other videos point at"""
+        from unittest.mock import AsyncMock
+        from app.repositories.video_repository import video_repository
+        delete_mock = AsyncMock()
+        monkeypatch.setattr("app.api.v1.videos.fileservice.delete_file", delete_mock)
+        
+        videos = []
+        for title in ("Original", "Duplicate"):
+            videos.append(await video_repository.create(
+                db=test_db,
+                user_id=test_user.id,
+                title=title,
+                original_filename="same.mp4",
+                file_path="processed/shared.mp4",
+                duration_seconds=30,
+                file_size_bytes=1024,
+                status="processed",
+                content_sha256="a" * 64
+            ))
+        await test_db.commit()
+        
+        response = await client.delete(
+            f"/api/videos/{videos[1].id}",
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+        
+        assert response.status_code == 200
+        delete_mock.assert_not_called()
+
+    async def test_delete_video_removes_all_renditions(self, client: AsyncClient, test_db, test_video, test_user_token, monkeypatch):
+        """Test that deleting a processed video removes every rendition"""
+        from unittest.mock import AsyncMock
+        delete_mock = AsyncMock()
+        monkeypatch.setattr("app.api.v1.videos.fileservice.delete_file", delete_mock)
+
+        renditions = {res: f"processed/{test_video.id}/{res}.mp4" for res in ("360p", "480p", "720p")}
+        test_video.file_path = renditions["720p"]
+        test_video.renditions = renditions
+        await test_db.commit()
+
+        response = await client.delete(
+            f"/api/videos/{test_video.id}",
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+
+        assert response.status_code == 200
+        assert {call.args[0] for call in delete_mock.call_args_list} == set(renditions.values())
+
     async def test_delete_video_without_auth(self, client: AsyncClient, test_video):
         """Test deleting without authentication"""
         response = await client.delete(f"/api/videos/{test_video.id}")
@@ -271,4 +329,267 @@ class TestVideos:
             headers={"Authorization": f"Bearer {test_user_token}"}
         )
         
-        assert response.status_code == 404
\ No newline at end of file
+        assert response.status_code == 404
+    
+    async def test_upload_video_exceeds_max_size(self, client: AsyncClient, test_user_token, monkeypatch):
+        """Test that the size limit is enforced while streaming the upload"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MAX_FILE_SIZE_MB", 0)
+        
+        files = {
+            "video_file": ("big.mp4", b"\x00" * 4096, "video/mp4")
+        }
+        data = {
+            "title": "Too Big Video"
+        }
+        
+        response = await client.post(
+            "/api/videos/upload",
+            files=files,
+            data=data,
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+        
+        assert response.status_code == 400
+        assert "exceeds" in response.json()["detail"].lower()
+        assert not list(Path("storage/uploads").glob("*.part"))
+    
+    async def test_upload_video_invalid_duration_not_queued(self, client: AsyncClient, test_db, test_user_token):
+        """Test that a video breaking the upload rules gets a 400 before being stored or queued"""
+        from tests.test_mp4_parser import build_mp4
+        uploads_before = set(Path("storage/uploads").glob("*"))
+        
+        files = {
+            "video_file": ("short.mp4", build_mp4(duration_s=15), "video/mp4")
+        }
+        data = {
+            "title": "Short Video"
+        }
+        
+        response = await client.post(
+            "/api/videos/upload",
+            files=files,
+            data=data,
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+        
+        assert response.status_code == 400
+        assert "duration" in response.json()["detail"].lower()
+        assert await count_outbox_messages(test_db) == 0
+        assert set(Path("storage/uploads").glob("*")) == uploads_before
+    
+    async def test_upload_video_rejected_when_backlog_saturated(self, client: AsyncClient, test_user_token, monkeypatch):
+        """Test that uploads are shed with 503 and Retry-After when the queue backlog is too high"""
+        from app.api.v1.videos import admission
+        monkeypatch.setattr(admission, "backlog_source", lambda: 10_000)
+        monkeypatch.setattr(admission, "_backlog", None)
+        monkeypatch.setattr(admission, "_sampled_at", 0.0)
+        
+        response = await client.post(
+            "/api/videos/upload",
+            files={"video_file": ("video.mp4", b"\x00" * 1024, "video/mp4")},
+            data={"title": "Rejected Video"},
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"].isdigit()
+    
+    async def test_direct_upload_flow(self, client: AsyncClient, test_db, test_user_token):
+        """Test requesting an upload URL, uploading to it and completing the upload"""
+        video_content = b"\x00" * 2048
+        
+        response = await client.post(
+            "/api/videos/upload-url",
+            json={"title": "Direct Upload", "file_size_bytes": len(video_content)},
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+        
+        assert response.status_code == 201
+        upload = response.json()
+        assert upload["method"] == "PUT"
+        
+        response = await client.put(upload["upload_url"], content=video_content, headers=upload["headers"])
+        assert response.status_code == 200
+        
+        response = await client.post(
+            f"/api/videos/{upload['video_id']}/complete",
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+        
+        assert response.status_code == 201
+        assert response.json()["task_id"] == upload["video_id"]
+        assert await count_outbox_messages(test_db) == 1
+    
+    async def test_complete_upload_size_mismatch(self, client: AsyncClient, test_db, test_user_token):
+        """Test that completing an upload with a different size than declared fails"""
+        
+        response = await client.post(
+            "/api/videos/upload-url",
+            json={"title": "Direct Upload", "file_size_bytes": 4096},
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+        upload = response.json()
+        
+        await client.put(upload["upload_url"], content=b"\x00" * 100, headers=upload["headers"])
+        
+        response = await client.post(
+            f"/api/videos/{upload['video_id']}/complete",
+            headers={"Authorization": f"Bearer {test_user_token}"}
+        )
+        
+        assert response.status_code == 400
+        assert "size" in response.json()["detail"].lower()
+        assert await video_status(test_db, upload["video_id"]) == "failed"
+    
+    async def test_complete_upload_with_bad_parts_can_be_retried(self, client: AsyncClient, test_db, test_user_token, monkeypatch):
+        """Test that wrong part ETags give a 400 and keep the upload open for another /complete"""
+        from unittest.mock import AsyncMock
+        from app.storage.base_storage import UploadCompletionError
+        complete_mock = AsyncMock(side_effect=[UploadCompletionError("InvalidPart: bad etag"), None])
+        abort_mock = AsyncMock()
+        monkeypatch.setattr("app.api.v1.videos.fileservice.complete_upload", complete_mock)
+        monkeypatch.setattr("app.api.v1.videos.fileservice.abort_upload", abort_mock)
+        auth = {"Authorization": f"Bearer {test_user_token}"}
+        
+        response = await client.post(
+            "/api/videos/upload-url",
+            json={"title": "Direct Upload", "file_size_bytes": 2048},
+            headers=auth
+        )
+        upload = response.json()
+        await client.put(upload["upload_url"], content=b"\x00" * 2048, headers=upload["headers"])
+        
+        response = await client.post(f"/api/videos/{upload['video_id']}/complete", headers=auth)
+        
+        assert response.status_code == 400
+        assert "etag" in response.json()["detail"].lower()
+        abort_mock.assert_not_called()
+        assert await video_status(test_db, upload["video_id"]) == "pending_upload"
+        
+        response = await client.post(f"/api/videos/{upload['video_id']}/complete", headers=auth)
+        
+        assert response.status_code == 201
+    
+    async def test_complete_upload_discarded_when_storage_dropped_it(self, client: AsyncClient, test_db, test_user_token, monkeypatch):
+        """Test that an upload the storage no longer has is aborted and the video marked failed"""
+        from unittest.mock import AsyncMock
+        from app.storage.base_storage import UploadCompletionError
+        monkeypatch.setattr("app.api.v1.videos.fileservice.complete_upload",
+                            AsyncMock(side_effect=UploadCompletionError("gone", retryable=False)))
+        abort_mock = AsyncMock()
+        monkeypatch.setattr("app.api.v1.videos.fileservice.abort_upload", abort_mock)
+        auth = {"Authorization": f"Bearer {test_user_token}"}
+        
+        response = await client.post(
+            "/api/videos/upload-url",
+            json={"title": "Direct Upload", "file_size_bytes": 2048},
+            headers=auth
+        )
+        upload = response.json()
+        
+        response = await client.post(
+            f"/api/videos/{upload['video_id']}/complete",
+            json={"upload_id": "upload-1", "parts": []},
+            headers=auth
+        )
+        
+        assert response.status_code == 400
+        abort_mock.assert_awaited_once()
+        assert await video_status(test_db, upload["video_id"]) == "failed"
+    
+    async def test_local_upload_invalid_signature(self, client: AsyncClient):
+        """Test that the signed local upload endpoint rejects tampered signatures"""
+        response = await client.put(
+            "/api/videos/local-upload",
+            params={"key": "uploads/fake.mp4", "expires": 9999999999, "signature": "invalid"},
+            content=b"\x00" * 10
+        )
+        
+        assert response.status_code == 403
+    
+    async def test_resumable_upload_flow(self, client: AsyncClient, test_db, test_user_token):
+        """Test creating a resumable upload, sending chunks and resuming from the server offset"""
+        import base64
+        video_content = b"\x01" * 3000
+        auth = {"Authorization": f"Bearer {test_user_token}"}
+        
+        response = await client.post(
+            "/api/videos/uploads",
+            headers={
+                **auth,
+                "Upload-Length": str(len(video_content)),
+                "Upload-Metadata": f"title {base64.b64encode(b'Resumable Video').decode()}"
+            }
+        )
+        
+        assert response.status_code == 201
+        upload_url = response.headers["Location"]
+        assert response.headers["Upload-Offset"] == "0"
+        
+        chunk_headers = {**auth, "Content-Type": "application/offset+octet-stream"}
+        response = await client.patch(
+            upload_url, content=video_content[:1000], headers={**chunk_headers, "Upload-Offset": "0"}
+        )
+        assert response.status_code == 204
+        assert response.headers["Upload-Offset"] == "1000"
+        
+        # Un cliente que perdió la conexión consulta el offset antes de reanudar
+        response = await client.head(upload_url, headers=auth)
+        assert response.headers["Upload-Offset"] == "1000"
+        
+        response = await client.patch(
+            upload_url, content=video_content[:1000], headers={**chunk_headers, "Upload-Offset": "0"}
+        )
+        assert response.status_code == 409
+        
+        response = await client.patch(
+            upload_url, content=video_content[1000:], headers={**chunk_headers, "Upload-Offset": "1000"}
+        )
+        assert response.status_code == 204
+        assert response.headers["Upload-Offset"] == str(len(video_content))
+        assert await count_outbox_messages(test_db) == 1
+    
+    async def test_resumable_chunk_while_another_is_received(self, client: AsyncClient, test_db, test_user_token):
+        """Test that a second PATCH at the same offset gets 409 while the first one holds the claim"""
+        import base64
+        from app.repositories.upload_session_repository import upload_session_repository
+        auth = {"Authorization": f"Bearer {test_user_token}"}
+        response = await client.post(
+            "/api/videos/uploads",
+            headers={**auth, "Upload-Length": "2000",
+                     "Upload-Metadata": f"title {base64.b64encode(b'Resumable Video').decode()}"}
+        )
+        upload = response.json()
+        assert await upload_session_repository.claim_chunk(test_db, UUID(upload["upload_id"]), 0, timeout=300)
+        await test_db.commit()
+        
+        response = await client.patch(
+            upload["upload_url"], content=b"\x01" * 1000,
+            headers={**auth, "Content-Type": "application/offset+octet-stream", "Upload-Offset": "0"}
+        )
+        
+        assert response.status_code == 409
+    
+    async def test_resumable_undersized_chunk_keeps_offset(self, client: AsyncClient, test_user_token, monkeypatch):
+        """Test that a non-final chunk below the minimum is rejected and the offset can be retried"""
+        import base64
+        monkeypatch.setattr("app.api.v1.videos.fileservice.storage.min_chunk_size", 1500)
+        auth = {"Authorization": f"Bearer {test_user_token}"}
+        chunk_headers = {**auth, "Content-Type": "application/offset+octet-stream", "Upload-Offset": "0"}
+        response = await client.post(
+            "/api/videos/uploads",
+            headers={**auth, "Upload-Length": "3000",
+                     "Upload-Metadata": f"title {base64.b64encode(b'Resumable Video').decode()}"}
+        )
+        upload_url = response.headers["Location"]
+        
+        response = await client.patch(upload_url, content=b"\x01" * 1000, headers=chunk_headers)
+        
+        assert response.status_code == 400
+        response = await client.head(upload_url, headers=auth)
+        assert response.headers["Upload-Offset"] == "0"
+        
+        response = await client.patch(upload_url, content=b"\x01" * 1500, headers=chunk_headers)
+        assert response.status_code == 204
+        assert response.headers["Upload-Offset"] == "1500"
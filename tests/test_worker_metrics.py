@@ -0,0 +1,92 @@
+import json
+import time
+import urllib.request
+
+from app.tasks.metrics import StageTimings, WorkerMetrics
+
+
+def job_result(status="success", render=12.0, upload_bytes=5_000_000):
+    return {
+        "status": status,
+        "video_id": "video-1",
+        "total_seconds": render + 3,
+        "stages": {
+            "probe": {"seconds": 0.02, "bytes": 0},
+            "render": {"seconds": render, "bytes": 6_000_000},
+            "upload": {"seconds": 2.0, "bytes": upload_bytes},
+        }
+    }
+
+
+class TestStageTimings:
+
+    def test_repeated_stages_are_summed(self):
+        """Test that a stage run once per rendition accumulates time and bytes"""
+        timings = StageTimings()
+        for _ in range(3):
+            with timings.stage("upload"):
+                time.sleep(0.01)
+            timings.add("upload", nbytes=100)
+
+        stages = timings.to_dict()
+        assert stages["upload"]["bytes"] == 300
+        assert 0.03 <= stages["upload"]["seconds"] < 1
+        assert timings.total_seconds >= stages["upload"]["seconds"]
+
+    def test_failed_stage_is_still_timed(self):
+        timings = StageTimings()
+        try:
+            with timings.stage("download"):
+                raise RuntimeError("S3 unavailable")
+        except RuntimeError:
+            pass
+
+        assert "download" in timings.to_dict()
+
+
+class TestWorkerMetrics:
+
+    def test_prometheus_text_format(self):
+        """Test the histograms and counters exported for the stage breakdown"""
+        metrics = WorkerMetrics()
+        metrics.observe_job(job_result(render=12.0))
+        metrics.observe_job(job_result(render=45.0))
+        metrics.observe_job({"status": "failed", "video_id": "video-2", "stages": {}})
+
+        text = metrics.render()
+
+        assert 'worker_jobs_total{status="success"} 2' in text
+        assert 'worker_jobs_total{status="failed"} 1' in text
+        assert 'worker_stage_duration_seconds_bucket{stage="render",le="30"} 1' in text
+        assert 'worker_stage_duration_seconds_bucket{stage="render",le="60"} 2' in text
+        assert 'worker_stage_duration_seconds_bucket{stage="render",le="+Inf"} 2' in text
+        assert 'worker_stage_duration_seconds_sum{stage="render"} 57.000000' in text
+        assert 'worker_stage_bytes_total{stage="upload"} 10000000' in text
+        assert "worker_job_duration_seconds_count 2" in text
+        assert "# TYPE worker_stage_duration_seconds histogram" in text
+
+    def test_json_lines_log(self, tmp_path):
+        """Test that every job appends one JSON line with its stage breakdown"""
+        log_path = tmp_path / "worker_metrics.jsonl"
+        metrics = WorkerMetrics(str(log_path))
+        metrics.observe_job(job_result())
+        metrics.observe_job(job_result(status="failed"))
+
+        lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+
+        assert [line["status"] for line in lines] == ["success", "failed"]
+        assert lines[0]["stages"]["render"] == {"seconds": 12.0, "bytes": 6_000_000}
+        assert lines[0]["total_seconds"] == 15.0
+
+    def test_metrics_endpoint(self):
+        metrics = WorkerMetrics()
+        metrics.observe_job(job_result())
+        port = metrics.serve(0, host="127.0.0.1")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                body = response.read().decode()
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        finally:
+            metrics.shutdown()
+
+        assert 'worker_jobs_total{status="success"} 1' in body
@@ -0,0 +1,165 @@
+import os
+import time
+import pytest
+
+from app.core.config import settings
+from app.queues import build_job
+from app.queues.local import LocalJobQueue
+from app.tasks import video_tasks
+from app.tasks.video_tasks import SQSProcessWorker, VideoJob
+
+EVENTS_FILE = os.environ.setdefault("PIPELINE_TEST_EVENTS", "/tmp/pipeline_test_events.log")
+
+
+def record(stage: str, job: VideoJob, start: float) -> None:
+    """Stages run in threads and in pool processes: the events go to a shared file"""
+    with open(EVENTS_FILE, "a") as f:
+        f.write(f"{stage} {job.video_id} {start} {time.time()}\n")
+
+
+def fake_prepare(job: VideoJob) -> VideoJob:
+    start = time.time()
+    if job.video_id == "duplicate":
+        job.result = job.build_result("success", "processed/original.mp4", message="Duplicate content (reused)")
+    else:
+        time.sleep(0.4)  # descarga
+    record("prepare", job, start)
+    return job
+
+
+def fake_render(job: VideoJob) -> VideoJob:
+    start = time.time()
+    time.sleep(1)
+    if job.video_id == "broken":
+        job.error = "ffmpeg failed"
+    record("render", job, start)
+    return job
+
+
+def fake_publish(job: VideoJob) -> dict:
+    start = time.time()
+    time.sleep(0.4)  # subida
+    record("publish", job, start)
+    if job.error:
+        return job.build_result("failed", job.temp_file_path, error=job.error)
+    return job.build_result("success", f"processed/{job.video_id}/720p.mp4")
+
+
+def read_events() -> dict:
+    events = {}
+    with open(EVENTS_FILE) as f:
+        for line in f:
+            stage, video_id, start, end = line.split()
+            events[(stage, video_id)] = (float(start), float(end))
+    return events
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    queue = LocalJobQueue(str(tmp_path / "queue.db"), "test-pipeline-queue", visibility_timeout=30, poll_interval=0.05)
+    dead_letters = LocalJobQueue(str(tmp_path / "queue.db"), "test-pipeline-queue-dlq")
+    monkeypatch.setattr(video_tasks, "get_queue",
+                        lambda queue_name: dead_letters if queue_name.endswith("-dlq") else queue)
+    monkeypatch.setattr(settings, "WORKER_SCRATCH_MIN_FREE_MB", 0)
+    monkeypatch.setattr(settings, "TEMP_PATH", str(tmp_path / "scratch"))
+    monkeypatch.setattr(settings, "WORKER_PREFETCH_JOBS", 1)
+    monkeypatch.setattr(settings, "WORKER_IO_CONCURRENCY", 2)
+    if os.path.exists(EVENTS_FILE):
+        os.remove(EVENTS_FILE)
+    return queue
+
+
+def make_worker(concurrency: int = 1) -> SQSProcessWorker:
+    worker = SQSProcessWorker("test-pipeline-queue", concurrency=concurrency)
+    worker.pipeline_stages = (fake_prepare, fake_render, fake_publish)
+    return worker
+
+
+class TestWorkerPipeline:
+
+    def test_io_overlaps_render(self, queue):
+        """Test that the next job downloads and the previous one uploads while a job renders"""
+        queue.send_batch([build_job(f"video-{i}", f"uploads/video-{i}.mp4") for i in range(3)])
+        worker = make_worker(concurrency=1)
+        results = []
+
+        worker.run_pipeline(continuous=False, on_result=results.append)
+
+        assert sorted(result["video_id"] for result in results) == ["video-0", "video-1", "video-2"]
+        assert all(result["status"] == "success" for result in results)
+        assert queue.depth() == 0 and queue.receive_batch(max_messages=10, wait_seconds=0) == []
+
+        events = read_events()
+        renders = sorted((events[key], key[1]) for key in events if key[0] == "render")
+        (first_render, first), (second_render, second) = renders[0], renders[1]
+        # El siguiente job se descargó mientras el primero renderizaba...
+        assert events[("prepare", second)][1] < first_render[1]
+        # ...y el primero se subió mientras el segundo renderizaba
+        assert events[("publish", first)][0] < second_render[1]
+        # Con un solo slot de CPU los renders no se solapan
+        assert second_render[0] >= first_render[1] - 0.05
+        assert all("cpu_wait" in result["stages"] for result in results)
+
+    def test_prefetch_limits_jobs_waiting_for_cpu(self, queue):
+        """Test the backpressure: with one CPU slot and prefetch 1, at most 2 jobs are taken ahead of publish"""
+        queue.send_batch([build_job(f"video-{i}", f"uploads/video-{i}.mp4") for i in range(4)])
+        worker = make_worker(concurrency=1)
+
+        worker.run_pipeline(continuous=False)
+
+        events = read_events()
+        renders = sorted((events[("render", f"video-{i}")][0], f"video-{i}") for i in range(4))
+        # El job i+2 no empieza a descargarse antes de que el job i haya empezado a renderizar
+        for (render_start, _), (_, later) in zip(renders, renders[2:]):
+            assert events[("prepare", later)][0] >= render_start - 0.05
+
+    def test_duplicate_and_failed_jobs(self, queue):
+        """Test that a job finished in prepare skips the render and a failed render goes to the dead-letter queue"""
+        queue.send_batch([build_job("duplicate", "uploads/duplicate.mp4"), build_job("broken", "uploads/broken.mp4")])
+        worker = make_worker(concurrency=1)
+        results = []
+
+        worker.run_pipeline(continuous=False, on_result=results.append)
+
+        statuses = {result["video_id"]: result["status"] for result in results}
+        assert statuses == {"duplicate": "success", "broken": "failed"}
+        assert ("render", "duplicate") not in read_events()
+        assert worker.processed_count == 2
+        assert queue.depth() == 0
+        dead = worker.dead_letters.receive_batch(max_messages=10, wait_seconds=0)
+        assert [message.json()["job"]["videoId"] for message in dead] == ["broken"]
+
+    def test_leases_are_renewed_while_jobs_are_in_flight(self, queue, monkeypatch):
+        """Test that the claims of in-flight jobs are extended, except for jobs past the pipeline bound"""
+        renewed = []
+        monkeypatch.setattr(video_tasks, "SyncSessionLocal", lambda: type("Session", (), {"close": lambda self: None})())
+        monkeypatch.setattr(video_tasks, "renew_claim",
+                            lambda db, video_pk, version, worker_id: renewed.append(version) or True)
+        fresh = VideoJob("v1", "uploads/v1.mp4", ledger_version="sha-1", ledger_worker="w:1:a")
+        stale = VideoJob("v2", "uploads/v2.mp4", ledger_version="sha-2", ledger_worker="w:1:b",
+                         received_at=time.monotonic() - 120)
+        unclaimed = VideoJob("v3", "uploads/v3.mp4")
+
+        make_worker()._renew_leases([fresh, stale, unclaimed], max_job_seconds=60)
+
+        assert renewed == ["sha-1"]
+
+
+class TestPipelineDeadlines:
+
+    def test_io_stage_past_its_deadline_times_out(self, monkeypatch):
+        monkeypatch.setattr(settings, "WORKER_IO_TIMEOUT_SECONDS", 5)
+        job = VideoJob("v1", "uploads/v1.mp4")
+        video_tasks._check_deadline(job)
+
+        job.deadline = time.monotonic() - 1
+        with pytest.raises(video_tasks.JobTimeout):
+            video_tasks._check_deadline(job)
+
+    def test_job_bound_covers_io_stages_and_cpu_wait(self, monkeypatch):
+        """Test that the heartbeat and lease bound grows with the jobs that can wait ahead for CPU"""
+        monkeypatch.setattr(settings, "WORKER_IO_TIMEOUT_SECONDS", 100)
+        monkeypatch.setattr(settings, "WORKER_JOB_TIMEOUT_SECONDS", 1000)
+
+        assert video_tasks.pipeline_job_seconds(concurrency=2, prefetch=2) == 300 + 2 * 1000
+        assert video_tasks.pipeline_job_seconds(concurrency=1, prefetch=3) == 300 + 4 * 1000
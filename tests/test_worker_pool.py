@@ -0,0 +1,179 @@
+import os
+import subprocess
+import time
+import pytest
+
+from app.core.config import settings
+from app.queues import build_job
+from app.queues.local import LocalJobQueue
+from app.tasks import video_tasks
+from app.tasks.video_tasks import JobTimeout, SQSProcessWorker, job_timeout
+from app.utils.system_resources import worker_slots
+
+
+def sleepy_job(payload: dict) -> dict:
+    """Stand-in for a video job (runs in a pool process)"""
+    if payload['videoId'] == 'crash':
+        raise RuntimeError("worker process died")
+    if payload['videoId'] == 'broken':
+        return {'status': 'failed', 'video_id': 'broken', 'file_path': '', 'failure_class': 'validation',
+                'error': 'No video stream found in file'}
+    if payload['videoId'] == 'claimed':
+        return {'status': 'deferred', 'video_id': 'claimed', 'file_path': '', 'retry_after': 3}
+    started = time.time()
+    with open(os.path.join(payload['workspace'], "input.mp4"), "wb") as f:
+        f.write(b"\0" * 1024)
+    time.sleep(1)
+    return {'status': 'success', 'video_id': payload['videoId'], 'file_path': str(os.getpid()),
+            'workspace': payload['workspace'],
+            'started': started, 'finished': time.time()}
+
+
+@pytest.fixture
+def queues(tmp_path, monkeypatch):
+    """Work queue and dead-letter queue (same SQLite file, like QUEUE_BACKEND=local)"""
+    queues = {name: LocalJobQueue(str(tmp_path / "queue.db"), name, visibility_timeout=30, poll_interval=0.05)
+              for name in ("test-worker-queue", "test-worker-queue-dlq")}
+    monkeypatch.setattr(video_tasks, "get_queue", lambda queue_name: queues[queue_name])
+    monkeypatch.setattr(settings, "TEMP_PATH", str(tmp_path / "scratch"))
+    return queues
+
+
+@pytest.fixture
+def queue(queues):
+    return queues["test-worker-queue"]
+
+
+def make_worker(concurrency: int) -> SQSProcessWorker:
+    worker = SQSProcessWorker("test-worker-queue", concurrency=concurrency)
+    worker.job_function = sleepy_job
+    return worker
+
+
+class TestWorkerSlots:
+
+    @pytest.mark.parametrize("cpus,memory_mb,expected", [
+        (8, 32000, 8),   # limitado por CPU
+        (8, 4000, 2),    # limitado por memoria
+        (0.5, 500, 1),   # siempre al menos un slot
+    ])
+    def test_worker_slots(self, cpus, memory_mb, expected):
+        assert worker_slots(1.0, 1500, cpus=cpus, memory_mb=memory_mb) == expected
+
+
+class TestJobTimeout:
+
+    def test_timeout_kills_running_subprocess(self):
+        """Test that the hard timeout interrupts a job blocked on ffmpeg and kills the child process"""
+        start = time.monotonic()
+        with pytest.raises(JobTimeout):
+            with job_timeout(1):
+                subprocess.run(["sleep", "10"])
+
+        assert time.monotonic() - start < 3
+
+    def test_no_timeout_when_job_finishes(self):
+        with job_timeout(1):
+            pass
+        time.sleep(1.2)
+
+
+class TestWorkerPool:
+
+    def test_jobs_run_in_parallel_and_are_acked(self, queue):
+        """Test that a batch is processed by several processes at once and deleted from the queue"""
+        queue.send_batch([build_job(f"video-{i}", f"uploads/video-{i}.mp4") for i in range(4)])
+        worker = make_worker(concurrency=4)
+        results = []
+
+        worker.run_pool(continuous=False, on_result=results.append)
+
+        assert sorted(result['video_id'] for result in results) == [f"video-{i}" for i in range(4)]
+        assert len({result['file_path'] for result in results}) > 1
+        results.sort(key=lambda result: result['started'])
+        assert any(later['started'] < earlier['finished'] for earlier, later in zip(results, results[1:]))
+        assert worker.processed_count == 4
+        assert queue.depth() == 0
+        assert queue.receive_batch(max_messages=10, wait_seconds=0) == []
+
+    def test_each_job_gets_its_own_workspace(self, queue):
+        """Test that every job writes to its own scratch directory, removed once the message is settled"""
+        queue.send_batch([build_job(f"video-{i}", f"uploads/video-{i}.mp4") for i in range(3)])
+        worker = make_worker(concurrency=3)
+        results = []
+
+        worker.run_pool(continuous=False, on_result=results.append)
+
+        workspaces = [result['workspace'] for result in results]
+        assert len(set(workspaces)) == 3
+        assert all(os.path.basename(path).startswith(result['video_id'] + ".")
+                   for path, result in zip(workspaces, results))
+        assert not any(os.path.exists(path) for path in workspaces)
+        assert worker.workspaces.active == {}
+
+    def test_scratch_budget_gates_admission(self, queue, monkeypatch):
+        """Test that with room for one job in the scratch budget the pool runs the jobs one at a time"""
+        monkeypatch.setattr(settings, "WORKER_SCRATCH_BUDGET_MB", 1)
+        monkeypatch.setattr(settings, "WORKER_SCRATCH_JOB_MB", 1)
+        queue.send_batch([build_job(f"video-{i}", f"uploads/video-{i}.mp4") for i in range(2)])
+        worker = make_worker(concurrency=2)
+        results = []
+
+        worker.run_pool(continuous=False, on_result=results.append)
+
+        first, second = sorted(results, key=lambda result: result['started'])
+        assert second['started'] >= first['finished']
+        assert queue.depth() == 0
+
+    def test_max_messages_limits_received_jobs(self, queue):
+        """Test that the pool never takes more messages than the remaining limit"""
+        queue.send_batch([build_job(f"video-{i}", f"uploads/video-{i}.mp4") for i in range(5)])
+        worker = make_worker(concurrency=4)
+
+        worker.run_pool(continuous=False, max_messages=3)
+
+        assert worker.processed_count == 3
+        assert queue.depth() == 2
+
+    def test_failed_job_is_not_acked(self, queue):
+        """Test that a job that crashes in the pool stays in the queue for redelivery"""
+        queue.send_batch([build_job("crash", "uploads/crash.mp4"), build_job("video-ok", "uploads/video-ok.mp4")])
+        worker = make_worker(concurrency=2)
+
+        worker.run_pool(continuous=False)
+
+        assert worker.processed_count == 1
+        remaining = queue._conn().execute("SELECT body FROM jobs WHERE queue = ?", (queue.queue_name,)).fetchall()
+        assert len(remaining) == 1 and '"crash"' in remaining[0][0]
+
+    def test_deferred_job_is_hidden_until_the_claim_expires(self, queue):
+        """Test that a job claimed by another worker is not deleted but comes back after retry_after"""
+        queue.send_batch([build_job("claimed", "uploads/claimed.mp4"), build_job("video-ok", "uploads/video-ok.mp4")])
+        worker = make_worker(concurrency=2)
+
+        worker.run_pool(continuous=False)
+
+        assert worker.processed_count == 2
+        assert queue.depth() == 0
+        time.sleep(3.2)
+        redelivered = queue.receive_batch(max_messages=10, wait_seconds=0)
+        assert [message.json()['videoId'] for message in redelivered] == ["claimed"]
+
+    def test_permanent_failure_goes_to_dead_letter_queue(self, queues, queue):
+        """Test that failed and malformed jobs are moved to the DLQ with their failure class and counted"""
+        queue.send_batch([build_job("broken", "uploads/broken.mp4"), build_job("video-ok", "uploads/video-ok.mp4")])
+        queue._conn().execute("INSERT INTO jobs (queue, body, visible_at) VALUES (?, 'not json', 0)", (queue.queue_name,))
+        worker = make_worker(concurrency=2)
+
+        worker.run_pool(continuous=False)
+
+        assert queue.depth() == 0
+        dead = queues["test-worker-queue-dlq"].receive_batch(max_messages=10, wait_seconds=0)
+        entries = sorted((message.json() for message in dead), key=lambda entry: entry["failureClass"])
+        assert [entry["failureClass"] for entry in entries] == ["malformed", "validation"]
+        assert entries[0]["rawBody"] == "not json"
+        assert entries[1]["job"]["videoId"] == "broken" and "attempt" not in entries[1]["job"]
+        assert entries[1]["error"] == "No video stream found in file"
+        metrics = worker.metrics.render()
+        assert 'worker_job_failures_total{class="validation",action="dead_letter"} 1' in metrics
+        assert 'worker_job_failures_total{class="malformed",action="dead_letter"} 1' in metrics
@@ -0,0 +1,127 @@
+import os
+import subprocess
+import sys
+import time
+
+from app.tasks.workspace import LOCK_FILE, MB, UNLOCKED_GRACE_SECONDS, WorkspaceManager, sweep_legacy_scratch
+
+
+def make_manager(tmp_path, **kwargs) -> WorkspaceManager:
+    options = dict(budget_bytes=3 * MB, job_bytes=MB, min_free_bytes=0)
+    options.update(kwargs)
+    return WorkspaceManager(str(tmp_path / "jobs"), **options)
+
+
+class TestWorkspaceManager:
+
+    def test_each_job_gets_a_locked_directory(self, tmp_path):
+        manager = make_manager(tmp_path)
+
+        first, second = manager.acquire("video-1"), manager.acquire("video-1")
+
+        assert first.path != second.path
+        assert os.path.basename(first.path).startswith("video-1.")
+        assert os.path.exists(first.file(LOCK_FILE))
+        manager.release(first)
+        assert not os.path.exists(first.path)
+        assert list(manager.active) == [second.path]
+
+    def test_name_cannot_escape_the_root(self, tmp_path):
+        manager = make_manager(tmp_path)
+
+        workspace = manager.acquire("../../etc")
+
+        assert os.path.dirname(workspace.path) == manager.root
+
+    def test_budget_gates_admission(self, tmp_path):
+        """Test that every job counts its reservation, or its real size once it writes more"""
+        manager = make_manager(tmp_path)
+        assert manager.admissible() == 3
+
+        workspace = manager.acquire("video-1")
+        assert manager.admissible() == 2
+
+        with open(workspace.file("input.mp4"), "wb") as f:
+            f.write(b"\0" * 3 * MB)
+        assert manager.used_bytes() == 3 * MB
+        assert manager.admissible() == 0
+        assert not manager.can_admit()
+
+        manager.release(workspace)
+        assert manager.admissible() == 3
+
+    def test_free_disk_floor_gates_admission(self, tmp_path):
+        manager = make_manager(tmp_path, budget_bytes=1 << 60, min_free_bytes=1 << 60)
+
+        assert not manager.can_admit()
+
+    def test_tmpfs_is_used_while_it_fits(self, tmp_path):
+        manager = make_manager(tmp_path, tmpfs_root=str(tmp_path / "shm"), tmpfs_budget_bytes=MB)
+
+        in_memory, on_disk = manager.acquire("video-1"), manager.acquire("video-2")
+
+        assert in_memory.tmpfs and os.path.dirname(in_memory.path) == str(tmp_path / "shm")
+        assert not on_disk.tmpfs and os.path.dirname(on_disk.path) == manager.root
+        manager.release(in_memory)
+        assert manager.acquire("video-3").tmpfs
+
+    def test_sweep_removes_only_unlocked_workspaces(self, tmp_path):
+        """Test that the startup sweep removes workspaces of dead workers and keeps the ones still locked"""
+        manager = make_manager(tmp_path)
+        orphan = manager.acquire("crashed")
+        os.close(orphan.lock_fd)  # el proceso que lo tenía murió
+        manager.active.clear()
+        # Otro worker vivo con su workspace bloqueado
+        alive = subprocess.Popen([sys.executable, "-c", (
+            "import fcntl, os, sys, time\n"
+            f"path = os.path.join({manager.root!r}, 'alive.x')\n"
+            "os.makedirs(path)\n"
+            f"fd = os.open(os.path.join(path, {LOCK_FILE!r}), os.O_CREAT | os.O_RDWR)\n"
+            "fcntl.flock(fd, fcntl.LOCK_EX)\n"
+            "print('ready', flush=True)\n"
+            "time.sleep(30)\n"
+        )], stdout=subprocess.PIPE, text=True)
+        try:
+            assert alive.stdout.readline().strip() == "ready"
+            new_unlocked = tmp_path / "jobs" / "creating.x"
+            new_unlocked.mkdir()
+            old_unlocked = tmp_path / "jobs" / "stale.x"
+            old_unlocked.mkdir()
+            past = time.time() - UNLOCKED_GRACE_SECONDS - 1
+            os.utime(old_unlocked, (past, past))
+
+            assert make_manager(tmp_path).sweep_orphans() == 2
+
+            assert sorted(os.listdir(manager.root)) == ["alive.x", "creating.x"]
+        finally:
+            alive.kill()
+            alive.wait()
+
+        assert make_manager(tmp_path).sweep_orphans() == 1
+
+    def test_sweep_keeps_own_workspaces(self, tmp_path):
+        manager = make_manager(tmp_path)
+        workspace = manager.acquire("video-1")
+
+        assert manager.sweep_orphans() == 0
+        assert os.path.isdir(workspace.path)
+        manager.release(workspace)
+
+
+class TestLegacyScratch:
+
+    def test_old_flat_files_are_removed(self, tmp_path):
+        for name in ("v1_input.mp4", "v1_test_frame.jpg", "CORRUPTED_v1_720p.mp4", "v1_verify_720p.mp4",
+                     "logo720.png", "v2_input.mp4"):
+            (tmp_path / name).write_bytes(b"x")
+        (tmp_path / "v1_processed").mkdir()
+        past = time.time() - 3600
+        for name in ("v1_input.mp4", "v1_test_frame.jpg", "CORRUPTED_v1_720p.mp4", "v1_verify_720p.mp4",
+                     "v1_processed", "logo720.png"):
+            os.utime(tmp_path / name, (past, past))
+
+        removed = sweep_legacy_scratch(str(tmp_path), older_than=600)
+
+        assert len(removed) == 5
+        # El logo cacheado no es scratch y v2 puede ser de un worker viejo todavía corriendo
+        assert sorted(os.listdir(tmp_path)) == ["logo720.png", "v2_input.mp4"]